@@ -0,0 +1,173 @@
+"""this module checks big aux leds files (for example generated files with hundreds of thousands of steps) without
+loading whole file: file is read line by line and only one sequencer is parsed and checked at a time, so memory is
+bounded by the biggest sequencer; messages are the same as Auxchecker messages (positions are got by counting, not
+by searching in lists)
+List of functions
+-iter_sequencers(lines):                  yields effects and their parsed sequencers one by one
+-check_stream(lines, leds_number, plan):  checks aux leds file and yields messages
+"""
+import re
+import sys
+import json
+import argparse
+from IniToJson import iter_prepared_lines, remove_extra_commas
+from CommonChecks import *
+from Auxchecker import leds_number, check_sequencer_steps, get_step_checks, check_config, get_leds_mask, \
+    get_leds_usage_report
+
+brackets = re.compile(r'[\[\]{}]')
+effect_header = re.compile(r'^\s*,?\s*"(\w+)"\s*:\s*$')
+
+
+def parse_sequencer(text: str, line: int) -> (dict, str):
+    """
+    parses text of one sequencer
+    :param text: prepared sequencer text
+    :param line: number of first line of sequencer
+    :return: sequencer data or None, error message or empty string
+    """
+    try:
+        return json.loads(remove_extra_commas(text)), ""
+    except json.decoder.JSONDecodeError:
+        e = sys.exc_info()[1]
+        return None, "Line %i: %s" % (line + e.lineno - 1, e.msg)
+
+
+def iter_sequencers(lines):
+    """
+    reads aux leds file line by line and yields events: ('effect', name, line) when effect list starts,
+    ('sequencer', name, parsed data or None, error, line) for each sequencer, ('end', name, line) when effect list ends
+    and ('error', message, line) for incorrect file structure (checking is stopped)
+    :param lines: iterable with lines of ini file
+    """
+    depth = 0
+    base = None
+    header, header_start = [], 0
+    unit, unit_start, unit_line = None, 0, 0
+    effect = None
+    number = 0
+    for number, line in iter_prepared_lines(lines):
+        if base is None:
+            if not line.strip():
+                continue
+            # file may be enclosed in {} like json
+            base = 1 if line.lstrip().startswith('{') else 0
+        for match in brackets.finditer(line):
+            if match.group() in '[{':
+                if depth == base:
+                    header.append(line[header_start:match.start()])
+                    name = effect_header.match("".join(header))
+                    header = []
+                    if match.group() != '[' or not name:
+                        yield 'error', "effect must be written as name: [sequencers, ...]", number
+                        return
+                    effect = name.group(1)
+                    yield 'effect', effect, number
+                elif depth == base + 1:
+                    unit, unit_start, unit_line = [], match.start(), number
+                depth += 1
+                header_start = match.end()
+                continue
+            depth -= 1
+            if depth < 0:
+                yield 'error', "extra closing bracket", number
+                return
+            if depth == base + 1 and unit is not None:
+                unit.append(line[unit_start:match.end()])
+                data, error = parse_sequencer("".join(unit), unit_line)
+                unit = None
+                yield 'sequencer', effect, data, error, unit_line
+            elif depth == base and effect is not None:
+                yield 'end', effect, number
+                effect = None
+            header_start = match.end()
+        if depth == base:
+            header.append(line[header_start:])
+        elif unit is not None:
+            unit.append(line[unit_start:])
+        header_start = unit_start = 0
+    if depth != 0:
+        yield 'error', "brackets are not closed", number
+    elif "".join(header).strip(' \n,{}'):
+        yield 'error', "effect must be written as name: [sequencers, ...]", number
+
+
+def check_stream(lines, leds_number: int = leds_number, plan: dict = None, usage: dict = None):
+    """
+    checks aux leds file sequencer by sequencer and yields messages in the same order as Auxchecker check_effect and
+    check_effect_leds do
+    :param lines: iterable with lines of ini file
+    :param leds_number: number of aux leds
+    :param plan: dict rule id -> severity (all rules if None)
+    :param usage: dict to fill with effect -> bitmask of used leds (for leds usage report), not filled if None
+    """
+    step_checks = get_step_checks(plan)
+    sequencers_level = get_rule_level(plan, 'aux_sequencers')
+    config_level = get_rule_level(plan, 'aux_config')
+    effect_messages = []
+    count = leds_used = 0
+    for event in iter_sequencers(lines):
+        if event[0] == 'error':
+            yield "Error: line %i: %s" % (event[2], event[1])
+            return
+        if event[0] == 'effect':
+            effect_messages = []
+            count = leds_used = 0
+            if usage is not None:
+                usage[event[1]] = 0
+        elif event[0] == 'sequencer':
+            effect, data, error, line = event[1:]
+            count += 1
+            if error:
+                yield "Error: '%s' effect, %i sequencer: %s" % (effect, count, error)
+                continue
+            if not is_settings(data):
+                yield "Error: '%s' effect, %i sequencer: sequencer must be written as {...}" % (effect, count)
+                continue
+            yield from check_sequencer_steps(data, effect, count, plan, step_checks)
+            if is_enabled(plan, 'aux_config'):
+                error, leds_count, leds_used = check_config(data, leds_used, leds_number)
+                if error:
+                    effect_messages.append("%s: '%s' effect, %i sequencer: " % (config_level, effect, count) + error)
+            if usage is not None:
+                config = get_value(data, 'config')
+                if is_list(config):
+                    usage[effect] |= get_leds_mask(config, leds_number)
+        elif event[0] == 'end':
+            effect = event[1]
+            if is_enabled(plan, 'aux_sequencers'):
+                if count == 0:
+                    yield "%s: '%s' effect has no sequencers;" % (sequencers_level, effect)
+                    continue
+                if count >= leds_number:
+                    yield "%s:'%s' effect: number of sequencers must be no more then %i;" \
+                          % (sequencers_level, effect, leds_number)
+            yield from effect_messages
+
+
+def main(filename: str, leds_number: int = leds_number, show_usage: bool = False) -> int:
+    try:
+        f = open(filename)
+    except FileNotFoundError:
+        print("File %s not found" % filename)
+        return 2
+    usage = {} if show_usage else None
+    result = 0
+    with f:
+        for message in check_stream(f, leds_number, usage=usage):
+            print(message)
+            result = result or int(message.startswith("Error"))
+    if show_usage:
+        print("Leds usage:")
+        for line in get_leds_usage_report(usage, leds_number):
+            print(line)
+    return result
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="checks big aux leds file sequencer by sequencer")
+    parser.add_argument('filename')
+    parser.add_argument('--leds', type=int, default=leds_number, help="number of aux leds")
+    parser.add_argument('--usage', action='store_true', help="print leds usage report")
+    args = parser.parse_args()
+    sys.exit(main(args.filename, args.leds, args.usage))
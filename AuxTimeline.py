@@ -0,0 +1,264 @@
+"""this module compiles aux leds sequencers into dense brightness timelines (numpy arrays)
+List of functions
+-expand_steps(steps, tick_ms, max_ticks):             unrolls repeat steps into flat array of step indexes
+-compile_sequencer(sequencer, tick_ms, max_ms, color): compiles one sequencer into (leds, ticks) brightness array
+-compile_effect(sequencers, leds_number, ...):         compiles all sequencers of effect into one timeline and finds
+                                                       leds written by several sequencers at the same time
+-export_timeline(filename, timelines, tick_ms):        saves timelines as compressed uint8 arrays
+-load_timeline(filename):                              loads timelines saved with export_timeline
+
+Step semantics: brightness step ramps leds from previous levels to new levels during Smooth ms and then holds them
+during Wait ms; wait step holds current levels during Wait ms; repeat step plays steps from StartingFrom step to
+repeat step Count more times ('forever' is played until max_ms). CopyRed/CopyGreen/CopyBlue values copy
+corresponding component of blade color (0...255 is scaled to 0...100).
+"""
+import sys
+import numpy as np
+from IniToJson import get_json
+from CommonChecks import get_real_key, get_value
+from Auxchecker import get_led_index, leds_number, aux_rules, check_effect, check_effect_leds
+
+default_tick_ms = 10
+default_max_ms = 60000
+default_color = (255, 255, 255)
+copy_components = {'copyred': 0, 'copygreen': 1, 'copyblue': 2}
+# leds used by several sequencers don't break compiling, they are reported as overlaps with their time
+compile_leds_plan = {rule: "default" for rule in aux_rules if rule != 'aux_config'}
+
+
+def get_step_levels(brightness: list, color: tuple) -> np.ndarray:
+    """
+    resolves brightness list of step (numbers and copy values) into array of levels
+    :param brightness: list with brightness settings
+    :param color: blade color used for CopyRed, CopyGreen, CopyBlue values
+    :return: array with levels 0...100
+    """
+    levels = []
+    for value in brightness:
+        if isinstance(value, str):
+            levels.append(color[copy_components.get(value.lower(), 0)] * 100.0 / 255)
+        else:
+            levels.append(value)
+    return np.asarray(levels, dtype=np.float32)
+
+
+def get_step_ticks(step: dict, key: str, tick_ms: int) -> int:
+    """
+    gets step duration parameter in ticks
+    :param step: dict with step data
+    :param key: duration key (wait or smooth)
+    :param tick_ms: tick length in ms
+    :return: number of ticks
+    """
+    value = get_value(step, key)
+    if not isinstance(value, int) or value <= 0:
+        return 0
+    return -(-value // tick_ms)
+
+
+def get_step_duration(step: dict, tick_ms: int) -> int:
+    """
+    gets full step duration in ticks (smooth ramp and wait)
+    :param step: dict with step data
+    :param tick_ms: tick length in ms
+    :return: number of ticks
+    """
+    if get_real_key(step, 'brightness'):
+        return get_step_ticks(step, 'smooth', tick_ms) + get_step_ticks(step, 'wait', tick_ms)
+    return get_step_ticks(step, 'wait', tick_ms)
+
+
+def expand_steps(steps: list, tick_ms: int, max_ticks: int) -> np.ndarray:
+    """
+    unrolls repeat steps into flat array of step indexes; repeated blocks are tiled as arrays, so nested repeats
+    and big counts do not make python loops longer
+    :param steps: list of steps of sequencer
+    :param tick_ms: tick length in ms
+    :param max_ticks: timeline is not expanded beyond this number of ticks
+    :return: array of indexes of played steps (repeat steps are not included)
+    """
+    durations = np.array([get_step_duration(step, tick_ms) for step in steps], dtype=np.int64)
+    played = np.zeros(0, dtype=np.int64)
+    # steps played after last repeat are collected in list and added to array at next repeat
+    added = []
+    played_ticks = 0
+    marks = {}
+    for i, step in enumerate(steps):
+        repeat = get_value(step, 'repeat')
+        if not isinstance(repeat, dict):
+            name = get_value(step, 'name')
+            if isinstance(name, str):
+                # names are compared without case like in Auxchecker.check_repeat
+                marks[name.lower()] = len(played) + len(added)
+            added.append(i)
+            played_ticks += int(durations[i])
+            continue
+        start = get_value(repeat, 'startingfrom')
+        start = marks.get(start.lower()) if isinstance(start, str) else None
+        count = get_value(repeat, 'count')
+        if start is None or start == len(played) + len(added):
+            continue
+        if added:
+            played = np.concatenate((played, np.array(added, dtype=np.int64)))
+            added = []
+        block = played[start:]
+        block_ticks = int(durations[block].sum())
+        rest_ticks = max_ticks - played_ticks
+        if rest_ticks <= 0:
+            break
+        if block_ticks == 0:
+            continue
+        # forever and very big counts are limited by timeline length
+        max_count = -(-rest_ticks // block_ticks)
+        if not isinstance(count, int) or count > max_count:
+            count = max_count
+        if count > 0:
+            played = np.concatenate((played, np.tile(block, count)))
+            played_ticks += block_ticks * count
+    if added:
+        played = np.concatenate((played, np.array(added, dtype=np.int64)))
+    return played
+
+
+def compile_sequencer(sequencer: dict, tick_ms: int = default_tick_ms, max_ms: int = default_max_ms,
+                      color: tuple = default_color) -> np.ndarray:
+    """
+    compiles sequencer to brightness timeline, sequencer is expected to be checked by Auxchecker
+    :param sequencer: dict with sequencer data
+    :param tick_ms: tick length in ms
+    :param max_ms: max timeline length in ms
+    :param color: blade color for copy values
+    :return: float32 array (leds in config, ticks) with brightness 0...100
+    """
+    leds_count = len(get_value(sequencer, 'config'))
+    steps = get_value(sequencer, 'sequence')
+    max_ticks = max_ms // tick_ms
+    played = expand_steps(steps, tick_ms, max_ticks)
+    ramps = np.array([get_step_ticks(step, 'smooth', tick_ms) if get_real_key(step, 'brightness') else 0
+                      for step in steps], dtype=np.int64)[played]
+    durations = np.array([get_step_duration(step, tick_ms) for step in steps], dtype=np.int64)[played]
+    # levels set by each played step, wait steps keep previous levels (forward fill by index of last set step)
+    targets = np.zeros((len(steps) + 1, leds_count), dtype=np.float32)
+    has_levels = np.zeros(len(steps) + 1, dtype=bool)
+    has_levels[0] = True
+    for i, step in enumerate(steps):
+        brightness = get_value(step, 'brightness')
+        if isinstance(brightness, list):
+            targets[i + 1] = get_step_levels(brightness, color)
+            has_levels[i + 1] = True
+    rows = np.where(has_levels[played + 1], played + 1, 0)
+    set_positions = np.where(has_levels[played + 1], np.arange(len(played)) + 1, 0)
+    last_set = np.maximum.accumulate(np.concatenate(([0], set_positions)))
+    rows_with_start = np.concatenate(([0], rows))
+    end_levels = targets[rows_with_start[last_set]]
+    start_levels = end_levels[:-1]
+    end_levels = end_levels[1:]
+    # drop empty steps and build tick -> step mapping
+    keep = durations > 0
+    durations, ramps = durations[keep], ramps[keep]
+    start_levels, end_levels = start_levels[keep], end_levels[keep]
+    if len(durations) == 0:
+        return np.zeros((leds_count, 0), dtype=np.float32)
+    step_of_tick = np.repeat(np.arange(len(durations)), durations)[:max_ticks]
+    starts = np.concatenate(([0], np.cumsum(durations)[:-1]))
+    offsets = np.arange(len(step_of_tick)) - starts[step_of_tick]
+    ramp = ramps[step_of_tick]
+    fraction = np.ones(len(step_of_tick), dtype=np.float32)
+    smooth = ramp > 0
+    fraction[smooth] = np.minimum((offsets[smooth] + 1) / ramp[smooth], 1.0)
+    levels = start_levels[step_of_tick] + (end_levels - start_levels)[step_of_tick] * fraction[:, None]
+    return levels.T
+
+
+def compile_effect(sequencers: list, leds_number: int, tick_ms: int = default_tick_ms,
+                   max_ms: int = default_max_ms, color: tuple = default_color) -> (np.ndarray, list):
+    """
+    compiles all sequencers of effect to one timeline and finds leds written by several sequencers at once
+    :param sequencers: list of sequencers of effect
+    :param leds_number: number of aux leds
+    :param tick_ms: tick length in ms
+    :param max_ms: max timeline length in ms
+    :param color: blade color for copy values
+    :return: float32 array (leds_number, ticks) and list of overlap messages
+    """
+    compiled = []
+    for sequencer in sequencers:
+        leds = np.array([get_led_index(led) for led in get_value(sequencer, 'config')], dtype=np.int64)
+        compiled.append((leds, compile_sequencer(sequencer, tick_ms, max_ms, color)))
+    ticks = max([levels.shape[1] for leds, levels in compiled], default=0)
+    timeline = np.zeros((leds_number, ticks), dtype=np.float32)
+    writers = np.zeros((leds_number, ticks), dtype=np.int32)
+    for leds, levels in compiled:
+        valid = (leds >= 0) & (leds < leds_number)
+        timeline[leds[valid], :levels.shape[1]] = levels[valid]
+        np.add.at(writers, (leds[valid], slice(0, levels.shape[1])), 1)
+    overlaps = []
+    for led in np.flatnonzero((writers > 1).any(axis=1)):
+        conflict = np.flatnonzero(writers[led] > 1)
+        users = [i + 1 for i, (leds, levels) in enumerate(compiled) if led in leds]
+        overlaps.append("Led%i is written by sequencers %s at %i...%i ms" %
+                        (led + 1, ", ".join(str(user) for user in users), conflict[0] * tick_ms,
+                         (conflict[-1] + 1) * tick_ms))
+    return timeline, overlaps
+
+
+def export_timeline(filename: str, timelines: dict, tick_ms: int = default_tick_ms):
+    """
+    saves timelines as compressed uint8 arrays (one array per effect)
+    :param filename: output file name (.npz)
+    :param timelines: dict effect name -> timeline array
+    :param tick_ms: tick length in ms
+    """
+    arrays = {effect: np.rint(timeline).astype(np.uint8) for effect, timeline in timelines.items()}
+    np.savez_compressed(filename, tick_ms=np.array(tick_ms), **arrays)
+
+
+def load_timeline(filename: str) -> (dict, int):
+    """
+    loads timelines saved by export_timeline
+    :param filename: file name
+    :return: dict effect name -> uint8 timeline array and tick length in ms
+    """
+    with np.load(filename) as data:
+        tick_ms = int(data['tick_ms'])
+        return {key: data[key] for key in data.files if key != 'tick_ms'}, tick_ms
+
+
+def main(filename: str, output: str = "", leds_number: int = leds_number, tick_ms: int = default_tick_ms):
+    try:
+        f = open(filename)
+    except FileNotFoundError:
+        print("File %s not found" % filename)
+        return -1
+    text = f.read()
+    data, error = get_json(text)
+    if not data:
+        print(error)
+        return -1
+    timelines = {}
+    result = 0
+    for effect in data.keys():
+        # effects are compiled only if they are correct (config is list of leds, steps are correct)
+        errors = check_effect(data, effect) + \
+            check_effect_leds(data, effect, leds_number, compile_leds_plan)
+        if errors:
+            print("'%s' effect is not compiled:" % effect)
+            for error in errors:
+                print("  " + error.replace("\n", "\n  "))
+            result = 1
+            continue
+        timeline, overlaps = compile_effect(data[effect], leds_number, tick_ms)
+        timelines[effect] = timeline
+        print("'%s' effect: %i ms" % (effect, timeline.shape[1] * tick_ms))
+        for overlap in overlaps:
+            print("Warning: '%s' effect: %s" % (effect, overlap))
+    if output:
+        export_timeline(output, timelines, tick_ms)
+    return result
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        main(sys.argv[1], sys.argv[2] if len(sys.argv) > 2 else "")
+    else:
+        print("Usage: AuxTimeline.py aux_file.ini [timeline.npz]")
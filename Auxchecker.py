@@ -1,21 +1,23 @@
 import sys
 from IniToJson import get_json
 from CommonChecks import *
+import Defaults
 
-leds_number = 8
+leds_number = Defaults.aux_leds
 leds_copy_list = ['copyred', 'copyblue', 'copygreen']
 step_keys = ['repeat', 'wait', 'brightness', 'smooth', 'name']
 bignumber = 36000000
 
 
-def check_sequencer(data, effect) -> str:
+def check_sequencer(data, effect, leds_number: int = leds_number) -> str:
     """
     gets data dict and checks if any sequencers for effect and number of sequencers < leds_number
     :param data: dict with ini data
     :param effect: effect
+    :param leds_number: number of aux leds
     :return: error text or empty string
     """
-    if not data[effect] or not isinstance(data[effect], list):
+    if not data[effect] or not is_list(data[effect]):
         return "Error: '%s' effect has no sequencers;" % effect
     if len(data[effect]) >= leds_number:
         return "Error:'%s' effect: number of sequencers must be no more then %i;" \
@@ -23,35 +25,136 @@ def check_sequencer(data, effect) -> str:
     return ""
 
 
-def check_config(sequencer: dict, leds_used: list) -> (str, int, list):
+def get_led_index(led: str) -> int:
     """
-    checks if sequencer config exists, is not empty, is correct
-    (leds are not conflicting with used leds, leds are selected properly)
+    gets led index from led name
+    :param led: led name (Led1...LedN)
+    :return: zero based led index or -1 if led name is incorrect
+    """
+    if not isinstance(led, str) or not led.lower().startswith('led') or not led[3:].isdigit():
+        return -1
+    return int(led[3:]) - 1
+
+
+def get_leds_mask(leds: list, leds_number: int = leds_number) -> int:
+    """
+    gets bitmask of leds list (bit 0 is Led1), incorrect leds are ignored
+    :param leds: list of leds names
+    :param leds_number: number of aux leds
+    :return: bitmask
+    """
+    mask = 0
+    for led in leds:
+        index = get_led_index(led)
+        if 0 <= index < leds_number:
+            mask |= 1 << index
+    return mask
+
+
+def get_leds_names(mask: int) -> str:
+    """
+    gets leds list for bitmask with ranges compressed (Led1-3, Led6)
+    :param mask: leds bitmask
+    :return: string with leds names
+    """
+    names = []
+    index = 0
+    while mask >> index:
+        if not (mask >> index) & 1:
+            index += 1
+            continue
+        end = index
+        while (mask >> (end + 1)) & 1:
+            end += 1
+        names.append("Led%i" % (index + 1) if end == index else "Led%i-%i" % (index + 1, end + 1))
+        index = end + 1
+    return ", ".join(names)
+
+
+def get_leds_count(sequencer: dict) -> (str, int):
+    """
+    checks if sequencer config exists, is a list and is not empty
     :param sequencer: dictionary with sequencer data
-    :param leds_used: list of used leds
-    :return: error text or empty string
+    :return: error text or empty string, number of leds in config
     """
-    error = ""
     config = get_real_key(sequencer, "config")
     if not config:
-        return "no Config string with leds list;", 0, leds_used
-    if not isinstance(sequencer[config], list):
+        return "no Config string with leds list;", 0
+    if not is_list(sequencer[config]):
         return "config parameter must be list of LEDS (for example [Led1, Led2]);", 0
     leds_count = len(sequencer[config])
     if leds_count == 0:
-        return "0 LEDs selected", 0, leds_used
-    incorrect_leds = [led for led in sequencer[config] if
-                      led.lower() not in ['led1', 'led2', 'led3', 'led4', 'led5', 'led6', 'led7', 'led8']]
+        return "0 LEDs selected", 0
+    return "", leds_count
+
+
+def check_config(sequencer: dict, leds_used: int, leds_number: int = leds_number) -> (str, int, int):
+    """
+    checks if sequencer config leds are correct (leds are not conflicting with used leds, leds are selected
+    properly); absent or empty config is reported by get_leds_count
+    :param sequencer: dictionary with sequencer data
+    :param leds_used: bitmask of leds used by other sequencers of effect
+    :param leds_number: number of aux leds
+    :return: error text or empty string, number of leds in config, updated bitmask of used leds
+    """
+    error = ""
+    e, leds_count = get_leds_count(sequencer)
+    if e:
+        return "", 0, leds_used
+    config = get_real_key(sequencer, "config")
+    incorrect_leds = [led for led in sequencer[config] if not 0 <= get_led_index(led) < leds_number]
     if incorrect_leds:
         error += "incorrect led value;\n"
     for led in sequencer[config]:
-        if led in leds_used:
+        index = get_led_index(led)
+        if not 0 <= index < leds_number:
+            continue
+        if (leds_used >> index) & 1:
             error += "%s: this led is already used in other sequencer for this effect;\n" % led
         else:
-            leds_used.append(led)
+            leds_used |= 1 << index
     return error.strip(), leds_count, leds_used
 
 
+def get_leds_usage(data: dict, leds_number: int = leds_number) -> dict:
+    """
+    gets bitmask of leds used by each effect
+    :param data: dict with ini data
+    :param leds_number: number of aux leds
+    :return: dict effect -> bitmask
+    """
+    usage = {}
+    for effect in data.keys():
+        usage[effect] = 0
+        if not is_list(data[effect]):
+            continue
+        for sequencer in data[effect]:
+            config = get_value(sequencer, 'config') if is_settings(sequencer) else None
+            if is_list(config):
+                usage[effect] |= get_leds_mask(config, leds_number)
+    return usage
+
+
+def get_leds_usage_report(usage: dict, leds_number: int = leds_number) -> list:
+    """
+    gets leds usage matrix (effects x leds) as text lines
+    :param usage: dict effect -> bitmask from get_leds_usage
+    :param leds_number: number of aux leds
+    :return: list of lines
+    """
+    width = max([len(effect) for effect in usage.keys()], default=0)
+    lines = []
+    used = 0
+    for effect, mask in usage.items():
+        used |= mask
+        row = "".join("#" if (mask >> index) & 1 else "." for index in range(leds_number))
+        lines.append("%s %s %s" % (effect.ljust(width), row, get_leds_names(mask)))
+    unused = ((1 << leds_number) - 1) & ~used
+    if unused:
+        lines.append("Unused leds: %s" % get_leds_names(unused))
+    return lines
+
+
 def check_sequence(sequencer: dict) -> str:
     """
     checks is sequence exists, if sequences are an array and this array is not empty
@@ -59,7 +162,7 @@ def check_sequence(sequencer: dict) -> str:
     :return: error empty string
     """
     sequence = get_real_key(sequencer, "sequence")
-    if not sequence or not isinstance(sequencer[sequence], list):
+    if not sequence or not is_list(sequencer[sequence]):
         return "no steps"
     if len(sequencer[sequence]) == 0:
         return "no steps"
@@ -73,14 +176,20 @@ def get_namelist(sequencer: dict) -> (list, str):
     :return: list of names
     """
     namelist = []
+    names = set()
     error = ""
     sequence = get_real_key(sequencer, "sequence")
     for step in sequencer[sequence]:
         name = get_real_key(step, "name")
         if name:
-            if step[name] in namelist:
-                error += "name %s is already used" % step[name]
-            namelist.append(step[name])
+            name = step[name]
+            # names are strings, set is used to find duplicates without searching whole list
+            used = name in names if isinstance(name, str) else name in namelist
+            if used:
+                error += "name %s is already used" % name
+            elif isinstance(name, str):
+                names.add(name)
+            namelist.append(name)
     return namelist, error
 
 
@@ -110,19 +219,25 @@ def check_brightness(step: dict, leds_count: int) -> str:
     brightness = get_real_key(step, "brightness")
     if brightness:
         brightness = step[brightness]
-        if not isinstance(brightness, list):
+        if not is_list(brightness):
             return "Brightness must be a list of leds"
         if len(brightness) != leds_count:
             return "incorrect leds number"
-        for led in brightness:
+        wrong_values, wrong_names = [], []
+        for i in get_bad_indices(brightness, 0, 100):
+            led = brightness[i]
             if isinstance(led, int):
-                if led < 0 or led > 100:
-                    return "%i led brightness is not correct (expect value from 0 to 100 inclusively)" \
-                           % brightness.index(led) + 1
-            else:
-                if led.lower() not in leds_copy_list:
-                    return "%i led is incorrect: use 0...100 or one of CopyRed, CopyBlue, CopyGreen values" \
-                           % brightness.index(led) + 1
+                wrong_values.append(i)
+            elif not isinstance(led, str) or led.lower() not in leds_copy_list:
+                wrong_names.append(i)
+        error = ""
+        if wrong_values:
+            error += "leds %s: brightness is not correct (expect value from 0 to 100 inclusively)\n" % \
+                     get_indices_text(wrong_values)
+        if wrong_names:
+            error += "leds %s: incorrect value, use 0...100 or one of CopyRed, CopyBlue, CopyGreen values" % \
+                     get_indices_text(wrong_names)
+        return error.strip()
     return ""
 
 
@@ -131,13 +246,22 @@ def check_wait(step: dict) -> str:
     check if wait parameters are correct
     :return: error or empty string
     """
-    return check_unnecessary_number(step, 'wait', 0, big_number)
+    return check_unnecessary_number(step, 'wait', 0, bignumber)
 
-def check_repeat(step: dict, namelist: [str]) -> str:
+def get_names(namelist: list) -> set:
+    """
+    gets set of lowercased step names for search of repeat start steps
+    :param namelist: list of names of steps from get_namelist
+    :return: set of names
+    """
+    return {name.lower() for name in namelist if isinstance(name, str)}
+
+
+def check_repeat(step: dict, names: set) -> str:
     """
     check correctness of repeat step (correct count value, step for repeat exists)
     :param step: dict with step data
-    :param namelist: list of names of steps
+    :param names: set of lowercased names of steps from get_names
     :return: error string or empty string
     """
     repeat = get_real_key(step, "repeat")
@@ -145,7 +269,7 @@ def check_repeat(step: dict, namelist: [str]) -> str:
     if repeat:
         repeat = step[repeat]
         start_step = get_real_key(repeat, "startingfrom")
-        if not start_step or repeat[start_step] not in namelist:
+        if not start_step or not isinstance(repeat[start_step], str) or repeat[start_step].lower() not in names:
             error = "start parameter ('StartingFrom') for repeat must be an existing step name\n"
         count = get_real_key(repeat, "count")
         if not count:
@@ -181,7 +305,120 @@ def check_smooth(step: dict) -> str:
     return ""
 
 
-def main(filename: str):
+aux_step_rules = [('aux_brightness', lambda step, leds_count, names: check_brightness(step, leds_count)),
+                  ('aux_wait', lambda step, leds_count, names: check_wait(step)),
+                  ('aux_repeat', lambda step, leds_count, names: check_repeat(step, names)),
+                  ('aux_smooth', lambda step, leds_count, names: check_smooth(step))]
+aux_rules = ['aux_sequencers', 'aux_config', 'aux_sequence', 'aux_names', 'aux_step_keys'] + \
+            [rule for rule, check in aux_step_rules]
+
+
+def get_step_checks(plan: dict = None) -> list:
+    """
+    gets step checks enabled in plan
+    :param plan: dict rule id -> severity (all rules if None)
+    :return: list of (rule, message level, check function)
+    """
+    return [(rule, get_rule_level(plan, rule), check) for rule, check in aux_step_rules if is_enabled(plan, rule)]
+
+
+def check_sequencer_steps(sequencer: dict, effect: str, i_seq: int, plan: dict = None,
+                          step_checks: list = None) -> list:
+    """
+    checks one sequencer of effect and its steps (settings that don't depend on number of aux leds)
+    :param sequencer: dict with sequencer data
+    :param effect: effect
+    :param i_seq: sequencer number (starting from 1)
+    :param plan: dict rule id -> severity (all rules if None)
+    :param step_checks: step checks from get_step_checks (got from plan if None)
+    :return: list of error messages
+    """
+    messages = []
+    if step_checks is None:
+        step_checks = get_step_checks(plan)
+    prefix = "'%s' effect, %i sequencer: " % (effect, i_seq)
+    error, leds_count = get_leds_count(sequencer)
+    if error:
+        if is_enabled(plan, 'aux_config'):
+            messages.append("%s: %s%s" % (get_rule_level(plan, 'aux_config'), prefix, error))
+        return messages
+    error = check_sequence(sequencer)
+    if error:
+        if is_enabled(plan, 'aux_sequence'):
+            messages.append("%s: %s%s" % (get_rule_level(plan, 'aux_sequence'), prefix, error))
+        return messages
+    namelist, error = get_namelist(sequencer)
+    if error and is_enabled(plan, 'aux_names'):
+        messages.append("%s: %s%s" % (get_rule_level(plan, 'aux_names'), prefix, error))
+    # names set is built once for all repeat steps of sequencer
+    names = get_names(namelist)
+    sequence = get_real_key(sequencer, "sequence")
+
+    for i_step, step in enumerate(sequencer[sequence], 1):
+        name = ""
+        name_key = get_real_key(step, "name")
+        if name_key:
+            name = step[name_key]
+        prefix = "'%s' effect, %i sequencer, %i step(%s): " % (effect, i_seq, i_step, name)
+        if is_enabled(plan, 'aux_step_keys'):
+            error = check_step_keys(step)
+            if error:
+                messages.append("%s: %s%s" % (get_rule_level(plan, 'aux_step_keys'), prefix, error))
+                continue
+        for rule, level, check in step_checks:
+            error = check(step, leds_count, names)
+            if error:
+                messages.append("%s: %s%s" % (level, prefix, error))
+    return messages
+
+
+def check_effect(data: dict, effect: str, plan: dict = None) -> list:
+    """
+    checks effect sequencers and their steps (settings that don't depend on number of aux leds)
+    :param data: dict with ini data
+    :param effect: effect
+    :param plan: dict rule id -> severity (all rules if None)
+    :return: list of error messages
+    """
+    if not data[effect] or not is_list(data[effect]):
+        if not is_enabled(plan, 'aux_sequencers'):
+            return []
+        return ["%s: '%s' effect has no sequencers;" % (get_rule_level(plan, 'aux_sequencers'), effect)]
+    messages = []
+    step_checks = get_step_checks(plan)
+    for i_seq, sequencer in enumerate(data[effect], 1):
+        messages += check_sequencer_steps(sequencer, effect, i_seq, plan, step_checks)
+    return messages
+
+
+def check_effect_leds(data: dict, effect: str, leds_number: int = leds_number, plan: dict = None) -> list:
+    """
+    checks number of sequencers and leds used by sequencers of effect (settings that depend on number of aux leds)
+    :param data: dict with ini data
+    :param effect: effect
+    :param leds_number: number of aux leds
+    :param plan: dict rule id -> severity (all rules if None)
+    :return: list of error messages
+    """
+    if not data[effect] or not is_list(data[effect]):
+        return []
+    messages = []
+    if is_enabled(plan, 'aux_sequencers'):
+        error = check_sequencer(data, effect, leds_number)
+        if error:
+            messages.append(error.replace("Error", get_rule_level(plan, 'aux_sequencers'), 1))
+    if not is_enabled(plan, 'aux_config'):
+        return messages
+    level = get_rule_level(plan, 'aux_config')
+    leds_used = 0
+    for i_seq, sequencer in enumerate(data[effect], 1):
+        error, leds_count, leds_used = check_config(sequencer, leds_used, leds_number)
+        if error:
+            messages.append("%s: '%s' effect, %i sequencer: " % (level, effect, i_seq) + error)
+    return messages
+
+
+def main(filename: str, leds_number: int = leds_number):
 
     try:
         f = open(filename)
@@ -196,57 +433,25 @@ def main(filename: str):
         return -1
 
     for effect in data.keys():
-        error = check_sequencer(data, effect)
-        if error:
-            print("Error: '%s' effect: " % effect + error)
-            continue
-
-        leds_used = []
-        for sequencer in data[effect]:
-            i_seq = data[effect].index(sequencer) + 1
-            error, leds_count, leds_used = check_config(sequencer, leds_used)
-            if error:
-                print("Error: '%s' effect, %i sequencer: " % (effect, i_seq) + error)
-                continue
-            error = check_sequence(sequencer)
-            if error:
-                print(("Error: '%s' effect, %i sequencer: " % (effect, i_seq) + error))
-                continue
-            namelist, error = get_namelist(sequencer)
-            if error:
-                print("Error: '%s' effect, %i sequencer: " % (effect, i_seq) + error)
-            sequence = get_real_key(sequencer, "sequence")
-
-            for step in sequencer[sequence]:
-                name = ""
-                name_key = get_real_key(step, "name")
-                if name_key:
-                    name = step[name_key]
-                i_step = sequencer[sequence].index(step) + 1
-                error = check_step_keys(step)
-                if error:
-                    print("Error: '%s' effect, %i sequencer, %i step(%s): " % (effect, i_seq, i_step, name) + error)
-                    continue
-                error = check_brightness(step, leds_count)
-                if error:
-                    print("Error: '%s' effect, %i sequencer, %i step(%s): " % (effect, i_seq, i_step, name) + error)
-
-                error = check_wait(step)
-                if error:
-                    print("Error: '%s' effect, %i sequencer, %i step(%s): " % (effect, i_seq, i_step, name) + error)
-
-                error = check_repeat(step, namelist)
-                if error:
-                    print("Error: '%s' effect, %i sequencer, %i step(%s): " % (effect, i_seq, i_step, name) + error)
-
-                error = check_smooth(step)
-                if error:
-                    print("Error: '%s' effect, %i sequencer, %i step(%s): " % (effect, i_seq, i_step, name) + error)
+        for message in check_effect(data, effect) + check_effect_leds(data, effect, leds_number):
+            print(message)
+    print("Leds usage:")
+    for line in get_leds_usage_report(get_leds_usage(data, leds_number), leds_number):
+        print(line)
     return 0
 
 
 if __name__ == '__main__':
-    if len(sys.argv) > 1:
+    if len(sys.argv) > 2:
+        try:
+            res = main(sys.argv[1], int(sys.argv[2]))
+        except ValueError:
+            print("Second parameter (number of leds) must be number")
+            res = -1
+        if res != -1:
+            print("File is checked, Press any key to exit")
+        wait = input()
+    elif len(sys.argv) > 1:
         res = main(sys.argv[1])
         if res != -1:
             print("File is checked, Press any key to exit")
@@ -0,0 +1,147 @@
+"""this module checks many ini files and project directories in one run and writes results with reporter; files are
+checked directory by directory (with project context of their directory) and results are written as soon as
+directory is checked
+List of functions
+-get_batch(paths):                        gets dict directory -> list of files to check (directories are walked)
+-report_directory(reporter, directory, filenames, project_errors, results): writes results of directory with reporter
+-check_batch(batch, reporter, hardware, plan, compact, cache_dir, jobs, timeout, memory): checks files and writes
+                                          results with reporter
+"""
+import os
+import sys
+import argparse
+from ProjectChecker import load_project, check_project, ini_extension
+from Hardware import load_hardware, default_hardware
+from Rules import load_rules
+from Reporters import open_output, get_reporter, get_severity, report_formats
+import Defaults
+
+default_timeout = Defaults.timeout
+
+
+def get_batch(paths: list) -> dict:
+    """
+    gets files to check grouped by directories
+    :param paths: list of ini files and directories (directories are walked recursively)
+    :return: dict directory -> list of files
+    """
+    batch = {}
+    for path in paths:
+        path = os.path.abspath(path)
+        if os.path.isdir(path):
+            for root, dirs, names in os.walk(path):
+                dirs.sort()
+                filenames = [os.path.join(root, name) for name in sorted(names)
+                             if name.lower().endswith(ini_extension)]
+                if filenames:
+                    batch.setdefault(root, []).extend(filenames)
+        else:
+            batch.setdefault(os.path.dirname(path), []).append(path)
+    return batch
+
+
+def report_directory(reporter, directory: str, filenames: list, project_errors: list, results: dict) -> (int, int):
+    """
+    writes results of checked directory with reporter
+    :param reporter: reporter from Reporters
+    :param directory: directory
+    :param filenames: list of checked files of directory
+    :param project_errors: list of project errors of directory
+    :param results: dict filename -> list of messages
+    :return: number of errors and warnings
+    """
+    errors = warnings = 0
+    if project_errors:
+        reporter.report_file(directory, project_errors)
+    messages = list(project_errors)
+    for filename in filenames:
+        file_messages = results.get(filename, ["File %s not found" % filename])
+        reporter.report_file(filename, file_messages)
+        messages += file_messages
+    for message in messages:
+        if get_severity(message) == "error":
+            errors += 1
+        else:
+            warnings += 1
+    return errors, warnings
+
+
+def check_batch(batch: dict, reporter, hardware: dict = default_hardware, plan: dict = None,
+                compact: bool = False, cache_dir: str = "", jobs: int = 0, timeout: float = 0,
+                memory: int = 0) -> (int, int):
+    """
+    checks files of batch and writes results with reporter; with jobs files are checked in isolated worker processes
+    (Scheduler module) with time and memory limits, else directories are checked one by one in this process
+    :param batch: dict from get_batch
+    :param reporter: reporter from Reporters
+    :param hardware: dict with hardware limits
+    :param plan: rules execution plan (all rules are checked if None)
+    :param compact: parse files to compact model (less memory for very large files)
+    :param cache_dir: parsed files cache directory (files are always parsed if empty)
+    :param jobs: number of worker processes (files are checked in this process if 0)
+    :param timeout: time limit for file in seconds for worker processes (no limit if 0)
+    :param memory: memory limit for worker process in MiB (no limit if 0)
+    :return: number of errors and warnings
+    """
+    if jobs:
+        from Scheduler import check_isolated
+        return check_isolated(batch, reporter, hardware, plan, compact, cache_dir, jobs, timeout, memory)
+    errors = warnings = 0
+    reporter.start()
+    for directory, filenames in batch.items():
+        # files of directory that is not found are reported by report_directory
+        files = load_project(directory, compact, cache_dir) if os.path.isdir(directory) else {}
+        project_errors, results = check_project(files, hardware, filenames, plan)
+        directory_errors, directory_warnings = report_directory(reporter, directory, filenames, project_errors, results)
+        errors, warnings = errors + directory_errors, warnings + directory_warnings
+    reporter.finish()
+    return errors, warnings
+
+
+def main(paths: list, report_format: str = "text", output: str = "", board_filename: str = "",
+         rules_filename: str = "", compact: bool = False, cache_dir: str = "", history: str = "", jobs: int = 0,
+         timeout: float = 0, memory: int = 0) -> int:
+    hardware = default_hardware
+    if board_filename:
+        hardware, error = load_hardware(board_filename)
+        if error:
+            print("Error: hardware file %s: %s" % (board_filename, error))
+            return 2
+    plan = None
+    if rules_filename:
+        plan, error = load_rules(rules_filename)
+        if error:
+            print("Error: rules file %s: %s" % (rules_filename, error))
+            return 2
+    stream = open_output(output)
+    reporter = get_reporter(report_format, stream)
+    if history:
+        from History import HistoryReporter
+        reporter = HistoryReporter(history, reporter)
+    try:
+        errors, warnings = check_batch(get_batch(paths), reporter, hardware, plan, compact, cache_dir, jobs, timeout,
+                                       memory)
+    finally:
+        if stream is not sys.stdout:
+            stream.close()
+    return 1 if errors else 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="checks ini files and project directories")
+    parser.add_argument('paths', nargs='+', help="ini files or project directories")
+    parser.add_argument('--format', default="text", choices=report_formats, help="report format")
+    parser.add_argument('--output', default="", help="report file (stdout if absent)")
+    parser.add_argument('--board', default="", help="hardware capability file")
+    parser.add_argument('--rules', default="", help="rules configuration file")
+    parser.add_argument('--compact', action='store_true', help="use compact in-memory model for very large files")
+    parser.add_argument('--cache', default="", help="parsed files cache directory")
+    parser.add_argument('--history', default="", help="history database (results are added to it)")
+    parser.add_argument('--jobs', type=int, default=0,
+                        help="check files in this number of isolated worker processes, largest first")
+    parser.add_argument('--timeout', type=float, default=default_timeout,
+                        help="time limit for file in seconds (with --jobs)")
+    parser.add_argument('--memory', type=int, default=0, help="memory limit for worker in MiB (with --jobs)")
+    args = parser.parse_args()
+    sys.exit(main(args.paths, args.format, args.output, args.board, args.rules, args.compact, args.cache,
+                  args.history, args.jobs, args.timeout, args.memory))
@@ -0,0 +1,295 @@
+"""this module renders blade effects of profiles ini file to frame buffers (numpy arrays) and estimates compute cost
+List of functions
+-get_min_max(data, key):                                   gets (min, max) pair of min/max parameter or None
+-get_piecewise(rng, t, interval, values):                  gets random piecewise constant values changed at random
+                                                           intervals for each frame
+-render_profile(profile, leds_number, frames, ...):        renders profile to frames (frames, leds_number, 3) uint8
+-get_pixel_updates(frames, frame_ms):                      gets number of pixels sent to strip per second (average,
+                                                           peak)
+-save_frames(filename, frames):                            saves rendered frames as compressed npz file
+
+Rendering model: working mode color fills the blade; Flaming (if WorkingMode Flaming is 1) lights flame of random
+size from Size range that changes every Delay_ms and scrolls Colors palette with Speed px/s; Flickering (if
+WorkingMode FlickeringAlways is 1) multiplies blade by Brightness % changed every Time ms; Blaster, Clash and Stab
+light Sizepix leds with their color for Duration_ms (blaster at random place, clash at the middle, stab at the tip);
+Lockup flickers blade with Flicker color and lights Flashes at random places every Period ms.
+Scenario (start frames of effects) is given by events dict, random values are taken from seeded generator, so
+rendering is reproducible.
+"""
+import sys
+import numpy as np
+from IniToJson import get_json
+from CommonChecks import get_value
+from ProfileChecker import get_resolved_profiles
+
+default_frame_ms = 10
+default_frames = 500
+# WS2812 needs 30 us per pixel, so strip can't get more then ~33000 pixel updates per second; strip is refreshed
+# whole, so each frame with any changed pixel sends all leds
+default_pixel_budget = 33000
+lockup_length = 0.2
+movement_effects = ['Blaster', 'Clash', 'Stab']
+
+
+def get_min_max(data: dict, key: str) -> tuple:
+    """
+    gets min and max values of parameter formatted as {min: ..., max: ...}
+    :param data: dict with settings
+    :param key: key of parameter
+    :return: (min, max) or None if parameter is absent or incorrect
+    """
+    value = get_value(data, key) if isinstance(data, dict) else None
+    if not isinstance(value, dict):
+        return None
+    min_value, max_value = get_value(value, 'min'), get_value(value, 'max')
+    if not isinstance(min_value, int) or not isinstance(max_value, int) or min_value > max_value:
+        return None
+    return min_value, max_value
+
+
+def get_color(rng: np.random.Generator, color: object) -> np.ndarray:
+    """
+    gets rgb color array for color setting (list of three numbers or random)
+    :param rng: random generator
+    :param color: color setting
+    :return: float array with three components or None if color is incorrect
+    """
+    if isinstance(color, str) and color.lower() == 'random':
+        return rng.integers(0, 256, 3).astype(np.float32)
+    if isinstance(color, list) and len(color) == 3 and all(isinstance(part, int) for part in color):
+        return np.clip(np.array(color, dtype=np.float32), 0, 255)
+    return None
+
+
+def get_piecewise(rng: np.random.Generator, t: np.ndarray, interval: tuple, values: tuple) -> np.ndarray:
+    """
+    gets random values that are constant during random intervals
+    :param rng: random generator
+    :param t: frame times in ms
+    :param interval: (min, max) interval length in ms
+    :param values: (min, max) values range
+    :return: float array with value for each frame
+    """
+    duration = t[-1] + 1 if len(t) else 0
+    count = int(duration // max(interval[0], 1)) + 1
+    changes = np.cumsum(rng.integers(max(interval[0], 1), max(interval[1], 1) + 1, count))
+    levels = rng.integers(values[0], values[1] + 1, count + 1).astype(np.float32)
+    return levels[np.searchsorted(changes, t, side='right')]
+
+
+def render_flaming(rng: np.random.Generator, t: np.ndarray, flaming: dict, leds_number: int,
+                   blade: np.ndarray) -> np.ndarray:
+    """
+    renders flaming effect over blade
+    :param rng: random generator
+    :param t: frame times in ms
+    :param flaming: flaming settings
+    :param leds_number: number of leds in blade
+    :param blade: frames (frames, leds, 3)
+    :return: frames with flaming
+    """
+    size, speed, delay = get_min_max(flaming, 'size'), get_min_max(flaming, 'speed'), \
+        get_min_max(flaming, 'delay_ms')
+    colors = get_value(flaming, 'colors')
+    if not size or not speed or not delay or not isinstance(colors, list):
+        return blade
+    palette = [get_color(rng, color) for color in colors]
+    palette = np.array([color for color in palette if color is not None], dtype=np.float32)
+    if len(palette) == 0:
+        return blade
+    heights = get_piecewise(rng, t, delay, size)
+    speeds = get_piecewise(rng, t, delay, speed)
+    shift = np.cumsum(speeds * np.diff(t, prepend=0) / 1000.0)
+    pixels = np.arange(leds_number)
+    chunk = max(size[1] // len(palette), 1)
+    index = ((pixels[None, :] + shift[:, None]) // chunk).astype(np.int64) % len(palette)
+    lit = pixels[None, :] < heights[:, None]
+    return np.where(lit[:, :, None], palette[index], blade)
+
+
+def render_movement(rng: np.random.Generator, blade: np.ndarray, move: dict, effect: str, start: int,
+                    frame_ms: int) -> np.ndarray:
+    """
+    renders blaster, clash or stab effect
+    :param rng: random generator
+    :param blade: frames (frames, leds, 3)
+    :param move: effect settings
+    :param effect: Blaster, Clash or Stab
+    :param start: start frame
+    :param frame_ms: frame length in ms
+    :return: frames with effect
+    """
+    color = get_color(rng, get_value(move, 'color'))
+    duration, size = get_value(move, 'duration_ms'), get_value(move, 'sizepix')
+    if color is None or not isinstance(duration, int) or not isinstance(size, int) or size <= 0:
+        return blade
+    leds_number = blade.shape[1]
+    size = min(size, leds_number)
+    if effect == 'Stab':
+        position = leds_number - size
+    elif effect == 'Clash':
+        position = (leds_number - size) // 2
+    else:
+        position = int(rng.integers(0, leds_number - size + 1))
+    blade[start:start + max(duration // frame_ms, 1), position:position + size] = color
+    return blade
+
+
+def render_lockup(rng: np.random.Generator, t: np.ndarray, blade: np.ndarray, lockup: dict, start: int,
+                  end: int) -> np.ndarray:
+    """
+    renders lockup effect (flicker and flashes) from start to end frame
+    :param rng: random generator
+    :param t: frame times in ms
+    :param blade: frames (frames, leds, 3)
+    :param lockup: lockup settings
+    :param start: start frame
+    :param end: end frame
+    :return: frames with lockup
+    """
+    t = t[start:end]
+    if not len(t):
+        return blade
+    leds_number = blade.shape[1]
+    flicker = get_value(lockup, 'flicker')
+    if isinstance(flicker, dict):
+        color = get_color(rng, get_value(flicker, 'color'))
+        time, brightness = get_min_max(flicker, 'time'), get_min_max(flicker, 'brightness')
+        if color is not None and time and brightness:
+            level = get_piecewise(rng, t - t[0], time, brightness) / 100.0
+            blade[start:end] = level[:, None, None] * color
+    flashes = get_value(lockup, 'flashes')
+    if isinstance(flashes, dict):
+        color = get_color(rng, get_value(flashes, 'color'))
+        period = get_min_max(flashes, 'period')
+        duration, size = get_value(flashes, 'duration_ms'), get_value(flashes, 'sizepix')
+        if color is not None and period and isinstance(duration, int) and isinstance(size, int) and size > 0:
+            size = min(size, leds_number)
+            count = int((t[-1] - t[0]) // max(period[0], 1)) + 1
+            times = t[0] + np.cumsum(rng.integers(max(period[0], 1), max(period[1], 1) + 1, count))
+            positions = rng.integers(0, leds_number - size + 1, count)
+            # flash index for each frame (-1 if no flash is shown at that moment)
+            flash = np.searchsorted(times, t, side='right') - 1
+            visible = (flash >= 0) & (t - times[np.maximum(flash, 0)] < duration)
+            pixels = np.arange(leds_number)
+            position = positions[np.maximum(flash, 0)]
+            lit = visible[:, None] & (pixels[None, :] >= position[:, None]) & \
+                (pixels[None, :] < position[:, None] + size)
+            blade[start:end] = np.where(lit[:, :, None], color, blade[start:end])
+    return blade
+
+
+def get_default_events(frames: int) -> dict:
+    """
+    gets default scenario: blaster, clash and stab one after another and lockup at the end
+    :param frames: number of frames
+    :return: dict effect -> start frame (Lockup -> (start, end))
+    """
+    return {'Blaster': frames // 5, 'Clash': 2 * frames // 5, 'Stab': 3 * frames // 5,
+            'Lockup': (int(frames * (1 - lockup_length)) - frames // 20, frames - frames // 20)}
+
+
+def render_profile(profile: dict, leds_number: int, frames: int = default_frames,
+                   frame_ms: int = default_frame_ms, events: dict = None, seed: int = 0) -> np.ndarray:
+    """
+    renders profile effects over blade
+    :param profile: dict with profile settings (checked by ProfileChecker)
+    :param leds_number: number of leds in blade
+    :param frames: number of frames
+    :param frame_ms: frame length in ms
+    :param events: dict effect -> start frame (Lockup -> (start, end)), default scenario if None
+    :param seed: seed of random generator
+    :return: uint8 array (frames, leds_number, 3)
+    """
+    rng = np.random.default_rng(seed)
+    events = get_default_events(frames) if events is None else events
+    t = np.arange(frames, dtype=np.float64) * frame_ms
+    workingmode = get_value(profile, 'workingmode')
+    workingmode = workingmode if isinstance(workingmode, dict) else {}
+    color = get_color(rng, get_value(workingmode, 'color'))
+    blade = np.zeros((frames, leds_number, 3), dtype=np.float32)
+    if color is not None:
+        blade[:] = color
+    flaming = get_value(profile, 'flaming')
+    if get_value(workingmode, 'flaming') == 1 and isinstance(flaming, dict):
+        blade = render_flaming(rng, t, flaming, leds_number, blade)
+    flickering = get_value(profile, 'flickering')
+    if get_value(workingmode, 'flickeringalways') == 1 and isinstance(flickering, dict):
+        time, brightness = get_min_max(flickering, 'time'), get_min_max(flickering, 'brightness')
+        if time and brightness:
+            blade *= get_piecewise(rng, t, time, brightness)[:, None, None] / 100.0
+    for effect in movement_effects:
+        move = get_value(profile, effect.lower())
+        if isinstance(move, dict) and effect in events:
+            blade = render_movement(rng, blade, move, effect, events[effect], frame_ms)
+    lockup = get_value(profile, 'lockup')
+    if isinstance(lockup, dict) and 'Lockup' in events:
+        blade = render_lockup(rng, t, blade, lockup, *events['Lockup'])
+    return np.clip(np.rint(blade), 0, 255).astype(np.uint8)
+
+
+def get_pixel_updates(frames: np.ndarray, frame_ms: int = default_frame_ms) -> (float, float):
+    """
+    gets number of pixel updates (pixels sent to strip) per second: WS2812 strip gets all leds on each refresh, so
+    each frame that differs from previous frame costs number of leds, unchanged frames are not sent
+    :param frames: rendered frames (frames, leds, 3)
+    :param frame_ms: frame length in ms
+    :return: average and peak pixel updates per second
+    """
+    if len(frames) < 2:
+        return 0.0, 0.0
+    sent = (frames[1:] != frames[:-1]).any(axis=(1, 2)) * frames.shape[1]
+    per_second = 1000.0 / frame_ms
+    return float(sent.mean() * per_second), float(sent.max() * per_second)
+
+
+def save_frames(filename: str, frames: dict, frame_ms: int = default_frame_ms):
+    """
+    saves rendered frames of profiles as compressed npz file
+    :param filename: output file name
+    :param frames: dict profile -> frames
+    :param frame_ms: frame length in ms
+    """
+    np.savez_compressed(filename, frame_ms=np.array(frame_ms), **frames)
+
+
+def main(filename: str, leds_number: int, frames: int = default_frames, budget: int = default_pixel_budget,
+         output: str = ""):
+    try:
+        f = open(filename)
+    except FileNotFoundError:
+        print("File %s not found" % filename)
+        return -1
+    data, error = get_json(f.read())
+    if not data:
+        print(error)
+        return -1
+    rendered = {}
+    # templates are not rendered, profiles are rendered with settings of templates they extend
+    for profile, (settings, error) in get_resolved_profiles(data).items():
+        if settings is None:
+            print("%s profile is not rendered: %s" % (profile, error))
+            continue
+        if not isinstance(settings, dict):
+            print("Wrong settings format for profile %s;" % profile)
+            continue
+        rendered[profile] = render_profile(settings, leds_number, frames)
+        average, peak = get_pixel_updates(rendered[profile])
+        print("%s profile: %i pixel updates per second (peak %i)" % (profile, average, peak))
+        if peak > budget:
+            print("Warning: %s profile needs more then %i pixel updates per second for %i leds" %
+                  (profile, budget, leds_number))
+    if output:
+        save_frames(output, rendered)
+    return 0
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 2:
+        try:
+            main(sys.argv[1], int(sys.argv[2]), *[int(arg) for arg in sys.argv[3:5]],
+                 *sys.argv[5:6])
+        except ValueError:
+            print("Leds number, frames and budget must be numbers")
+    else:
+        print("Usage: BladeRenderer.py profiles.ini leds_number [frames] [budget] [frames.npz]")
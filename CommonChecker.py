@@ -16,6 +16,9 @@ clash_keys = ['higha', 'length', 'hitlevel', 'loww']
 stab_keys = ['enabled', 'higha', 'loww', 'hitlevel', 'length', 'percent']
 screw_keys = ['enabled', 'loww', 'highw']
 
+motion_effects_keys = {'swing': swing_keys, 'spin': spin_keys, 'clash': clash_keys, 'stab': stab_keys,
+                       'screw': screw_keys}
+
 max_band = 8
 max_leds = 144
 max_total_leds = 2000
@@ -25,15 +28,54 @@ w_low = 1
 a_high = 14000
 a_low = 100
 
+# motion parameters rules: (parameter, check function, check function arguments...), rule id is
+# common_<effect>_<parameter>
+motion_rules = {'swing': [('highw', check_number_warning, 1, w_high),
+                          ('wpercent', check_number, 0, 100),
+                          ('circle', check_number_warning, 100, 1000),
+                          ('circlew', check_number_warning, 1, w_high)],
+                'spin': [('enabled', check_bool),
+                         ('counter', check_number_max_warning, 1, 10),
+                         ('w', check_number_warning, 1, w_high),
+                         ('circle', check_number_warning, 100, 1000),
+                         ('wlow', check_number_warning, w_low, w_high)],
+                'clash': [('higha', check_number_warning, a_low, a_high),
+                          ('length', check_number, 0, big_number),
+                          ('hitlevel', check_number, -big_number, -1),
+                          ('loww', check_number_warning, w_low, w_high)],
+                'stab': [('enabled', check_bool),
+                         ('higha', check_number_warning, a_low, a_high),
+                         ('length', check_number, 0, big_number),
+                         ('hitlevel', check_number, -big_number, -1),
+                         ('loww', check_number_warning, w_low, w_high),
+                         ('percent', check_number, 0, 100)],
+                'screw': [('enabled', check_bool),
+                          ('highw', check_number_warning, w_low, w_high),
+                          ('loww', check_number_warning, w_low, w_high)]}
+
+
+common_rules = ['common_keys', 'common_blade', 'common_blade2', 'common_volume', 'common_powerofftimeout',
+                'common_deadtime', 'common_clashflashduration', 'common_motion', 'common_motion_keys'] + \
+               ['common_%s_%s' % (effect, rule[0]) for effect in motion_keys for rule in motion_rules[effect]] + \
+               ['common_%s_keys' % effect for effect in motion_keys] + \
+               ['common_%s_settings' % effect for effect in motion_keys] + \
+               ['common_spin_wlow_w', 'common_screw_loww_highw']
+
 
-def check_blade(data: dict, key: str) -> str:
+def check_blade(data: dict, key: str, max_band: int = max_band, max_leds: int = max_leds,
+                max_total_leds: int = max_total_leds) -> (str, str):
     """
     checks blade paramenters: bandbumber and pixperband
     :param data: dict with values
     :param key: key to check (blade or blade2)
-    :return: error message or empty string
+    :param max_band: max number of bands
+    :param max_leds: max number of leds per band
+    :param max_total_leds: max number of leds per blade
+    :return: error and warning messages or empty strings
     """
-    blade, error = check_existance()
+    blade, error = check_existance(data, key)
+    if error:
+        return error, ""
     error = check_keys(blade, blade_keys)
     e, warning = check_number_max_warning(blade, 'bandnumber',  0, max_band)
     band = get_value(blade, 'bandnumber')
@@ -42,7 +84,7 @@ def check_blade(data: dict, key: str) -> str:
     error += e
     warning += w
     leds = get_value(blade, 'pixperband')
-    if leds and band:
+    if isinstance(leds, int) and isinstance(band, int):
         if leds*band > max_total_leds:
             error += "total leds per blade must be less then % i;\n" % max_total_leds
     return error, warning
@@ -58,7 +100,7 @@ def check_volume(data: dict) -> str:
     if not volume:
         return "no settings;"
     volume = data[volume]
-    if not isinstance(volume, dict):
+    if not is_settings(volume):
         return "must contain settings formatted as {data: parameter, data: parameter ...};"
     error = check_keys(volume, volume_keys)
     for key in volume_keys:
@@ -81,154 +123,202 @@ def check_deadtime(data: dict) -> str:
     return error
 
 
-def check_swing(data: dict) -> (str, str):
+def check_motion_effect(data: dict, effect: str, plan: dict = None) -> (dict, str, str):
+    """
+    checks motion effect parameters from motion_rules, gives warning for unreal movement parameters and errors for
+    other problems
+    :param data: dict with motion settings
+    :param effect: motion effect key (swing, spin, clash, stab, screw)
+    :param plan: dict rule id -> severity (all rules if None)
+    :return: effect settings or None, error and warning messages or empty strings
+    """
+    settings, error = check_existance(data, effect)
+    if error:
+        rule_id = "common_%s_settings" % effect
+        if not is_enabled(plan, rule_id):
+            return None, "", ""
+        return None, *set_severity(plan, rule_id, error, "")
+    error = ""
+    warning = ""
+    if is_enabled(plan, "common_%s_keys" % effect):
+        e, w = set_severity(plan, "common_%s_keys" % effect, check_keys(settings, motion_effects_keys[effect]), "")
+        error += e
+        warning += w
+    for rule in motion_rules[effect]:
+        rule_id = "common_%s_%s" % (effect, rule[0])
+        if not is_enabled(plan, rule_id):
+            continue
+        param, check, limits = rule[0], rule[1], rule[2:]
+        result = check(settings, param, *limits)
+        e, w = result if isinstance(result, tuple) else (result, "")
+        e, w = set_severity(plan, rule_id, e, w)
+        error += e
+        warning += w
+    return settings, error, warning
+
+
+def check_swing(data: dict, plan: dict = None) -> (str, str):
     """
     checks if swing parameters are correct, warning for unrial movement parameters
     :param data: dict with data
+    :param plan: dict rule id -> severity (all rules if None)
     :return: error and warning or empty strings
     """
-    swing, error = check_existance(data, 'swing')
-    if error:
-        return error, ""
-    error = check_keys(swing, swing_keys)
-    e, w = check_number_warning(swing, 'highw', 1, w_high)
-    error = error + e
-    warning = w
-    error += check_number(swing, 'wpercent', 0, 100)
-    e, w = check_number_warning(swing, 'circle', 100, 1000)
-    error += e
-    warning += w
-    e, w = check_number_warning(swing, 'circlew', 1, w_high)
-    error += e
-    warning += w
+    swing, error, warning = check_motion_effect(data, 'swing', plan)
     return error, warning
 
 
-def check_spin(data: dict) -> (str, str):
+def check_spin(data: dict, plan: dict = None) -> (str, str):
     """
     checks if spin parameters are correct, gives warning for unreal spin conditions and errors for other problems
     :param data: dict with spin settings
+    :param plan: dict rule id -> severity (all rules if None)
     :return: error and warning messages or empty strings
     """
-    spin, error = check_existance(data, 'spin')
-    if error:
-        return error, ""
-    error = check_keys(spin, spin_keys)
-    error += check_bool(spin, 'enabled')
-    e, w = check_number_max_warning(spin, 'counter', 1, 10)
-    error += e
-    warning = w
-    e, w = check_number_warning(spin, 'w', 1, w_high)
-    error += e
-    warning += w
-    e, w = check_number_warning(spin, 'circle', 100, 1000)
-    error += e
-    warning += w
-    e, w = check_number_warning(spin, 'wlow', w_low, w_high)
-    error += e
-    warning += w
-    spin_w = get_value(spin, 'w')
-    spin_w_low = get_value(spin, 'w_low')
-    if spin_w and spin_w_low and spin_w_low >= spin_w:
-        warning += "WLow should be less then W"
+    spin, error, warning = check_motion_effect(data, 'spin', plan)
+    if spin is not None and is_enabled(plan, "common_spin_wlow_w"):
+        spin_w = get_value(spin, 'w')
+        spin_w_low = get_value(spin, 'wlow')
+        if isinstance(spin_w, int) and isinstance(spin_w_low, int) and spin_w_low >= spin_w:
+            e, w = set_severity(plan, "common_spin_wlow_w", "", "WLow should be less then W;\n")
+            error += e
+            warning += w
     return error, warning
 
 
-def check_clash(data: dict) -> (str, str):
+def check_clash(data: dict, plan: dict = None) -> (str, str):
     """
     checks if clash parameters are correct, gives warning for unreal spin conditions and errors for other problems
     :param data: dict with spin settings
+    :param plan: dict rule id -> severity (all rules if None)
     :return: error and warning messages or empty strings
     """
-    clash, error = check_existance(data, 'clash')
-    if error:
-        return error, ""
-    error = check_keys(clash, clash_keys)
-    e, w = check_number_warning(clash, 'higha', a_low, a_high)
-    error += e
-    warning = w
-    error += check_number(clash, 'length', 0, big_number)
-    error += check_number(clash, 'hitlevel', -big_number, -1)
-    e, w = check_number_warning(clash, 'loww', w_low, w_high)
-    error += e
-    warning += w
+    clash, error, warning = check_motion_effect(data, 'clash', plan)
     return error, warning
 
 
-def check_stab(data: dict) -> (str, str):
+def check_stab(data: dict, plan: dict = None) -> (str, str):
     """
     checks if clash parameters are correct, gives warning for unreal spin conditions and errors for other problems
     :param data: dict with spin settings
+    :param plan: dict rule id -> severity (all rules if None)
     :return: error and warning messages or empty strings
     """
-    stab, error = check_existance(data, 'stab')
-    if error:
-        return error, ""
-    error = check_keys(stab, stab_keys)
-    error += check_bool(stab, 'enabled')
-    e, w = check_number_warning(stab, 'higha', a_low, a_high)
-    error += e
-    warning = w
-    error += check_number(stab, 'length', 0, big_number)
-    error += check_number(stab, 'hitlevel', -big_number, -1)
-    e, w = check_number_warning(stab, 'loww', w_low, w_high)
-    error += e
-    warning += w
-    error += check_number(stab, 'percent', 0, 100)
+    stab, error, warning = check_motion_effect(data, 'stab', plan)
     return error, warning
 
 
-def check_screw(data: dict) -> (str, str):
+def check_screw(data: dict, plan: dict = None) -> (str, str):
     """
     checks if screw parameters are correct, gives warning for unreal spin conditions and errors for other problems
     :param data: dict with spin settings
+    :param plan: dict rule id -> severity (all rules if None)
     :return: error and warning messages or empty strings
     """
-    screw, error = check_existance(data, 'screw')
-    if error:
-        return error, ""
-    error = check_keys(screw, screw_keys)
-    error += check_bool(screw, 'enabled')
-    e, w = check_number_warning(screw, 'highw', w_low, w_high)
-    error += e
-    warning = w
-    e, w = check_number_warning(screw, 'loww', w_low, w_high)
-    error += e
-    warning += w
-    screw_loww = get_value(screw, 'loww')
-    screw_highw = get_value(screw, 'highw')
-    if screw_loww and screw_highw and screw_loww > screw_highw:
-        warning += "LowW parameter must be less then HighW parameter"
+    screw, error, warning = check_motion_effect(data, 'screw', plan)
+    if screw is not None and is_enabled(plan, "common_screw_loww_highw"):
+        screw_loww = get_value(screw, 'loww')
+        screw_highw = get_value(screw, 'highw')
+        if isinstance(screw_loww, int) and isinstance(screw_highw, int) and screw_loww > screw_highw:
+            e, w = set_severity(plan, "common_screw_loww_highw", "",
+                                "LowW parameter must be less then HighW parameter;\n")
+            error += e
+            warning += w
     return error, warning
 
 
-def check_motion(data: dict, errors_motion: dict) -> str:
+def check_motion(data: dict, errors_motion: dict, plan: dict = None) -> str:
     """
-
-    :param data:
-    :param errors_motion:
-    :return:
+    checks motion settings: swing, spin, clash, stab and screw effects
+    :param data: dict with ini data
+    :param errors_motion: dict with errors for motion_keys_cap keys to fill
+    :param plan: dict rule id -> severity (all rules if None)
+    :return: error message or empty string
     """
     motion = get_real_key(data, 'motion')
-    if not motion:
-        return "settings are absent"
+    if not motion or not is_settings(data[motion]):
+        if not is_enabled(plan, 'common_motion'):
+            return ""
+        return get_rule_message(plan, 'common_motion', "must contain settings formatted as {data: parameter, "
+                                "data: parameter ...};" if motion else "settings are absent")
     motion = data[motion]
-    if not isinstance(motion, dict):
-        return "must contain settings formatted as {data: parameter, data: parameter ...};"
-    error = check_keys(motion, motion_keys)
-    e, w = check_swing(motion)
-    errors_motion['Swing'] = e + "Warning: effect might not work with this parameters: " + w if w else e
-    e, w = check_spin(motion)
-    errors_motion['Spin'] = e + "Warning: effect might not work with this parameters: " + w if w else e
-    e, w = check_clash(motion)
-    errors_motion['Clash'] = e + "Warning: effect might not work with this parameters: " + w if w else e
-    e, w = check_stab(motion)
-    errors_motion['Stab'] = e + "Warning: effect might not work with this parameters: " + w if w else e
-    e, w = check_screw(motion)
-    errors_motion['Screw'] = e + "Warning: effect might not work with this parameters: " + w if w else e
+    error = ""
+    if is_enabled(plan, "common_motion_keys"):
+        error = get_rule_message(plan, "common_motion_keys", check_keys(motion, motion_keys))
+    for key, check in (('Swing', check_swing), ('Spin', check_spin), ('Clash', check_clash), ('Stab', check_stab),
+                       ('Screw', check_screw)):
+        e, w = check(motion, plan)
+        errors_motion[key] = e + "Warning: effect might not work with this parameters: " + w if w else e
+    return error
+
+
+def check_common(data: dict, errors: dict, errors_motion: dict, plan: dict = None) -> str:
+    """
+    checks settings that don't depend on hardware limits
+    :param data: dict with ini data
+    :param errors: dict with errors for common_keys_cap keys to fill
+    :param errors_motion: dict with errors for motion_keys_cap keys to fill
+    :param plan: dict rule id -> severity (all rules if None)
+    :return: error message for unknown keys or empty string
+    """
+    error = ""
+    if is_enabled(plan, 'common_keys'):
+        error = get_rule_message(plan, 'common_keys', check_keys(data, common_keys))
+    if is_enabled(plan, 'common_volume'):
+        errors['Volume'] = get_rule_message(plan, 'common_volume', check_volume(data))
+    if is_enabled(plan, 'common_powerofftimeout'):
+        errors['PowerOffTimeout'] = get_rule_message(plan, 'common_powerofftimeout',
+                                                     check_number(data, 'powerofftimeout', 0, big_number))
+    if is_enabled(plan, 'common_deadtime'):
+        errors['Deadtime'] = get_rule_message(plan, 'common_deadtime', check_deadtime(data))
+    if is_enabled(plan, 'common_clashflashduration'):
+        errors['ClashFlashDuration'] = get_rule_message(plan, 'common_clashflashduration',
+                                                        check_number(data, 'clashflashduration', 0, big_number))
+    errors['Motion'] = check_motion(data, errors_motion, plan)
     return error
 
 
+def check_common_limits(data: dict, errors: dict, max_band: int = max_band, max_leds: int = max_leds,
+                        max_total_leds: int = max_total_leds, plan: dict = None):
+    """
+    checks settings that depend on hardware limits (blade and blade2 leds)
+    :param data: dict with ini data
+    :param errors: dict with errors for common_keys_cap keys to fill
+    :param max_band: max number of bands
+    :param max_leds: max number of leds per band
+    :param max_total_leds: max number of leds per blade
+    :param plan: dict rule id -> severity (all rules if None)
+    """
+    if is_enabled(plan, 'common_blade'):
+        errors['Blade'] = get_rule_message(plan, 'common_blade',
+                                           *check_blade(data, "blade", max_band, max_leds, max_total_leds))
+    if is_enabled(plan, 'common_blade2'):
+        errors['Blade2'] = get_rule_message(plan, 'common_blade2',
+                                            *check_blade(data, "blade2", max_band, max_leds, max_total_leds))
+
+
+def get_messages(error: str, errors: dict, errors_motion: dict) -> list:
+    """
+    gets list of messages for checked file
+    :param error: error message for unknown keys
+    :param errors: dict with errors for common_keys_cap keys
+    :param errors_motion: dict with errors for motion_keys_cap keys
+    :return: list of messages
+    """
+    messages = []
+    if error.startswith("Warning: "):
+        messages.append('Warning: %s' % error[9:].strip())
+    elif error:
+        messages.append('Error: %s' % error.strip())
+    for errors_dict in (errors, errors_motion):
+        for key in errors_dict.keys():
+            if errors_dict[key].startswith("Warning: "):
+                messages.append("Warning: %s parameter:  %s " % (key, errors_dict[key][9:].strip()))
+            elif errors_dict[key]:
+                messages.append("Error: %s parameter:  %s " % (key, errors_dict[key].strip()))
+    return messages
+
+
 def main(filename: str):
     try:
         f = open(filename)
@@ -243,24 +333,11 @@ def main(filename: str):
         return -1
     errors = {err: "" for err in common_keys_cap}
     errors_motion = {err: "" for err in motion_keys_cap}
-    error = check_keys(data, common_keys)
-    if error:
-        print('Error: %s' % error.strip())
-    error, warning = check_blade(data, "blade")
-    errors['Blade'] = error + "Warning: " + warning if warning else error
-    error, warning = check_blade(data, "blade2")
-    errors['Blade2'] = error + "Warning: " + warning if warning else error
-    errors['Volume'] = check_volume(data)
-    errors['PowerOffTimeout'] = check_number(data, 'powerofftimeout', 0, big_number)
-    errors['Deadtime'] = check_deadtime(data)
-    errors['ClashFlashDuration'] = check_number(data, 'clashflashduration', 0, big_number)
-    errors['Motion'] = check_motion(data, errors_motion)
-    for error in errors.keys():
-        if errors[error]:
-            print("Error: %s parameter:  %s " % (error, errors[error].strip()))
-    for error in errors_motion.keys():
-        if errors_motion[error]:
-            print("Error: %s parameter:  %s " % (error, errors_motion[error].strip()))
+    error = check_common(data, errors, errors_motion)
+    check_common_limits(data, errors)
+    for message in get_messages(error, errors, errors_motion):
+        print(message)
+    return 0
 
 
 if __name__ == '__main__':
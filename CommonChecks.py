@@ -16,8 +16,20 @@ List of functions
 -check_min_max_parameter:                         checks if key exists and has min and max keys and their values are correct
 -check_color(data):                               checks color (if key exists and color is random or in rgb model)
 -check_color_list(data):                          checks color list, uts existance and correctness of all colors
+-get_indices_text(indices):                       gets text with numbers of incorrect items
+-get_bad_indices(values, min, max):               gets indices of values that are not numbers in range
+-get_bad_colors(colors):                          gets indices of incorrect colors of colors list
 -get_value(data, key):                            gets value if it exists or None
+-get_file_type(data):                             gets type of ini file: common, profiles or aux
+-is_enabled(plan, rule):                          checks if rule is in execution plan
+-get_rule_severity(plan, rule):                   gets severity of rule set in plan (default, error or warning)
+-set_severity(plan, rule, error, warning):        moves rule messages to error or warning according to plan
+-get_rule_message(plan, rule, error, warning):    gets rule message with severity set in plan
+-get_rule_level(plan, rule):                      gets message level (Error or Warning) for rule
+-is_settings(value):                              checks if value is settings (dict or compact model section)
+-is_list(value):                                  checks if value is list (list or compact model array)
 """
+from collections.abc import Mapping, Sequence
 
 
 def get_real_key(data: dict, template: str) -> str:
@@ -44,7 +56,7 @@ def check_existance(data: dict, param: str) -> (dict, str):
     if not key:
         return None, "setting are absent"
     data = data[key]
-    if not isinstance(data, dict):
+    if not is_settings(data):
         return None, "must contain settings formatted as {data: parameter, data: parameter ...};"
     return data, ""
 
@@ -189,7 +201,7 @@ def check_min_max_parameter(data: dict, param: str, lower: int, upper: int) -> s
     param_key = get_real_key(data, param)
     if not param_key:
         return "%s parameter is absent;\n" % param
-    if not isinstance(data[param_key], dict):
+    if not is_settings(data[param_key]):
         return "%s settings must be in {min:... , max: ...} format;\n" % param
     for key in data[param_key]:
         if key.lower() not in ["min", "max"]:
@@ -206,6 +218,50 @@ def check_min_max_parameter(data: dict, param: str, lower: int, upper: int) -> s
     return error
 
 
+def get_indices_text(indices: list, limit: int = 10) -> str:
+    """
+    gets text with one based indices, long lists are cut
+    :param indices: zero based indices
+    :param limit: max number of indices in text
+    :return: text like 1, 5, 7 or 1, 2, 3 ... (25 items)
+    """
+    text = ", ".join(str(i + 1) for i in indices[:limit])
+    if len(indices) > limit:
+        text += " ... (%i items)" % len(indices)
+    return text
+
+
+def get_bad_indices(values: list, min_value: int, max_value: int) -> list:
+    """
+    gets indices of values that are not integer numbers in min...max range
+    :param values: list of values
+    :param min_value: min value
+    :param max_value: max value
+    :return: list of zero based indices
+    """
+    return [i for i, value in enumerate(values)
+            if not isinstance(value, int) or value < min_value or value > max_value]
+
+
+def get_bad_colors(colors: list) -> (list, list, list):
+    """
+    checks all colors of list in one pass
+    :param colors: list of colors
+    :return: indices of incorrect strings, indices of colors that are not lists of three items, indices of colors with
+             incorrect numbers (zero based)
+    """
+    wrong_names, wrong_format, wrong_values = [], [], []
+    for i, color in enumerate(colors):
+        if isinstance(color, str):
+            if color.lower() != 'random':
+                wrong_names.append(i)
+        elif not is_list(color) or len(color) != 3:
+            wrong_format.append(i)
+        elif get_bad_indices(color, 0, 255):
+            wrong_values.append(i)
+    return wrong_names, wrong_format, wrong_values
+
+
 def check_color(data: dict) -> str:
     """
     checks if color is correct (list of three numbers 0...255 or random string)
@@ -219,20 +275,19 @@ def check_color(data: dict) -> str:
     color = data[color]
     if isinstance(color, str):
         if color.lower() != 'random':
-            return "oolor settings must be array of three numbers or 'random' string;\n"
+            return "color settings must be array of three numbers or 'random' string;\n"
     else:
-        if not isinstance(color, list) or len(color) != 3:
+        if not is_list(color) or len(color) != 3:
             error += "color settings must be array of three numbers, example:([255, 255, 0]);\n"
-        else:
-            for part in color:
-                if not isinstance(part, int) or (part < 0) or part > 255:
-                    error += "color must be positive number (max 255);\n"
+        elif get_bad_indices(color, 0, 255):
+            error += "color must be positive number (max 255);\n"
     return error
 
 
 def check_color_from_list(data) -> str:
     """
-    checks if color is correct (list of three numbers 0...255 or random string)
+    checks if color is correct (list of three numbers 0...255 or random string), incorrect colors are reported with
+    their numbers by one message for each kind of error
     :param color: colors settings
     :return:
     """
@@ -240,24 +295,21 @@ def check_color_from_list(data) -> str:
     if not colors:
         return "colors settings are absent;\n"
     colors = data[colors]
-    if not isinstance(colors, list) or len(colors) == 0:
+    if not is_list(colors) or len(colors) == 0:
         return "colors must contain not empty list of colors;\n"
     error = ""
-    for color in colors:
-        if isinstance(color, str):
-            if color.lower() != 'random':
-                error += "oolor settings must be array of three numbers or 'random' string;\n"
-        else:
-            if not isinstance(color, list) or len(color) != 3:
-                error += "color settings must be array of three numbers ([255, 255, 0]);\n"
-            else:
-                for part in color:
-                    if not isinstance(part, int) or (part < 0) or part > 255:
-                        error += "color must be positive number (max 255);\n"
+    wrong_names, wrong_format, wrong_values = get_bad_colors(colors)
+    if wrong_names:
+        error += "colors %s: color settings must be array of three numbers or 'random' string;\n" % \
+                 get_indices_text(wrong_names)
+    if wrong_format:
+        error += "colors %s: color settings must be array of three numbers ([255, 255, 0]);\n" % \
+                 get_indices_text(wrong_format)
+    if wrong_values:
+        error += "colors %s: color must be positive number (max 255);\n" % get_indices_text(wrong_values)
     return error
 
 
-
 def check_keys(data: dict, key_list: list) -> str:
     """
     checks if all keys are correct
@@ -286,3 +338,99 @@ def get_value(data: dict, key: str) -> object:
         return data[key]
 
 
+def get_file_type(data: dict) -> str:
+    """
+    gets type of ini file by its data: common settings file has blade, volume, motion... keys, aux leds file contains
+    lists of sequencers, profiles file contains dicts with profiles settings
+    :param data: dict with ini data
+    :return: 'common', 'profiles', 'aux' or empty string if type is unknown
+    """
+    if not is_settings(data) or not data:
+        return ""
+    if any(key.lower() in ['blade', 'volume', 'deadtime', 'motion'] for key in data.keys()):
+        return "common"
+    if all(is_list(value) for value in data.values()):
+        return "aux"
+    if all(is_settings(value) for value in data.values()):
+        return "profiles"
+    return ""
+
+
+def is_enabled(plan: dict, rule: str) -> bool:
+    """
+    checks if rule is in execution plan, all rules are enabled if there is no plan
+    :param plan: dict rule id -> severity or None
+    :param rule: rule id
+    :return: True if rule must be checked
+    """
+    return plan is None or rule in plan
+
+
+def get_rule_severity(plan: dict, rule: str) -> str:
+    """
+    gets rule severity set in plan
+    :param plan: dict rule id -> severity or None
+    :param rule: rule id
+    :return: 'default', 'error' or 'warning'
+    """
+    if plan is None:
+        return "default"
+    return plan.get(rule, "default")
+
+
+def set_severity(plan: dict, rule: str, error: str, warning: str) -> (str, str):
+    """
+    moves rule messages to error or warning according to severity set in plan
+    :param plan: dict rule id -> severity or None
+    :param rule: rule id
+    :param error: error message of rule
+    :param warning: warning message of rule
+    :return: error and warning messages
+    """
+    severity = get_rule_severity(plan, rule)
+    if severity == "error":
+        return error + warning, ""
+    if severity == "warning":
+        return "", error + warning
+    return error, warning
+
+
+def get_rule_message(plan: dict, rule: str, error: str, warning: str = "") -> str:
+    """
+    gets rule message (error message followed by warning message) with severity set in plan
+    :param plan: dict rule id -> severity or None
+    :param rule: rule id
+    :param error: error message of rule
+    :param warning: warning message of rule
+    :return: message
+    """
+    error, warning = set_severity(plan, rule, error, warning)
+    return error + "Warning: " + warning if warning else error
+
+
+def get_rule_level(plan: dict, rule: str) -> str:
+    """
+    gets level of messages of rule that reports errors only
+    :param plan: dict rule id -> severity or None
+    :param rule: rule id
+    :return: 'Warning' if rule is regraded to warning, 'Error' otherwise
+    """
+    return "Warning" if get_rule_severity(plan, rule) == "warning" else "Error"
+
+
+def is_settings(value: object) -> bool:
+    """
+    checks if value is settings: dict from parser or Section of compact model
+    :param value: value
+    :return: True for settings
+    """
+    return isinstance(value, Mapping)
+
+
+def is_list(value: object) -> bool:
+    """
+    checks if value is list: list from parser or array backed list of compact model
+    :param value: value
+    :return: True for list
+    """
+    return isinstance(value, Sequence) and not isinstance(value, str)
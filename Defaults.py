@@ -0,0 +1,10 @@
+"""this module keeps default values shared by checkers and command line tools, it imports nothing, so it can be
+imported by commands that must start fast (IniChecker --help)
+"""
+# default number of leds in blade (it is not CommonChecker.max_leds, that is max number of leds per band)
+blade_leds = 144
+aux_leds = 8
+# time limit for file checked in worker process (seconds)
+timeout = 300.0
+# seconds after which claimed work queue item of dead worker is checked again
+stale_time = 300.0
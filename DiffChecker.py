@@ -0,0 +1,291 @@
+"""this module checks changes between two versions of ini file: parsed trees are compared and only changed parts
+(profiles and templates of profiles file, effects of aux leds file, sections of common settings file) and parts
+depending on them are checked in both versions
+List of functions
+-read_version(source):                         reads file text from path or from git revision (rev:path)
+-diff_trees(old, new):                         gets list of changed paths between two parsed trees
+-get_units(data, file_type):                   gets independently checked parts of file
+-get_common_plan(unit):                        gets rules plan that checks one section of common settings file
+-ProfileChecker.get_templates(data)[0]:                 gets templates of profiles file
+-get_bases(data, settings):                    gets templates that profile or template extends
+-get_changed_units(changes, file_type, old, new): gets changed units and units depending on them
+-check_unit(data, file_type, unit, ...):       checks one part of file
+-check_diff(old, new, leds_number):            gets new, fixed and unchanged messages
+"""
+import os
+import sys
+import subprocess
+from IniToJson import get_json
+from CommonChecks import *
+import CommonChecker
+import ProfileChecker
+import Auxchecker
+
+whole_file = ""
+
+
+def read_version(source: str) -> (str, str):
+    """
+    reads file text from file path or from git revision written as rev:path (read with git show)
+    :param source: file path or rev:path
+    :return: text or None, error message or empty string
+    """
+    if os.path.isfile(source):
+        with open(source) as f:
+            return f.read(), ""
+    if ':' not in source:
+        return None, "File %s not found" % source
+    result = subprocess.run(['git', 'show', source], capture_output=True, text=True)
+    if result.returncode != 0:
+        return None, "git show %s: %s" % (source, result.stderr.strip())
+    return result.stdout, ""
+
+
+def diff_trees(old: object, new: object, path: str = "") -> list:
+    """
+    gets structural difference of two parsed trees
+    :param old: old tree (dict, list or value)
+    :param new: new tree
+    :param path: path of compared part
+    :return: list of (path, 'added' / 'removed' / 'changed')
+    """
+    if isinstance(old, dict) and isinstance(new, dict):
+        changes = []
+        for key in old.keys():
+            if key not in new:
+                changes.append(((path + "." + key).strip("."), 'removed'))
+            else:
+                changes += diff_trees(old[key], new[key], (path + "." + key).strip("."))
+        changes += [((path + "." + key).strip("."), 'added') for key in new.keys() if key not in old]
+        return changes
+    if isinstance(old, list) and isinstance(new, list) and len(old) == len(new):
+        changes = []
+        for i, (old_item, new_item) in enumerate(zip(old, new)):
+            changes += diff_trees(old_item, new_item, "%s[%i]" % (path, i))
+        return changes
+    if type(old) != type(new) or old != new:
+        return [(path, 'changed')]
+    return []
+
+
+def get_units(data: dict, file_type: str) -> list:
+    """
+    gets parts of file that are checked independently: profiles and templates (Templates.name) of profiles file,
+    effects of aux leds file, top level sections of common settings file (and whole_file for unknown keys)
+    :param data: dict with ini data
+    :param file_type: common, profiles or aux
+    :return: list of units
+    """
+    if file_type == "profiles":
+        key = get_real_key(data, ProfileChecker.templates_key)
+        if not key:
+            return ProfileChecker.get_profile_names(data)
+        if not is_settings(data[key]):
+            return [key] + ProfileChecker.get_profile_names(data)
+        return ["%s.%s" % (key, name) for name in data[key].keys()] + ProfileChecker.get_profile_names(data)
+    if file_type == "aux":
+        return list(data.keys())
+    if file_type == "common":
+        return [whole_file] + CommonChecker.common_keys_cap
+    return [whole_file]
+
+
+def get_common_plan(unit: str) -> dict:
+    """
+    gets rules execution plan that checks one section of common settings file
+    :param unit: section (common_keys_cap key) or whole_file for unknown keys check
+    :return: plan
+    """
+    if unit == whole_file:
+        return {'common_keys': "default"}
+    if unit != 'Motion':
+        return {'common_' + unit.lower(): "default"}
+    # motion section is checked by all rules of motion and its effects
+    sections = ['common_keys'] + ['common_' + key for key in CommonChecker.common_keys if key != 'motion']
+    return {rule: "default" for rule in CommonChecker.common_rules if rule not in sections}
+
+
+def get_bases(data: dict, settings: dict) -> set:
+    """
+    gets templates that profile or template extends directly or through other templates
+    :param data: dict with profiles
+    :param settings: settings of profile or template
+    :return: set of lowercase template names
+    """
+    templates = ProfileChecker.get_templates(data)[0]
+    bases = set()
+    name = get_value(settings, ProfileChecker.extends_key) if is_settings(settings) else None
+    while isinstance(name, str) and name.lower() not in bases:
+        bases.add(name.lower())
+        key = get_real_key(templates, name.lower())
+        name = get_value(templates[key], ProfileChecker.extends_key) if key and is_settings(templates[key]) else None
+    return bases
+
+
+def get_changed_units(changes: list, file_type: str, old: dict, new: dict) -> set:
+    """
+    gets units with changed paths and units depending on them (profiles and templates that extend changed templates)
+    :param changes: list of changed paths from diff_trees
+    :param file_type: common, profiles or aux
+    :param old: old ini data
+    :param new: new ini data
+    :return: set of units
+    """
+    if file_type not in ["common", "profiles", "aux"]:
+        return {whole_file} if changes else set()
+    units = set()
+    for path, kind in changes:
+        keys = path.split('[')[0].split('.')
+        if file_type == "common":
+            top = keys[0].lower()
+            units.add(next((key for key in CommonChecker.common_keys_cap if key.lower() == top), whole_file))
+            # added or removed section changes keys of file
+            if len(keys) == 1 and kind != 'changed':
+                units.add(whole_file)
+        elif file_type == "profiles" and keys[0].lower() == ProfileChecker.templates_key:
+            units.add(".".join(keys[:2]))
+        else:
+            units.add(keys[0])
+    if file_type != "profiles":
+        return units
+    changed = set()
+    for data in (old, new):
+        key = get_real_key(data, ProfileChecker.templates_key)
+        if key in units:
+            # templates key is changed as a whole
+            units |= {unit for unit in get_units(data, file_type) if unit.startswith(key + ".")}
+        changed |= {unit.split(".", 1)[1].lower() for unit in units if key and unit.startswith(key + ".")}
+    if not changed:
+        return units
+    for data in (old, new):
+        templates = ProfileChecker.get_templates(data)[0]
+        key = get_real_key(data, ProfileChecker.templates_key)
+        units |= {"%s.%s" % (key, name) for name in templates.keys() if get_bases(data, templates[name]) & changed}
+        units |= {name for name in ProfileChecker.get_profile_names(data) if get_bases(data, data[name]) & changed}
+    return units
+
+
+def check_unit(data: dict, file_type: str, unit: str, leds_number: int,
+               aux_leds_number: int = Auxchecker.leds_number) -> list:
+    """
+    checks one part of file like whole file checkers do (ProfileChecker.check_profiles for profiles and templates)
+    :param data: dict with ini data
+    :param file_type: common, profiles or aux
+    :param unit: unit from get_units
+    :param leds_number: number of leds in blade (for profiles)
+    :param aux_leds_number: number of aux leds
+    :return: list of messages
+    """
+    if file_type == "common":
+        plan = get_common_plan(unit)
+        errors = {err: "" for err in CommonChecker.common_keys_cap}
+        errors_motion = {err: "" for err in CommonChecker.motion_keys_cap}
+        error = CommonChecker.check_common(data, errors, errors_motion, plan)
+        CommonChecker.check_common_limits(data, errors, plan=plan)
+        return CommonChecker.get_messages(error, errors, errors_motion)
+    if file_type == "profiles":
+        templates, error = ProfileChecker.get_templates(data)
+        if error:
+            if unit.lower() == ProfileChecker.templates_key:
+                return ["Error: " + error]
+        elif unit.split(".", 1)[0].lower() == ProfileChecker.templates_key and "." in unit:
+            name = unit.split(".", 1)[1]
+            if not is_settings(templates[name]):
+                return ["Wrong settings format for template %s;" % name]
+            inheritance = {'templates': templates, 'resolved': {}, 'errors': {}}
+            return ProfileChecker.check_extended(templates[name], name, "template", inheritance, leds_number)
+        if not is_settings(data[unit]):
+            return ["Wrong settings format for profile %s;" % unit]
+        if get_real_key(data[unit], ProfileChecker.extends_key):
+            # errors of template it extends are reported for template
+            inheritance = {'templates': templates, 'resolved': {}, 'errors': {}}
+            return ProfileChecker.check_extended(data[unit], unit, "profile", inheritance, leds_number)
+        errors = {err: "" for err in ProfileChecker.effects_keys}
+        error = ProfileChecker.check_profile(data[unit], errors)
+        ProfileChecker.check_profile_limits(data[unit], errors, leds_number)
+        return ProfileChecker.get_messages(unit, error, errors)
+    if file_type == "aux":
+        return Auxchecker.check_effect(data, unit) + Auxchecker.check_effect_leds(data, unit, aux_leds_number)
+    return ["Error: unknown file type"]
+
+
+def compare_messages(old: list, new: list) -> (list, list, list):
+    """
+    compares messages of old and new version (messages are compared as multisets)
+    :param old: old messages
+    :param new: new messages
+    :return: new, fixed and unchanged messages
+    """
+    rest = list(old)
+    added = []
+    unchanged = []
+    for message in new:
+        if message in rest:
+            rest.remove(message)
+            unchanged.append(message)
+        else:
+            added.append(message)
+    return added, rest, unchanged
+
+
+def check_diff(old: dict, new: dict, leds_number: int) -> (list, list, list, list):
+    """
+    checks parts of both versions that are changed and parts depending on them, unchanged parts are not checked
+    :param old: old ini data
+    :param new: new ini data
+    :param leds_number: number of leds in blade (for profiles)
+    :return: changed paths, new, fixed and unchanged messages
+    """
+    changes = diff_trees(old, new)
+    old_type, new_type = get_file_type(old), get_file_type(new)
+    if old_type != new_type:
+        old_messages = [message for unit in get_units(old, old_type)
+                        for message in check_unit(old, old_type, unit, leds_number)]
+        new_messages = [message for unit in get_units(new, new_type)
+                        for message in check_unit(new, new_type, unit, leds_number)]
+        return changes, *compare_messages(old_messages, new_messages)
+    old_units, new_units = get_units(old, old_type), get_units(new, new_type)
+    changed_units = get_changed_units(changes, new_type, old, new)
+    added, fixed, unchanged = [], [], []
+    # only changed units are checked, unchanged messages are messages of changed units that are in both versions
+    for unit in new_units + [unit for unit in old_units if unit not in new_units]:
+        if unit not in changed_units:
+            continue
+        old_messages = check_unit(old, old_type, unit, leds_number) if unit in old_units else []
+        new_messages = check_unit(new, new_type, unit, leds_number) if unit in new_units else []
+        a, f, u = compare_messages(old_messages, new_messages)
+        added, fixed, unchanged = added + a, fixed + f, unchanged + u
+    return changes, added, fixed, unchanged
+
+
+def main(old_source: str, new_source: str, leds_number: int):
+    versions = []
+    for source in (old_source, new_source):
+        text, error = read_version(source)
+        if error:
+            print(error)
+            return -1
+        data, error = get_json(text)
+        if not data:
+            print("%s: %s" % (source, error.replace(" enclosed in double quotes", "")))
+            return -1
+        versions.append(data)
+    changes, added, fixed, unchanged = check_diff(versions[0], versions[1], leds_number)
+    print("Changed: %i settings" % len(changes))
+    for path, kind in changes:
+        print("  %s %s" % (kind, path))
+    for title, messages in (("New", added), ("Fixed", fixed), ("Unchanged", unchanged)):
+        print("%s: %i messages" % (title, len(messages)))
+        for message in messages:
+            print("  " + message.replace("\n", "\n  "))
+    return 1 if added else 0
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 3:
+        try:
+            sys.exit(main(sys.argv[1], sys.argv[2], int(sys.argv[3])))
+        except ValueError:
+            print("Third parameter (number of leds) must be number")
+    else:
+        print("Usage: DiffChecker.py old.ini|rev:old.ini new.ini|rev:new.ini leds_number")
@@ -0,0 +1,323 @@
+"""this module checks ini files changed in git repository (between two revisions or in index) and files depending on
+them; it can be used as pre-commit hook: exit code is 1 if any errors are found
+List of functions
+-get_root():                             gets root directory of git repository
+-get_changed_files(revisions, cached):   gets ini files changed between revisions or in index
+-get_source(revisions, cached):          gets git source of checked files content (revision, index or working tree)
+-get_source_files(root, source, directory): gets ini files of project directory in source
+-get_file_text(root, source, filename):  reads file content from source
+-get_source_hash(root, source, filename): gets hash of file content in source
+-sniff_file_type(text):                  gets type of file by its first key without parsing whole file
+-parse_text(text):                       parses ini file text read from git
+-load_changed_project(root, source, directory, changed): parses changed files and files needed for their checks
+-check_directory(directory, changed, hardware, plan, root, source): checks changed files of one project directory and
+                                         their dependents
+-check_changed(filenames, hardware, jobs, plan, root, source): checks changed files of all directories in parallel
+"""
+import os
+import sys
+import argparse
+import hashlib
+import subprocess
+from concurrent.futures import ProcessPoolExecutor
+from IniToJson import get_json
+from MmapLexer import get_lexer, ParseError
+from CommonChecks import get_file_type
+from CommonChecker import common_keys
+from ProjectChecker import load_file, get_project_files, get_dependents, check_project, ini_extension
+from Hardware import load_hardware, default_hardware
+from Rules import load_rules
+from Reporters import open_output, get_reporter, get_severity, report_formats
+
+
+def run_git(args: list) -> (str, str):
+    """
+    runs git command
+    :param args: git arguments
+    :return: command output or None, error message or empty string
+    """
+    try:
+        result = subprocess.run(['git'] + args, capture_output=True, text=True, encoding='utf-8')
+    except FileNotFoundError:
+        return None, "git is not found"
+    except UnicodeDecodeError:
+        return None, "git output is not UTF-8 text"
+    if result.returncode != 0:
+        return None, result.stderr.strip()
+    return result.stdout, ""
+
+
+def get_root() -> (str, str):
+    """
+    gets root directory of git repository of current directory
+    :return: absolute root directory or None, error message or empty string
+    """
+    root, error = run_git(['rev-parse', '--show-toplevel'])
+    if error:
+        return None, error
+    return os.path.normpath(root.strip()), ""
+
+
+def get_changed_files(revisions: list, cached: bool) -> (list, str):
+    """
+    gets ini files added, copied, modified or renamed between revisions (or between HEAD and index if cached)
+    :param revisions: list of zero, one or two revisions
+    :param cached: use changes in index
+    :return: list of absolute file names or None, error message or empty string
+    """
+    root, error = get_root()
+    if error:
+        return None, error
+    args = ['-C', root, 'diff', '--name-only', '--diff-filter=ACMR'] + (['--cached'] if cached else []) + revisions
+    output, error = run_git(args)
+    if error:
+        return None, error
+    return [os.path.join(root, name) for name in output.splitlines()
+            if name.lower().endswith(ini_extension)], ""
+
+
+def get_source(revisions: list, cached: bool) -> str:
+    """
+    gets source of content of changed files: index for cached changes, second revision for changes between two
+    revisions, working tree otherwise
+    :param revisions: list of zero, one or two revisions
+    :param cached: use changes in index
+    :return: prefix of git show object name (':' for index, 'revision:') or empty string for working tree
+    """
+    if cached:
+        return ":"
+    if len(revisions) == 2:
+        return revisions[1] + ":"
+    return ""
+
+
+def get_source_files(root: str, source: str, directory: str) -> (list, str):
+    """
+    gets ini files of project directory in source
+    :param root: repository root
+    :param source: source from get_source
+    :param directory: absolute project directory
+    :return: sorted list of absolute file names or None, error message or empty string
+    """
+    if not source:
+        if not os.path.isdir(directory):
+            return None, "directory %s is not found" % directory
+        return get_project_files(directory), ""
+    relative = os.path.relpath(directory, root).replace(os.sep, '/')
+    prefix = "" if relative == "." else relative + "/"
+    if source == ":":
+        output, error = run_git(['-C', root, 'ls-files', '--cached', '--', prefix or "."])
+    else:
+        output, error = run_git(['-C', root, 'ls-tree', '--name-only', source[:-1], '--', prefix or "."])
+    if error:
+        return None, error
+    # only files of directory itself, not of its subdirectories
+    return sorted(os.path.join(root, name) for name in output.splitlines() if name.startswith(prefix) and
+                  '/' not in name[len(prefix):] and name.lower().endswith(ini_extension)), ""
+
+
+def get_file_text(root: str, source: str, filename: str) -> (str, str):
+    """
+    reads file content from source
+    :param root: repository root
+    :param source: source from get_source
+    :param filename: absolute file name
+    :return: text or None, error message or empty string
+    """
+    if not source:
+        try:
+            with open(filename, encoding='utf-8') as f:
+                return f.read(), ""
+        except FileNotFoundError:
+            return None, "File %s not found" % filename
+        except (OSError, UnicodeDecodeError) as e:
+            return None, "File %s can't be read: %s" % (filename, e)
+    output, error = run_git(['-C', root, 'show', source + os.path.relpath(filename, root).replace(os.sep, '/')])
+    if error:
+        return None, "File %s can't be read from git: %s" % (filename, error)
+    return output, ""
+
+
+def get_source_hash(root: str, source: str, filename: str) -> str:
+    """
+    gets sha256 hash of file content in source, the same as History.get_file_hash for files of working tree
+    :param root: repository root
+    :param source: source from get_source
+    :param filename: file name
+    :return: hex digest or empty string if file can't be read
+    """
+    from History import get_file_hash
+    if not source:
+        return get_file_hash(filename)
+    name = source + os.path.relpath(os.path.abspath(filename), root).replace(os.sep, '/')
+    try:
+        # content is read as bytes, so hash doesn't depend on decoding and new lines
+        result = subprocess.run(['git', '-C', root, 'show', name], capture_output=True)
+    except FileNotFoundError:
+        return ""
+    return hashlib.sha256(result.stdout).hexdigest() if result.returncode == 0 else ""
+
+
+def sniff_file_type(text: str) -> str:
+    """
+    gets type of file by its first key and first symbol of its value: settings under key that is not common
+    settings key are profile
+    :param text: ini file text
+    :return: 'profiles' or empty string if file must be parsed to get its type
+    """
+    try:
+        lexer = get_lexer(text.encode('utf-8'))
+        kind, key, position = lexer.token or lexer.next()
+        if kind != 'name' or lexer.next()[0] != ':' or lexer.next()[0] != '{':
+            return ""
+    except ParseError:
+        return ""
+    return "" if key.lower() in common_keys else "profiles"
+
+
+def parse_text(text: str) -> (object, str, str):
+    """
+    parses ini file text read from git
+    :param text: ini file text
+    :return: data or None, error message, file type
+    """
+    data, error = get_json(text)
+    return data, error.replace(" enclosed in double quotes", ""), get_file_type(data)
+
+
+def load_changed_project(root: str, source: str, directory: str, changed: list) -> (dict, list):
+    """
+    parses changed files of project directory and files needed for their checks: common settings and aux leds files
+    are context of profiles, unchanged profiles are parsed only if they depend on changed files
+    :param root: repository root
+    :param source: source from get_source
+    :param directory: absolute project directory
+    :param changed: list of changed files of directory
+    :return: dict filename -> (data or None, error message, file type) like ProjectChecker.load_project,
+             list of project errors
+    """
+    filenames, error = get_source_files(root, source, directory)
+    if error:
+        return {}, ["Error: %s" % error]
+    files, profiles = {}, {}
+    for filename in filenames:
+        if not source and filename in changed:
+            files[filename] = load_file(filename)
+            continue
+        text, error = get_file_text(root, source, filename)
+        if text is None:
+            files[filename] = (None, error, "")
+        elif filename not in changed and sniff_file_type(text) == "profiles":
+            profiles[filename] = text
+        else:
+            files[filename] = parse_text(text)
+    if profiles and any(files[filename][2] in ["common", "aux"] for filename in changed if filename in files):
+        for filename, text in profiles.items():
+            files[filename] = parse_text(text)
+    return {filename: files[filename] for filename in sorted(files.keys())}, []
+
+
+def check_directory(directory: str, changed: list, hardware: dict = default_hardware, plan: dict = None,
+                    root: str = "", source: str = "") -> (list, dict):
+    """
+    checks changed files of project directory and files depending on them
+    :param directory: project directory
+    :param changed: list of changed files of directory
+    :param hardware: dict with hardware limits
+    :param plan: rules execution plan (all rules are checked if None)
+    :param root: repository root (for reading files from git)
+    :param source: source of files content from get_source (working tree if empty)
+    :return: list of project errors, dict filename -> list of messages
+    """
+    files, errors = load_changed_project(root, source, directory, changed)
+    if errors:
+        # files of directory can't be read (directory is deleted in working tree)
+        return errors, {filename: ["File %s not found" % filename] for filename in changed}
+    for filename in changed:
+        if filename not in files:
+            files[filename] = (None, "File %s not found" % filename, "")
+    project_errors, results = check_project(files, hardware, get_dependents(files, changed), plan)
+    return project_errors, results
+
+
+def check_changed(filenames: list, hardware: dict = default_hardware, jobs: int = None, plan: dict = None,
+                  root: str = "", source: str = "") -> (list, dict):
+    """
+    checks changed files grouped by directories, directories are checked in parallel processes
+    :param filenames: list of changed files
+    :param hardware: dict with hardware limits
+    :param jobs: number of processes (number of cpus if None)
+    :param plan: rules execution plan (all rules are checked if None)
+    :param root: repository root (for reading files from git)
+    :param source: source of files content from get_source (working tree if empty)
+    :return: list of project errors, dict filename -> list of messages
+    """
+    directories = {}
+    for filename in filenames:
+        filename = os.path.normpath(filename)
+        directories.setdefault(os.path.dirname(filename), []).append(filename)
+    errors, results = [], {}
+    if not directories:
+        return errors, results
+    with ProcessPoolExecutor(max_workers=min(jobs or os.cpu_count() or 1, len(directories))) as executor:
+        futures = [executor.submit(check_directory, directory, changed, hardware, plan, root, source)
+                   for directory, changed in directories.items()]
+        for future in futures:
+            directory_errors, directory_results = future.result()
+            errors += directory_errors
+            results.update(directory_results)
+    return errors, results
+
+
+def main(revisions: list, cached: bool, board_filename: str = "", jobs: int = None, report_format: str = "text",
+         output: str = "", rules_filename: str = "", history: str = "") -> int:
+    hardware = default_hardware
+    if board_filename:
+        hardware, error = load_hardware(board_filename)
+        if error:
+            print("Error: hardware file %s: %s" % (board_filename, error))
+            return 2
+    plan = None
+    if rules_filename:
+        plan, error = load_rules(rules_filename)
+        if error:
+            print("Error: rules file %s: %s" % (rules_filename, error))
+            return 2
+    filenames, error = get_changed_files(revisions, cached)
+    if error:
+        print("Error: %s" % error)
+        return 2
+    root, source = get_root()[0], get_source(revisions, cached)
+    errors, results = check_changed(filenames, hardware, jobs, plan, root, source)
+    failed = bool(errors)
+    stream = open_output(output)
+    reporter = get_reporter(report_format, stream)
+    if history:
+        from History import HistoryReporter
+        # hashes of checked content (index or revision), not of working tree files
+        reporter = HistoryReporter(history, reporter, get_hash=lambda filename: get_source_hash(root, source, filename))
+    reporter.start()
+    if errors:
+        reporter.report_file("", errors)
+    for filename, messages in results.items():
+        reporter.report_file(os.path.relpath(filename), messages)
+        failed = failed or any(get_severity(message) == "error" for message in messages)
+    reporter.finish()
+    if stream is not sys.stdout:
+        stream.close()
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="checks ini files changed in git repository")
+    parser.add_argument('revisions', nargs='*', help="zero, one or two revisions to compare")
+    parser.add_argument('--cached', action='store_true', help="check files changed in index (pre-commit hook)")
+    parser.add_argument('--board', default="", help="hardware capability file")
+    parser.add_argument('--jobs', type=int, default=None, help="number of parallel processes")
+    parser.add_argument('--format', default="text", choices=report_formats, help="report format")
+    parser.add_argument('--output', default="", help="report file (stdout if absent)")
+    parser.add_argument('--rules', default="", help="rules configuration file")
+    parser.add_argument('--history', default="", help="history database (results are added to it)")
+    args = parser.parse_args()
+    sys.exit(main(args.revisions, args.cached, args.board, args.jobs, args.format, args.output, args.rules,
+                  args.history))
@@ -0,0 +1,191 @@
+"""this module loads hardware capability files and checks one ini file against several board models
+List of functions
+-load_hardware(filename):                     loads and checks hardware capability file
+-get_blade_leds(hardware):                    gets number of leds in blade for ProfileChecker
+-check_boards(data, boards):                  checks parsed ini file once for structure and for limits of each board
+-get_compatibility_matrix(results, boards):   gets files x boards compatibility table
+
+Hardware capability file is written in ini format too, for example:
+Name: Lite, MaxBand: 4, MaxLeds: 144, MaxTotalLeds: 500, AuxLeds: 4, BladeLeds: 144
+BladeLeds is optional (max number of leds for board is used if it is absent).
+"""
+import os
+import sys
+from IniToJson import get_json
+from CommonChecks import *
+import CommonChecker
+import ProfileChecker
+import Auxchecker
+
+hardware_keys = ['name', 'maxband', 'maxleds', 'maxtotalleds', 'auxleds', 'bladeleds']
+default_hardware = {'name': 'default', 'maxband': CommonChecker.max_band, 'maxleds': CommonChecker.max_leds,
+                    'maxtotalleds': CommonChecker.max_total_leds, 'auxleds': Auxchecker.leds_number,
+                    'bladeleds': None}
+max_aux_leds = 1024
+
+
+def load_hardware(filename: str) -> (dict, str):
+    """
+    loads hardware capability file
+    :param filename: file name
+    :return: dict with hardware limits (lowercase keys) or None, error message or empty string
+    """
+    try:
+        f = open(filename)
+    except FileNotFoundError:
+        return None, "File %s not found" % filename
+    data, error = get_json(f.read())
+    if not data:
+        return None, error.replace(" enclosed in double quotes", "")
+    error = check_keys(data, hardware_keys)
+    error += check_number(data, 'maxband', 1, CommonChecker.big_number)
+    error += check_number(data, 'maxleds', 1, CommonChecker.big_number)
+    error += check_number(data, 'maxtotalleds', 1, CommonChecker.big_number)
+    error += check_number(data, 'auxleds', 1, max_aux_leds)
+    error += check_unnecessary_number(data, 'bladeleds', 1, CommonChecker.big_number)
+    if error:
+        return None, error.strip()
+    hardware = {key: get_value(data, key) for key in hardware_keys}
+    if not isinstance(hardware['name'], str):
+        hardware['name'] = os.path.splitext(os.path.basename(filename))[0]
+    return hardware, ""
+
+
+def get_blade_leds(hardware: dict) -> int:
+    """
+    gets number of leds in blade used for profiles checking
+    :param hardware: dict with hardware limits
+    :return: number of leds
+    """
+    if hardware['bladeleds']:
+        return hardware['bladeleds']
+    return min(hardware['maxband'] * hardware['maxleds'], hardware['maxtotalleds'])
+
+
+def check_boards(data: dict, boards: list) -> (list, dict):
+    """
+    checks ini file against several boards: checks that don't depend on hardware are run once, checks that depend on
+    hardware limits are run for each board
+    :param data: dict with ini data
+    :param boards: list of dicts with hardware limits
+    :return: list of messages common for all boards, dict board name -> list of board messages
+    """
+    file_type = get_file_type(data)
+    results = {}
+    if file_type == "common":
+        errors = {err: "" for err in CommonChecker.common_keys_cap}
+        errors_motion = {err: "" for err in CommonChecker.motion_keys_cap}
+        error = CommonChecker.check_common(data, errors, errors_motion)
+        messages = CommonChecker.get_messages(error, errors, errors_motion)
+        for board in boards:
+            board_errors = {}
+            CommonChecker.check_common_limits(data, board_errors, board['maxband'], board['maxleds'],
+                                              board['maxtotalleds'])
+            results[board['name']] = CommonChecker.get_messages("", board_errors, {})
+    elif file_type == "profiles":
+        messages = []
+        profile_errors = {}
+        profiles = ProfileChecker.get_resolved_profiles(data)
+        for profile, (settings, error) in profiles.items():
+            if error:
+                messages.append("Error: %s profile: %s" % (profile, error))
+                continue
+            profile_errors[profile] = {}
+            error = ProfileChecker.check_profile(settings, profile_errors[profile])
+            messages += ProfileChecker.get_messages(profile, error, profile_errors[profile])
+        for board in boards:
+            results[board['name']] = []
+            for profile, (settings, error) in profiles.items():
+                if error:
+                    continue
+                board_errors = {}
+                ProfileChecker.check_profile_limits(settings, board_errors, get_blade_leds(board))
+                results[board['name']] += ProfileChecker.get_messages(profile, "", board_errors)
+    elif file_type == "aux":
+        messages = []
+        for effect in data.keys():
+            messages += Auxchecker.check_effect(data, effect)
+        for board in boards:
+            results[board['name']] = []
+            for effect in data.keys():
+                results[board['name']] += Auxchecker.check_effect_leds(data, effect, board['auxleds'])
+    else:
+        messages = ["Error: unknown file type"]
+    return messages, results
+
+
+def get_board_status(messages: list) -> str:
+    """
+    gets compatibility status for list of board messages
+    :param messages: list of messages
+    :return: status string
+    """
+    errors = len([message for message in messages if not message.startswith("Warning")])
+    if errors:
+        return "%i errors" % errors
+    if messages:
+        return "warnings"
+    return "ok"
+
+
+def get_compatibility_matrix(results: dict, boards: list) -> list:
+    """
+    gets table of compatibility of files with boards, messages common for all boards are counted for each board
+    :param results: dict filename -> (list of messages common for all boards, dict board name -> list of board
+                    messages) from check_boards
+    :param boards: list of dicts with hardware limits
+    :return: list of table lines
+    """
+    names = [board['name'] for board in boards]
+    width = max([len(filename) for filename in results.keys()] + [4])
+    widths = [max(len(name), 9) for name in names]
+    lines = ["file".ljust(width) + "  " + "  ".join(name.ljust(w) for name, w in zip(names, widths))]
+    for filename, (messages, board_results) in results.items():
+        statuses = [get_board_status(messages + board_results[name]).ljust(w) for name, w in zip(names, widths)]
+        lines.append(filename.ljust(width) + "  " + "  ".join(statuses))
+    return lines
+
+
+def main(filenames: list, board_filenames: list):
+    boards = []
+    names = {}
+    for board_filename in board_filenames:
+        hardware, error = load_hardware(board_filename)
+        if error:
+            print("Error: hardware file %s: %s" % (board_filename, error))
+            return -1
+        # results of boards are kept by names, so boards with the same name would overwrite each other
+        if hardware['name'] in names:
+            print("Error: hardware file %s: board name %s is already used in %s" %
+                  (board_filename, hardware['name'], names[hardware['name']]))
+            return -1
+        names[hardware['name']] = board_filename
+        boards.append(hardware)
+    results = {}
+    for filename in filenames:
+        try:
+            f = open(filename)
+        except FileNotFoundError:
+            print("File %s not found" % filename)
+            continue
+        data, error = get_json(f.read())
+        if not data:
+            print("%s: %s" % (filename, error.replace(" enclosed in double quotes", "")))
+            continue
+        results[filename] = messages, board_results = check_boards(data, boards)
+        for message in messages:
+            print("%s: %s" % (filename, message))
+        for board, board_messages in board_results.items():
+            for message in board_messages:
+                print("%s (%s): %s" % (filename, board, message))
+    for line in get_compatibility_matrix(results, boards):
+        print(line)
+    return 0
+
+
+if __name__ == '__main__':
+    if '--boards' in sys.argv[2:]:
+        index = sys.argv.index('--boards')
+        main(sys.argv[1:index], sys.argv[index + 1:])
+    else:
+        print("Usage: Hardware.py file.ini [file2.ini ...] --boards board.ini [board2.ini ...]")
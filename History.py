@@ -0,0 +1,285 @@
+"""this module keeps history of checking results in SQLite database: runs, checked files with hashes of their
+contents and all messages; HistoryReporter is used with other reporter and writes results of batch run to database,
+rows are inserted by batches in one transaction, message texts are stored once and diagnostics rows keep only ids
+(with number of equal messages of file), so database stays small and fast with millions of diagnostics
+Messages don't have rule ids, so they are grouped by signature: message text with names and numbers replaced
+List of functions and classes
+-get_signature(message):                  gets message signature (message kind)
+-open_history(filename):                  opens history database and creates tables and indexes
+-HistoryReporter:                         reporter that writes results to history database and to other reporter
+-get_runs(db, limit):                     gets last runs
+-get_top(db, since, limit):               gets signatures of messages found most often
+-get_file_history(db, path, limit):       gets results of file in last runs and run where it started failing
+-get_file_messages(db, path, run):        gets messages of file in run
+"""
+import os
+import re
+import sys
+import time
+import sqlite3
+import hashlib
+import argparse
+import datetime
+from Reporters import get_severity
+
+# rows inserted by one executemany call
+batch_size = 10000
+hash_chunk = 1 << 20
+# page cache of database connection, indexes of big database are updated in memory
+cache_kib = 65536
+schema = """
+CREATE TABLE IF NOT EXISTS runs (id INTEGER PRIMARY KEY, started REAL, finished REAL, command TEXT,
+                                 files INTEGER DEFAULT 0, errors INTEGER DEFAULT 0, warnings INTEGER DEFAULT 0);
+CREATE TABLE IF NOT EXISTS files (id INTEGER PRIMARY KEY, path TEXT UNIQUE);
+CREATE TABLE IF NOT EXISTS checks (run INTEGER, file INTEGER, hash TEXT, errors INTEGER, warnings INTEGER,
+                                   PRIMARY KEY (run, file)) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS signatures (id INTEGER PRIMARY KEY, text TEXT UNIQUE);
+CREATE TABLE IF NOT EXISTS messages (id INTEGER PRIMARY KEY, text TEXT UNIQUE, severity TEXT, signature INTEGER);
+CREATE TABLE IF NOT EXISTS diagnostics (run INTEGER, file INTEGER, message INTEGER, count INTEGER,
+                                        PRIMARY KEY (run, file, message)) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS checks_file ON checks (file, run);
+CREATE INDEX IF NOT EXISTS diagnostics_message ON diagnostics (message, run);
+CREATE INDEX IF NOT EXISTS messages_signature ON messages (signature);
+"""
+signature_patterns = [(re.compile(r"'[^']*'"), "'*'"),
+                      (re.compile(r"^(\w+: )\w+ (profile|template) "), r"\1* \2 "),
+                      (re.compile(r"\b(AuxLedsEffect|Led) ?\w+"), r"\1 *"),
+                      (re.compile(r"/\S+"), "*"),
+                      (re.compile(r"-?\b\d+\b"), "N")]
+
+
+def get_signature(message: str) -> str:
+    """
+    gets message signature: quoted names, profile names, file names and numbers are replaced, so messages of one
+    check for different profiles, effects and values have the same signature
+    :param message: checker message
+    :return: signature
+    """
+    for pattern, replacement in signature_patterns:
+        message = pattern.sub(replacement, message)
+    return message
+
+
+def get_file_hash(filename: str) -> str:
+    """
+    gets sha256 hash of file contents
+    :param filename: file name
+    :return: hex digest or empty string if file can't be read (or it is directory)
+    """
+    digest = hashlib.sha256()
+    try:
+        with open(filename, 'rb') as f:
+            for chunk in iter(lambda: f.read(hash_chunk), b""):
+                digest.update(chunk)
+    except OSError:
+        return ""
+    return digest.hexdigest()
+
+
+def open_history(filename: str) -> sqlite3.Connection:
+    """
+    opens history database, tables and indexes are created if they don't exist
+    :param filename: database file name
+    :return: connection
+    """
+    db = sqlite3.connect(filename)
+    db.execute("PRAGMA journal_mode = WAL")
+    db.execute("PRAGMA synchronous = NORMAL")
+    db.execute("PRAGMA cache_size = -%i" % cache_kib)
+    db.executescript(schema)
+    return db
+
+
+class HistoryReporter:
+    """
+    writes results to history database and passes them to other reporter; get_hash gets hash of checked content of
+    file (get_file_hash of working tree file if None)
+    """
+    def __init__(self, filename: str, reporter, command: str = "", get_hash=None):
+        self.filename = filename
+        self.reporter = reporter
+        self.command = command or " ".join(sys.argv)
+        self.get_hash = get_hash or get_file_hash
+        self.db = None
+        self.run = None
+        # rows of current batch: paths and texts are resolved to ids by database when batch is inserted, so nothing
+        # is kept between batches
+        self.files = set()
+        self.messages = {}
+        self.checks = []
+        self.diagnostics = []
+        self.totals = [0, 0, 0]
+
+    def start(self):
+        self.reporter.start()
+        self.db = open_history(self.filename)
+        self.run = self.db.execute("INSERT INTO runs (started, command) VALUES (?, ?)",
+                                   (time.time(), self.command)).lastrowid
+
+    def report_file(self, filename: str, messages: list):
+        self.reporter.report_file(filename, messages)
+        # checkers report relative or absolute paths, database keeps absolute paths, so file has one row
+        path = os.path.abspath(filename) if filename else filename
+        self.files.add(path)
+        counts = {}
+        for message in messages:
+            counts[message] = counts.get(message, 0) + 1
+        errors = warnings = 0
+        for message, count in counts.items():
+            severity = get_severity(message)
+            if message not in self.messages:
+                self.messages[message] = (severity, get_signature(message))
+            self.diagnostics.append((self.run, path, message, count))
+            if severity == "error":
+                errors += count
+            else:
+                warnings += count
+        file_hash = self.get_hash(filename) if filename else ""
+        self.checks.append((self.run, path, file_hash, errors, warnings))
+        self.totals = [self.totals[0] + 1, self.totals[1] + errors, self.totals[2] + warnings]
+        if len(self.diagnostics) >= batch_size or len(self.checks) >= batch_size:
+            self.flush()
+
+    def flush(self):
+        """
+        inserts collected rows: new paths, signatures and messages are inserted with INSERT OR IGNORE and ids of
+        checks and diagnostics rows are got by unique indexes in the same statements, all in one transaction
+        """
+        self.db.executemany("INSERT OR IGNORE INTO files (path) VALUES (?)", [(path,) for path in self.files])
+        self.db.executemany("INSERT OR IGNORE INTO signatures (text) VALUES (?)",
+                            [(signature,) for severity, signature in self.messages.values()])
+        self.db.executemany("INSERT OR IGNORE INTO messages (text, severity, signature) "
+                            "VALUES (?, ?, (SELECT id FROM signatures WHERE text = ?))",
+                            [(text, severity, signature) for text, (severity, signature) in self.messages.items()])
+        self.db.executemany("INSERT OR REPLACE INTO checks "
+                            "VALUES (?, (SELECT id FROM files WHERE path = ?), ?, ?, ?)", self.checks)
+        self.db.executemany("INSERT OR REPLACE INTO diagnostics VALUES (?, (SELECT id FROM files WHERE path = ?), "
+                            "(SELECT id FROM messages WHERE text = ?), ?)", self.diagnostics)
+        self.files, self.messages, self.checks, self.diagnostics = set(), {}, [], []
+
+    def finish(self):
+        self.flush()
+        self.db.execute("UPDATE runs SET finished = ?, files = ?, errors = ?, warnings = ? WHERE id = ?",
+                        (time.time(), *self.totals, self.run))
+        self.db.commit()
+        self.db.close()
+        self.reporter.finish()
+
+
+def get_runs(db: sqlite3.Connection, limit: int = 20) -> list:
+    """
+    gets last runs
+    :param db: history database
+    :param limit: number of runs
+    :return: list of (id, started, finished, command, files, errors, warnings)
+    """
+    return db.execute("SELECT id, started, finished, command, files, errors, warnings FROM runs "
+                      "ORDER BY id DESC LIMIT ?", (limit,)).fetchall()
+
+
+def get_top(db: sqlite3.Connection, since: float = 0, limit: int = 20) -> list:
+    """
+    gets signatures of messages found most often in runs started after time
+    :param db: history database
+    :param since: unix time
+    :param limit: number of signatures
+    :return: list of (signature, number of messages, number of files)
+    """
+    return db.execute("SELECT signatures.text, SUM(count), COUNT(DISTINCT diagnostics.file) FROM diagnostics "
+                      "JOIN messages ON messages.id = diagnostics.message "
+                      "JOIN signatures ON signatures.id = messages.signature "
+                      "WHERE diagnostics.run IN (SELECT id FROM runs WHERE started >= ?) "
+                      "GROUP BY messages.signature ORDER BY SUM(count) DESC LIMIT ?", (since, limit)).fetchall()
+
+
+def get_file_history(db: sqlite3.Connection, path: str, limit: int = 20) -> (list, tuple):
+    """
+    gets results of file in last runs and run where file started failing (first run of last sequence of runs with
+    errors)
+    :param db: history database
+    :param path: checked file path
+    :param limit: number of runs
+    :return: list of (run, started, hash, errors, warnings), (run, started, hash) or None if file has no errors now
+    """
+    row = db.execute("SELECT id FROM files WHERE path = ?", (os.path.abspath(path),)).fetchone() or \
+        db.execute("SELECT id FROM files WHERE path = ?", (path,)).fetchone()
+    if row is None:
+        return [], None
+    query = "SELECT checks.run, runs.started, checks.hash, checks.errors, checks.warnings FROM checks " \
+            "JOIN runs ON runs.id = checks.run WHERE checks.file = ? "
+    history = db.execute(query + "ORDER BY checks.run DESC LIMIT ?", (row[0], limit)).fetchall()
+    if not history or not history[0][3]:
+        return history, None
+    passed = db.execute("SELECT MAX(run) FROM checks WHERE file = ? AND errors = 0", (row[0],)).fetchone()[0]
+    failed = db.execute(query + "AND checks.run > ? ORDER BY checks.run LIMIT 1", (row[0], passed or 0)).fetchone()
+    return history, failed[:3]
+
+
+def get_file_messages(db: sqlite3.Connection, path: str, run: int = 0) -> list:
+    """
+    gets messages of file in run
+    :param db: history database
+    :param path: checked file path
+    :param run: run id (last run that checked file if 0)
+    :return: list of messages
+    """
+    row = db.execute("SELECT id FROM files WHERE path = ?", (os.path.abspath(path),)).fetchone() or \
+        db.execute("SELECT id FROM files WHERE path = ?", (path,)).fetchone()
+    if row is None:
+        return []
+    if not run:
+        run = db.execute("SELECT MAX(run) FROM checks WHERE file = ?", (row[0],)).fetchone()[0]
+    rows = db.execute("SELECT messages.text, diagnostics.count FROM diagnostics "
+                      "JOIN messages ON messages.id = diagnostics.message "
+                      "WHERE diagnostics.run = ? AND diagnostics.file = ?", (run, row[0]))
+    return [text for text, count in rows for i in range(count)]
+
+
+def get_time_text(value: float) -> str:
+    return datetime.datetime.fromtimestamp(value).strftime("%Y-%m-%d %H:%M:%S") if value else "-"
+
+
+def main(filename: str, command: str, path: str = "", since: str = "", limit: int = 20, run: int = 0) -> int:
+    if not os.path.isfile(filename):
+        print("History database %s not found" % filename)
+        return 2
+    db = open_history(filename)
+    if command == "runs":
+        for run_id, started, finished, run_command, files, errors, warnings in get_runs(db, limit):
+            print("%i %s files: %i, errors: %i, warnings: %i, %s" % (run_id, get_time_text(started), files, errors,
+                                                                     warnings, run_command))
+    elif command == "top":
+        try:
+            start = time.mktime(datetime.date.fromisoformat(since).timetuple()) if since else 0
+        except ValueError:
+            print("Date must be written as YYYY-MM-DD")
+            return 2
+        for signature, count, files in get_top(db, start, limit):
+            print("%i messages in %i files: %s" % (count, files, signature.replace("\n", " ")))
+    elif command == "file":
+        history, failed = get_file_history(db, path, limit)
+        for run_id, started, file_hash, errors, warnings in history:
+            print("%i %s %s errors: %i, warnings: %i" % (run_id, get_time_text(started), file_hash[:12] or "-",
+                                                         errors, warnings))
+        if failed:
+            print("Failing since run %i %s (file hash %s)" % (failed[0], get_time_text(failed[1]),
+                                                             failed[2][:12] or "-"))
+    elif command == "messages":
+        for message in get_file_messages(db, path, run):
+            print(message)
+    db.close()
+    return 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="queries history of checking results")
+    parser.add_argument('database')
+    parser.add_argument('command', choices=['runs', 'top', 'file', 'messages'],
+                        help="runs: last runs, top: most frequent messages, file: results of file in last runs, "
+                             "messages: messages of file")
+    parser.add_argument('path', nargs='?', default="", help="checked file (for file and messages commands)")
+    parser.add_argument('--since', default="", help="count messages of runs since date YYYY-MM-DD (for top)")
+    parser.add_argument('--limit', type=int, default=20, help="number of rows")
+    parser.add_argument('--run', type=int, default=0, help="run id (for messages, last run if absent)")
+    args = parser.parse_args()
+    sys.exit(main(args.database, args.command, args.path, args.since, args.limit, args.run))
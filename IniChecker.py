@@ -0,0 +1,255 @@
+"""this module is one command line interface for all checkers and tools: each subcommand imports only modules it
+needs when it is run, so checking one small file doesn't import parsers, reporters and numpy of other tools
+Usage: IniChecker.py [--version] subcommand arguments (IniChecker.py subcommand --help for subcommand arguments)
+List of functions
+-get_file_messages(filename, leds_number, aux_leds_number): checks one ini file of any type
+-get_parser():                        gets command line parser with all subcommands
+-main(argv):                          runs subcommand
+"""
+import sys
+import Defaults
+
+version = "1.2.0"
+
+
+def get_file_messages(filename: str, leds_number: int, aux_leds_number: int) -> list:
+    """
+    checks one ini file, file type is got from its data and only checker for this type is imported
+    :param filename: ini file name
+    :param leds_number: number of leds in blade (for profiles)
+    :param aux_leds_number: number of aux leds (for aux leds effects)
+    :return: list of messages
+    """
+    from IniToJson import load_json
+    from CommonChecks import get_file_type
+    data, error = load_json(filename)
+    if data is None:
+        return [error]
+    if not data:
+        return ["Error: file is empty"]
+    file_type = get_file_type(data)
+    messages = []
+    if file_type == "common":
+        import CommonChecker
+        errors = {err: "" for err in CommonChecker.common_keys_cap}
+        errors_motion = {err: "" for err in CommonChecker.motion_keys_cap}
+        error = CommonChecker.check_common(data, errors, errors_motion)
+        CommonChecker.check_common_limits(data, errors)
+        messages = CommonChecker.get_messages(error, errors, errors_motion)
+    elif file_type == "profiles":
+        import ProfileChecker
+        messages = ProfileChecker.check_profiles(data, leds_number)
+    elif file_type == "aux":
+        import Auxchecker
+        for effect in data.keys():
+            messages += Auxchecker.check_effect(data, effect) + \
+                        Auxchecker.check_effect_leds(data, effect, aux_leds_number)
+    else:
+        messages.append("Error: unknown file type")
+    return messages
+
+
+def run_check(args) -> int:
+    result = 0
+    for filename in args.filenames:
+        for message in get_file_messages(filename, args.leds, args.auxleds):
+            print("%s: %s" % (filename, message))
+            if not message.startswith("Warning"):
+                result = 1
+    return result
+
+
+def run_project(args) -> int:
+    import ProjectChecker
+    result = ProjectChecker.main(args.directory, args.board)
+    return 2 if result == -1 else result
+
+
+def run_batch(args) -> int:
+    import BatchChecker
+    return BatchChecker.main(args.paths, args.format, args.output, args.board, args.rules, args.compact, args.cache,
+                             args.history, args.jobs, args.timeout, args.memory)
+
+
+def run_git(args) -> int:
+    import GitChecker
+    return GitChecker.main(args.revisions, args.cached, args.board, args.jobs, args.format, args.output, args.rules,
+                           args.history)
+
+
+def run_queue(args) -> int:
+    import WorkQueue
+    return WorkQueue.main(args.action, args.job, args.paths, args.rules, args.board, args.compact, args.cache,
+                          args.workers, args.format, args.output, args.stale, args.timeout)
+
+
+def run_diff(args) -> int:
+    import DiffChecker
+    result = DiffChecker.main(args.old, args.new, args.leds)
+    return 2 if result == -1 else result
+
+
+def run_format(args) -> int:
+    import IniFormatter
+    return IniFormatter.main(args.filenames, args.check, args.write, args.hash)
+
+
+def run_fix(args) -> int:
+    import IniFixer
+    return IniFixer.main(args.paths, args.write, args.leds, args.auxleds)
+
+
+def run_stream(args) -> int:
+    import AuxStream
+    return AuxStream.main(args.filename, args.auxleds, args.usage)
+
+
+def run_boards(args) -> int:
+    import Hardware
+    return 2 if Hardware.main(args.filenames, args.boards) == -1 else 0
+
+
+def run_history(args) -> int:
+    import History
+    return History.main(args.database, args.query, args.path, args.since, args.limit, args.run)
+
+
+def run_rules(args) -> int:
+    import Rules
+    if not args.filename:
+        for rule in Rules.get_rules():
+            print(rule)
+        return 0
+    plan, error = Rules.load_rules(args.filename)
+    if error:
+        print(error)
+        return 2
+    for rule in Rules.get_rules():
+        print("%s: %s" % (rule, plan.get(rule, "off")))
+    return 0
+
+
+def get_parser():
+    """
+    gets command line parser, subcommands keep function that runs them in 'run' attribute
+    :return: argparse parser
+    """
+    import argparse
+    # Reporters.report_formats, reporters are imported only by subcommands that write reports
+    report_formats = ['text', 'ndjson', 'sarif', 'junit']
+    parser = argparse.ArgumentParser(prog="IniChecker.py", description="checks lightsaber ini files")
+    parser.add_argument('--version', action='version', version="%(prog)s " + version)
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    command = subparsers.add_parser('check', help="check ini files of any type")
+    command.add_argument('filenames', nargs='+')
+    command.add_argument('--leds', type=int, default=Defaults.blade_leds, help="number of leds in blade (for profiles)")
+    command.add_argument('--auxleds', type=int, default=Defaults.aux_leds,
+                         help="number of aux leds (for aux leds effects)")
+    command.set_defaults(run=run_check)
+
+    command = subparsers.add_parser('project', help="check all files of project directory")
+    command.add_argument('directory')
+    command.add_argument('--board', default="", help="hardware capability file")
+    command.set_defaults(run=run_project)
+
+    command = subparsers.add_parser('batch', help="check many files and directories with report")
+    command.add_argument('paths', nargs='+')
+    command.add_argument('--format', default="text", choices=report_formats, help="report format")
+    command.add_argument('--output', default="", help="report file (stdout if absent)")
+    command.add_argument('--board', default="", help="hardware capability file")
+    command.add_argument('--rules', default="", help="rules configuration file")
+    command.add_argument('--compact', action='store_true', help="use compact in-memory model")
+    command.add_argument('--cache', default="", help="parsed files cache directory")
+    command.add_argument('--history', default="", help="history database (results are added to it)")
+    command.add_argument('--jobs', type=int, default=0,
+                         help="check files in this number of isolated worker processes, largest first")
+    command.add_argument('--timeout', type=float, default=Defaults.timeout,
+                         help="time limit for file in seconds (with --jobs)")
+    command.add_argument('--memory', type=int, default=0, help="memory limit for worker in MiB (with --jobs)")
+    command.set_defaults(run=run_batch)
+
+    command = subparsers.add_parser('git', help="check files changed in git repository")
+    command.add_argument('revisions', nargs='*')
+    command.add_argument('--cached', action='store_true', help="check files changed in index (pre-commit hook)")
+    command.add_argument('--board', default="", help="hardware capability file")
+    command.add_argument('--jobs', type=int, default=None, help="number of parallel processes")
+    command.add_argument('--format', default="text", choices=report_formats, help="report format")
+    command.add_argument('--output', default="", help="report file (stdout if absent)")
+    command.add_argument('--rules', default="", help="rules configuration file")
+    command.add_argument('--history', default="", help="history database (results are added to it)")
+    command.set_defaults(run=run_git)
+
+    command = subparsers.add_parser('queue', help="check files on several machines through shared job directory")
+    command.add_argument('action', choices=['create', 'worker', 'merge', 'run'])
+    command.add_argument('job', help="job directory on shared filesystem")
+    command.add_argument('paths', nargs='*', help="ini files or project directories (for create and run)")
+    command.add_argument('--rules', default="", help="rules configuration file")
+    command.add_argument('--board', default="", help="hardware capability file")
+    command.add_argument('--compact', action='store_true', help="use compact in-memory model")
+    command.add_argument('--cache', default="", help="parsed files cache directory")
+    command.add_argument('--workers', type=int, default=2, help="number of local workers (for run)")
+    command.add_argument('--format', default="text", choices=report_formats, help="report format")
+    command.add_argument('--output', default="", help="report file (stdout if absent)")
+    command.add_argument('--stale', type=float, default=Defaults.stale_time,
+                         help="seconds after which claimed item of dead worker is checked again")
+    command.add_argument('--timeout', type=float, default=0, help="seconds to wait for workers in merge")
+    command.set_defaults(run=run_queue)
+
+    command = subparsers.add_parser('diff', help="compare messages of two versions of file (path or rev:path)")
+    command.add_argument('old')
+    command.add_argument('new')
+    command.add_argument('--leds', type=int, default=Defaults.blade_leds, help="number of leds in blade")
+    command.set_defaults(run=run_diff)
+
+    command = subparsers.add_parser('format', help="format files to canonical form")
+    command.add_argument('filenames', nargs='+')
+    command.add_argument('--check', action='store_true', help="only check that files are formatted")
+    command.add_argument('--write', action='store_true', help="rewrite files in place")
+    command.add_argument('--hash', action='store_true', help="print sha256 hash of canonical text")
+    command.set_defaults(run=run_format)
+
+    command = subparsers.add_parser('fix', help="fix mechanically fixable errors keeping comments")
+    command.add_argument('paths', nargs='+', help="ini files or directories")
+    command.add_argument('--write', action='store_true', help="rewrite files (fixes are only shown if absent)")
+    command.add_argument('--leds', type=int, default=Defaults.blade_leds, help="number of leds in blade")
+    command.add_argument('--auxleds', type=int, default=Defaults.aux_leds, help="number of aux leds")
+    command.set_defaults(run=run_fix)
+
+    command = subparsers.add_parser('stream', help="check big aux leds file sequencer by sequencer")
+    command.add_argument('filename')
+    command.add_argument('--auxleds', type=int, default=Defaults.aux_leds, help="number of aux leds")
+    command.add_argument('--usage', action='store_true', help="print leds usage report")
+    command.set_defaults(run=run_stream)
+
+    command = subparsers.add_parser('boards', help="check files against several hardware boards")
+    command.add_argument('filenames', nargs='+')
+    command.add_argument('--boards', nargs='+', required=True, help="hardware capability files")
+    command.set_defaults(run=run_boards)
+
+    command = subparsers.add_parser('history', help="query history database of checking results")
+    command.add_argument('database')
+    command.add_argument('query', choices=['runs', 'top', 'file', 'messages'])
+    command.add_argument('path', nargs='?', default="", help="checked file (for file and messages queries)")
+    command.add_argument('--since', default="", help="count messages of runs since date YYYY-MM-DD (for top)")
+    command.add_argument('--limit', type=int, default=20, help="number of rows")
+    command.add_argument('--run', type=int, default=0, help="run id (for messages, last run if absent)")
+    command.set_defaults(run=run_history)
+
+    command = subparsers.add_parser('rules', help="list rules or show rules configuration")
+    command.add_argument('filename', nargs='?', default="")
+    command.set_defaults(run=run_rules)
+    return parser
+
+
+def main(argv: list) -> int:
+    # version is printed without building parser
+    if argv == ['--version']:
+        print("IniChecker.py " + version)
+        return 0
+    args = get_parser().parse_args(argv)
+    return args.run(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
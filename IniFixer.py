@@ -0,0 +1,396 @@
+"""this module fixes mechanically fixable errors of ini files in one parse and rewrite pass: file is parsed once with
+positions of keys and values, fixes are applied to text as replacements of these parts only, so comments and layout
+are kept; only sections changed by fixes (profiles, aux leds effects or common settings file) are checked again
+Fixes: numbers out of 0...100 range for volume and brightness are clamped, unknown keys close to known key are
+renamed, swapped min and max values are exchanged, Random values are written in one case
+List of functions
+-parse_located(buffer):                   parses ini file and gets positions of keys and values
+-get_fixes(data, spans, file_type):       gets fixes for parsed file
+-apply_fixes(buffer, fixes):              applies fixes to file text
+-update_data(data, fixes):                applies fixes to parsed data
+-check_sections(data, file_type, sections, leds_number, aux_leds_number): checks only changed sections
+-fix_file(filename, write, leds_number, aux_leds_number): fixes one file
+"""
+import os
+import sys
+import difflib
+import argparse
+from MmapLexer import get_lexer, parse_buffer
+from CommonChecks import *
+from IniFormatter import get_canonical_key
+import Defaults
+import CommonChecker
+import ProfileChecker
+import Auxchecker
+
+# keys of settings, parent path -> known keys (profiles paths are relative to profile or template)
+profile_keys = {(): [key.lower() for key in ProfileChecker.effects_keys] + [ProfileChecker.extends_key],
+                ('afterwake',): ['auxledseffect'],
+                ('poweron',): ProfileChecker.on_off_keys,
+                ('poweron', 'blade'): ['speed'],
+                ('poweroff',): ProfileChecker.on_off_keys,
+                ('poweroff', 'blade'): ['speed', 'moveforward'],
+                ('workingmode',): ProfileChecker.workingmode_keys,
+                ('flaming',): ProfileChecker.flaming_keys,
+                ('flickering',): ProfileChecker.flickering_keys,
+                ('blaster',): ProfileChecker.move_keys,
+                ('clash',): ProfileChecker.move_keys,
+                ('stab',): ProfileChecker.move_keys,
+                ('lockup',): ProfileChecker.lockup_keys,
+                ('lockup', 'flicker'): ProfileChecker.lockup_flicker_keys,
+                ('lockup', 'flashes'): ProfileChecker.lockup_flashes_keys,
+                ('blade2',): ProfileChecker.blade2_keys,
+                ('blade2', 'flaming'): ProfileChecker.blade2_flaming_keys,
+                ('blade2', 'flickering'): ProfileChecker.blade2_flickering_keys,
+                ('blade2', 'workingmode'): ['color']}
+# settings in {min: ..., max: ...} format
+min_max_paths = [('flaming', 'size'), ('flaming', 'speed'), ('flaming', 'delay_ms'), ('flickering', 'time'),
+                 ('flickering', 'brightness'), ('lockup', 'flicker', 'time'), ('lockup', 'flicker', 'brightness'),
+                 ('lockup', 'flashes', 'period')]
+min_max_paths += [('blade2',) + path for path in min_max_paths[:5]]
+profile_keys.update({path: ['min', 'max'] for path in min_max_paths})
+common_keys = {(): CommonChecker.common_keys,
+               ('blade',): CommonChecker.blade_keys,
+               ('blade2',): CommonChecker.blade_keys,
+               ('volume',): CommonChecker.volume_keys,
+               ('deadtime',): CommonChecker.deadtime_keys,
+               ('motion',): CommonChecker.motion_keys}
+common_keys.update({('motion', effect): keys for effect, keys in CommonChecker.motion_effects_keys.items()})
+aux_keys = {('*', '#'): ['config', 'sequence'],
+            ('*', '#', 'sequence', '#'): Auxchecker.step_keys,
+            ('*', '#', 'sequence', '#', 'repeat'): ['startingfrom', 'count']}
+known_keys = {'profiles': profile_keys, 'common': common_keys, 'aux': aux_keys}
+# value path -> (min, max) for numbers that are clamped
+brightness_ranges = {path + ('brightness', key): (0, 100) for path in [('flickering',), ('lockup', 'flicker'),
+                                                                      ('blade2', 'flickering')]
+                     for key in ['min', 'max']}
+volume_ranges = {('volume', key): (0, 100) for key in CommonChecker.volume_keys}
+aux_ranges = {('*', '#', 'sequence', '#', 'brightness', '#'): (0, 100)}
+clamp_ranges = {'profiles': brightness_ranges, 'common': volume_ranges, 'aux': aux_ranges}
+# similarity of unknown key and known key (difflib ratio) for renaming
+key_cutoff = 0.8
+random_value = 'Random'
+
+
+def skip_commas(lexer):
+    while lexer.token[0] == ',':
+        lexer.next()
+
+
+def parse_located_value(lexer, path: tuple, spans: dict) -> (object, int, int):
+    """
+    parses value and gets its position
+    :return: value, start and end offsets
+    """
+    kind, value, start = lexer.token
+    if kind == '{':
+        lexer.next()
+        return parse_located_pairs(lexer, path, spans, '}'), start, lexer.position
+    if kind == '[':
+        lexer.next()
+        items = []
+        skip_commas(lexer)
+        while lexer.token[0] != ']':
+            item, item_start, item_end = parse_located_value(lexer, path + (len(items),), spans)
+            spans[path + (len(items),)] = (item_start, item_start, item_start, item_end)
+            items.append(item)
+            skip_commas(lexer)
+        end = lexer.position
+        lexer.next()
+        return items, start, end
+    end = lexer.position
+    lexer.next()
+    return value, start, end
+
+
+def parse_located_pairs(lexer, path: tuple, spans: dict, end: str) -> dict:
+    """
+    parses key: value pairs and gets their positions
+    """
+    pairs = []
+    skip_commas(lexer)
+    while lexer.token[0] not in (end, 'end'):
+        key, key_start, key_end = lexer.token[1], lexer.token[2], lexer.position
+        lexer.next()
+        lexer.next()
+        value, value_start, value_end = parse_located_value(lexer, path + (key,), spans)
+        spans[path + (key,)] = (key_start, key_end, value_start, value_end)
+        pairs.append((key, value))
+        skip_commas(lexer)
+    if end != 'end':
+        lexer.next()
+    return dict(pairs)
+
+
+def parse_located(buffer: bytes) -> (dict, dict, str):
+    """
+    parses ini file and gets positions of all keys and values
+    :param buffer: ini file text in bytes
+    :return: data or None, dict path -> (key start, key end, value start, value end), error message or empty string
+             (path is tuple of keys and list indices, list items have empty key part)
+    """
+    data, error = parse_buffer(buffer)
+    if data is None:
+        return None, {}, error.replace(" enclosed in double quotes", "")
+    # file is correct, so it is parsed again without syntax checks
+    spans = {}
+    return parse_located_pairs(get_lexer(buffer), (), spans, 'end'), spans, ""
+
+
+def get_relative_path(path: tuple, file_type: str) -> tuple:
+    """
+    gets path for known keys and ranges: paths of profiles settings are relative to profile or template, names of aux
+    effects are replaced by *, list indices by #
+    :return: path or None for profiles and templates themselves
+    """
+    if file_type == "profiles":
+        skip = 2 if path and path[0].lower() == ProfileChecker.templates_key else 1
+        if len(path) < skip:
+            return None
+        path = path[skip:]
+    elif file_type == "aux" and path:
+        path = ('*',) + path[1:]
+    return tuple('#' if isinstance(part, int) else part.lower() for part in path)
+
+
+def get_settings_fixes(settings: dict, path: tuple, relative: tuple, spans: dict, file_type: str) -> list:
+    """
+    gets fixes of keys of settings: renamed unknown keys and swapped min and max values
+    """
+    fixes = []
+    known = known_keys[file_type].get(relative)
+    if known:
+        present = [key.lower() for key in settings.keys()]
+        for key in settings.keys():
+            if key.lower() in known:
+                continue
+            matches = difflib.get_close_matches(key.lower(), [k for k in known if k not in present], 1, key_cutoff)
+            if matches:
+                new_key = get_canonical_key(matches[0])
+                start, end = spans[path + (key,)][:2]
+                fixes.append((start, end, new_key, path + (key,), "unknown parameter %s is renamed to %s" %
+                              (key, new_key)))
+                present.append(matches[0])
+    if file_type == "profiles" and relative in min_max_paths:
+        fixes += get_min_max_fixes(settings, path, relative, spans)
+    return fixes
+
+
+def get_min_max_fixes(settings: dict, path: tuple, relative: tuple, spans: dict) -> list:
+    """
+    gets fixes of {min: ..., max: ...} settings: swapped values are exchanged and then clamped, so each value gets
+    one fix at most
+    """
+    fixes = []
+    keys = {key: get_real_key(settings, key) for key in ['min', 'max']}
+    values = {key: settings[real] for key, real in keys.items() if real}
+    if not all(isinstance(value, int) and not isinstance(value, bool) for value in values.values()):
+        return fixes
+    notes = {key: [] for key in values.keys()}
+    fixed = dict(values)
+    if len(values) == 2 and values['min'] > values['max']:
+        fixed = {'min': values['max'], 'max': values['min']}
+        notes['min'].append("min and max are swapped")
+    for key, value in fixed.items():
+        limits = clamp_ranges['profiles'].get(relative + (key,))
+        if limits and not limits[0] <= value <= limits[1]:
+            fixed[key] = min(max(value, limits[0]), limits[1])
+            notes[key].append("%s is out of %i...%i, set to %i" % (value, *limits, fixed[key]))
+    for key, value in fixed.items():
+        if value != values[key]:
+            start, end = spans[path + (keys[key],)][2:]
+            fixes.append((start, end, str(value), path + (keys[key],), ", ".join(notes[key])))
+    return fixes
+
+
+def get_fixes(data: object, spans: dict, file_type: str, path: tuple = ()) -> list:
+    """
+    gets fixes for parsed file
+    :param data: parsed data (or its part)
+    :param spans: positions from parse_located
+    :param file_type: common, profiles or aux
+    :param path: path of data part
+    :return: list of fixes (start, end, new text, path, description), description is empty for fixes that are
+             parts of other fix
+    """
+    fixes = []
+    relative = get_relative_path(path, file_type)
+    if is_settings(data):
+        if relative is not None:
+            fixes += get_settings_fixes(data, path, relative, spans, file_type)
+        for key, value in data.items():
+            fixes += get_fixes(value, spans, file_type, path + (key,))
+    elif is_list(data):
+        for i, value in enumerate(data):
+            fixes += get_fixes(value, spans, file_type, path + (i,))
+    elif relative:
+        start, end = spans[path][2:]
+        # numbers of min and max settings are clamped with swap fix
+        limits = None if file_type == "profiles" and relative[:-1] in min_max_paths else \
+            clamp_ranges[file_type].get(relative)
+        if limits and isinstance(data, (int, float)) and not isinstance(data, bool) and \
+                not limits[0] <= data <= limits[1]:
+            value = min(max(data, limits[0]), limits[1])
+            fixes.append((start, end, str(value), path, "%s is out of %i...%i, set to %i" % (data, *limits, value)))
+        is_color = relative[-1] == 'color' or relative[-2:] == ('colors', '#')
+        if is_color and isinstance(data, str) and data.lower() == random_value.lower() and data != random_value:
+            fixes.append((start, end, random_value, path, "%s is written as %s" % (data, random_value)))
+    return fixes
+
+
+def is_rename(fix: tuple) -> bool:
+    """
+    checks if fix renames key
+    """
+    return fix[4].startswith("unknown parameter")
+
+
+def apply_fixes(buffer: bytes, fixes: list) -> bytes:
+    """
+    applies fixes to file text, other text (comments, spacing) is not changed
+    :param buffer: ini file text in bytes
+    :param fixes: list from get_fixes
+    :return: fixed text
+    :raises ValueError: if parts of text of fixes overlap
+    """
+    parts = []
+    position = 0
+    for start, end, text, path, description in sorted(fixes):
+        if start < position:
+            raise ValueError("fixes of %s overlap" % " ".join(str(part) for part in path))
+        parts += [buffer[position:start], text.encode('utf-8')]
+        position = end
+    parts.append(buffer[position:])
+    return b"".join(parts)
+
+
+def update_data(data: dict, fixes: list):
+    """
+    applies fixes to parsed data (renamed keys keep their places)
+    :param data: parsed data
+    :param fixes: list from get_fixes
+    """
+    # keys are renamed after values are changed and inner keys before outer ones, because values are found by old keys
+    for start, end, text, path, description in sorted(fixes, key=lambda fix: (is_rename(fix), -len(fix[3]))):
+        parent = data
+        for part in path[:-1]:
+            parent = parent[part]
+        if is_rename((start, end, text, path, description)):
+            items = [(text if key == path[-1] else key, value) for key, value in parent.items()]
+            parent.clear()
+            parent.update(items)
+        else:
+            value = parent[path[-1]]
+            parent[path[-1]] = text if isinstance(value, str) else type(value)(float(text))
+
+
+def check_sections(data: dict, file_type: str, sections: list, leds_number: int,
+                   aux_leds_number: int = Auxchecker.leds_number) -> list:
+    """
+    checks only sections changed by fixes
+    :param data: fixed data
+    :param file_type: common, profiles or aux
+    :param sections: names of changed top level keys (profiles, Templates, aux leds effects)
+    :param leds_number: number of leds in blade
+    :param aux_leds_number: number of aux leds
+    :return: list of messages
+    """
+    if file_type == "common":
+        errors = {err: "" for err in CommonChecker.common_keys_cap}
+        errors_motion = {err: "" for err in CommonChecker.motion_keys_cap}
+        error = CommonChecker.check_common(data, errors, errors_motion)
+        CommonChecker.check_common_limits(data, errors)
+        return CommonChecker.get_messages(error, errors, errors_motion)
+    if file_type == "profiles":
+        templates = get_real_key(data, ProfileChecker.templates_key)
+        if templates in sections:
+            return ProfileChecker.check_profiles(data, leds_number)
+        # profiles that extend templates are checked with templates
+        changed = {name: data[name] for name in sections}
+        if templates and any(is_settings(value) and get_value(value, ProfileChecker.extends_key)
+                             for value in changed.values()):
+            changed[templates] = data[templates]
+        return ProfileChecker.check_profiles(changed, leds_number)
+    messages = []
+    for effect in sections:
+        messages += Auxchecker.check_effect(data, effect) + Auxchecker.check_effect_leds(data, effect, aux_leds_number)
+    return messages
+
+
+def fix_file(filename: str, write: bool = False, leds_number: int = Defaults.blade_leds,
+             aux_leds_number: int = Auxchecker.leds_number) -> (list, list, str):
+    """
+    fixes ini file
+    :param filename: ini file name
+    :param write: rewrite file (only fixes are got if False)
+    :param leds_number: number of leds in blade
+    :param aux_leds_number: number of aux leds
+    :return: list of fixes descriptions, messages of changed sections after fixes, error message or empty string
+    """
+    try:
+        with open(filename, 'rb') as f:
+            buffer = f.read()
+    except FileNotFoundError:
+        return [], [], "File %s not found" % filename
+    data, spans, error = parse_located(buffer)
+    if error:
+        return [], [], error
+    file_type = get_file_type(data)
+    if not file_type:
+        return [], [], "Error: unknown file type"
+    fixes = get_fixes(data, spans, file_type)
+    if not fixes:
+        return [], [], ""
+    update_data(data, fixes)
+    # fixed text must give the same data that is checked again
+    try:
+        fixed = apply_fixes(buffer, fixes)
+    except ValueError as e:
+        return [], [], "Error: %s, file is not changed" % e
+    fixed_data, error = parse_buffer(fixed)
+    if error or fixed_data != data:
+        return [], [], "Error: fixes give incorrect file, file is not changed"
+    if write:
+        temp = filename + ".fix.tmp"
+        with open(temp, 'wb') as f:
+            f.write(fixed)
+        os.replace(temp, filename)
+    sections = []
+    for fix in fixes:
+        if fix[3][0] not in sections:
+            sections.append(fix[3][0])
+    # list items are numbered from 1 like in checkers messages
+    descriptions = ["%s: %s" % (" ".join("#%i" % (part + 1) if isinstance(part, int) else part for part in path),
+                                description)
+                    for start, end, text, path, description in fixes if description]
+    return descriptions, check_sections(data, file_type, sections, leds_number, aux_leds_number), ""
+
+
+def main(paths: list, write: bool = False, leds_number: int = Defaults.blade_leds,
+         aux_leds_number: int = Auxchecker.leds_number) -> int:
+    from BatchChecker import get_batch
+    result = 0
+    for filenames in get_batch(paths).values():
+        for filename in filenames:
+            descriptions, messages, error = fix_file(filename, write, leds_number, aux_leds_number)
+            if error:
+                print("%s: %s" % (filename, error))
+                result = 2
+                continue
+            for description in descriptions:
+                print("%s: %s %s" % (filename, "fixed" if write else "can fix", description))
+            for message in messages:
+                print("%s: %s" % (filename, message))
+            if descriptions and not write:
+                result = max(result, 1)
+    return result
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="fixes mechanically fixable errors of ini files keeping comments")
+    parser.add_argument('paths', nargs='+', help="ini files or directories")
+    parser.add_argument('--write', action='store_true', help="rewrite files (fixes are only shown if absent)")
+    parser.add_argument('--leds', type=int, default=Defaults.blade_leds, help="number of leds in blade")
+    parser.add_argument('--auxleds', type=int, default=Auxchecker.leds_number, help="number of aux leds")
+    args = parser.parse_args()
+    sys.exit(main(args.paths, args.write, args.leds, args.auxleds))
@@ -0,0 +1,176 @@
+"""this module formats ini files to canonical form: known keys and values are written in one case, settings keys are
+sorted, comments and extra commas are removed, spacing is the same for all files; canonical text can be used as cache
+key or for diffs
+List of functions
+-get_canonical_key(key):             gets canonical spelling of known key
+-iter_canonical(data, file_type):    yields canonical text of parsed ini file by parts
+-get_canonical(text):                gets canonical text of ini file text
+-get_canonical_hash(text):           gets sha256 hash of canonical text
+"""
+import sys
+import hashlib
+import argparse
+from IniToJson import get_json
+from CommonChecks import get_file_type
+
+known_keys = ['Blade', 'Blade2', 'Volume', 'PowerOffTimeout', 'Deadtime', 'ClashFlashDuration', 'Motion',
+              'BandNumber', 'PixPerBand', 'Common', 'CoarseLow', 'CoarseMid', 'CoarseHigh',
+              'AfterPowerOn', 'AfterBlaster', 'AfterClash', 'Swing', 'Spin', 'Clash', 'Stab', 'Screw',
+              'HighW', 'WPercent', 'Circle', 'CircleW', 'Enabled', 'Counter', 'W', 'WLow', 'HighA', 'Length',
+              'HitLevel', 'LowW', 'Percent',
+              'PowerOn', 'AfterWake', 'PowerOff', 'Flaming', 'Lockup', 'Blaster', 'WorkingMode', 'Flickering',
+              'Color', 'FlickeringAlways', 'AuxLedsEffect', 'Speed', 'MoveForward', 'Size', 'Delay_ms', 'Colors',
+              'AlwaysOn', 'Time', 'Brightness', 'Duration_ms', 'SizePix', 'Flicker', 'Flashes', 'Period',
+              'DelayBeforeOn', 'Min', 'Max', 'Extends',
+              'Config', 'Sequence', 'Repeat', 'Wait', 'Smooth', 'Name', 'StartingFrom', 'Count']
+canonical_keys = {key.lower(): key for key in known_keys}
+known_values = ['Random', 'CopyRed', 'CopyGreen', 'CopyBlue', 'forever']
+canonical_values = {value.lower(): value for value in known_values}
+# keys with user defined names as values (they are kept as is)
+name_keys = ['auxledseffect', 'name', 'startingfrom']
+indent = "  "
+
+
+def get_canonical_key(key: str) -> str:
+    """
+    gets canonical spelling of key (unknown keys like profile names are kept as is)
+    :param key: key
+    :return: canonical key
+    """
+    return canonical_keys.get(key.lower(), key)
+
+
+def get_canonical_value(value: object, key: str) -> str:
+    """
+    gets canonical text of scalar value
+    :param value: number or string
+    :param key: lowercase key of value
+    :return: text
+    """
+    if isinstance(value, bool):
+        return str(int(value))
+    if isinstance(value, str) and key not in name_keys:
+        lower = value.lower()
+        if lower in canonical_values:
+            return canonical_values[lower]
+        if lower.startswith('led') and lower[3:].isdigit():
+            return "Led%i" % int(lower[3:])
+    return str(value)
+
+
+def iter_value(value: object, key: str, level: int):
+    """
+    yields canonical text of value by parts
+    :param value: dict, list or scalar value
+    :param key: lowercase key of value
+    :param level: indentation level
+    """
+    if isinstance(value, dict):
+        if not value:
+            yield "{}"
+            return
+        yield "{\n"
+        items = sorted(value.items(), key=lambda item: get_canonical_key(item[0]).lower())
+        for i, (item_key, item_value) in enumerate(items):
+            yield indent * (level + 1) + get_canonical_key(item_key) + ": "
+            yield from iter_value(item_value, item_key.lower(), level + 1)
+            yield ",\n" if i < len(items) - 1 else "\n"
+        yield indent * level + "}"
+    elif isinstance(value, list):
+        if all(not isinstance(item, (dict, list)) for item in value):
+            yield "[" + ", ".join(get_canonical_value(item, key) for item in value) + "]"
+            return
+        yield "[\n"
+        for i, item in enumerate(value):
+            yield indent * (level + 1)
+            yield from iter_value(item, key, level + 1)
+            yield ",\n" if i < len(value) - 1 else "\n"
+        yield indent * level + "]"
+    else:
+        yield get_canonical_value(value, key)
+
+
+def iter_canonical(data: dict, file_type: str = ""):
+    """
+    yields canonical text of parsed ini file by parts; top level keys are sorted for common settings and aux leds
+    files, profiles keep their order (order of profiles is order of profiles on saber)
+    :param data: dict with ini data
+    :param file_type: common, profiles or aux
+    """
+    items = list(data.items())
+    if file_type != "profiles":
+        items.sort(key=lambda item: get_canonical_key(item[0]).lower())
+    for i, (key, value) in enumerate(items):
+        yield get_canonical_key(key) + ": "
+        yield from iter_value(value, key.lower(), 0)
+        yield ",\n" if i < len(items) - 1 else "\n"
+
+
+def get_canonical(text: str) -> (str, str):
+    """
+    gets canonical text of ini file
+    :param text: ini file text
+    :return: canonical text or None, error message or empty string
+    """
+    data, error = get_json(text)
+    if data is None:
+        return None, error.replace(" enclosed in double quotes", "")
+    return "".join(iter_canonical(data, get_file_type(data))), ""
+
+
+def get_canonical_hash(text: str) -> (str, str):
+    """
+    gets sha256 hash of canonical text, equal settings written differently have the same hash
+    :param text: ini file text
+    :return: hex digest or None, error message or empty string
+    """
+    canonical, error = get_canonical(text)
+    if error:
+        return None, error
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest(), ""
+
+
+def main(filenames: list, check: bool = False, write: bool = False, show_hash: bool = False) -> int:
+    result = 0
+    for filename in filenames:
+        try:
+            with open(filename) as f:
+                text = f.read()
+        except FileNotFoundError:
+            print("File %s not found" % filename)
+            result = 2
+            continue
+        data, error = get_json(text)
+        if data is None:
+            print("%s: %s" % (filename, error.replace(" enclosed in double quotes", "")))
+            result = 2
+            continue
+        parts = iter_canonical(data, get_file_type(data))
+        if show_hash:
+            digest = hashlib.sha256()
+            for part in parts:
+                digest.update(part.encode('utf-8'))
+            print("%s  %s" % (digest.hexdigest(), filename))
+        elif check:
+            if "".join(parts) != text:
+                print("%s is not formatted" % filename)
+                result = max(result, 1)
+        elif write:
+            canonical = "".join(parts)
+            if canonical != text:
+                with open(filename, 'w') as f:
+                    f.write(canonical)
+        else:
+            for part in parts:
+                sys.stdout.write(part)
+    return result
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="formats ini files to canonical form")
+    parser.add_argument('filenames', nargs='+')
+    parser.add_argument('--check', action='store_true', help="only check that files are formatted (exit code 1)")
+    parser.add_argument('--write', action='store_true', help="rewrite files in place")
+    parser.add_argument('--hash', action='store_true', help="print sha256 hash of canonical text")
+    args = parser.parse_args()
+    sys.exit(main(args.filenames, args.check, args.write, args.hash))
@@ -45,21 +45,63 @@ def prepare_text_for_json(text: str) -> str:
     # remove tabulation
     text = text.replace("\t", "")
     # remove extra commas at },} and like this
+    return remove_extra_commas(text)
+
+
+def iter_prepared_lines(lines):
+    """
+    removes comments and encloses keys and values in quotes line by line (like remove_comments and
+    prepare_text_for_json but without reading whole file), extra commas are not removed
+    :param lines: iterable with lines of ini file (for example file object)
+    :return: iterator of (line number, prepared line)
+    """
+    in_comment = False
+    for number, line in enumerate(lines, 1):
+        parts = []
+        while line:
+            if in_comment:
+                end = line.find('*/')
+                if end == -1:
+                    break
+                line = line[end + 2:]
+                in_comment = False
+                continue
+            start = line.find('/*')
+            comment = line.find('//')
+            if comment != -1 and (start == -1 or comment < start):
+                parts.append(line[:comment] + '\n')
+                break
+            if start == -1:
+                parts.append(line)
+                break
+            parts.append(line[:start])
+            line = line[start + 2:]
+            in_comment = True
+        yield number, re.sub(r'([A-Za-z]\w*)', r'"\1"', "".join(parts)).replace("\t", "")
+
+
+def remove_extra_commas(text: str) -> str:
+    """
+    removes extra commas at },} and like this
+    :param text: prepared text
+    :return: text without extra commas
+    """
     while re.findall(r",(\s*[\}\]])", text):
         text = re.sub(r",(\s*[\}\]])", r'\1', text)
     return text
 
 
-def get_json(text: str) -> (dict, str):
+def get_json(text: str, object_pairs_hook=None) -> (dict, str):
     """
     funtions converts prepared text to json if possible
     :param text: ini file text
+    :param object_pairs_hook: function that builds objects from key-value pairs (dicts are built if None)
     :return: json (as dictionary) (or None), empty string or error text
     """
     text, missed = remove_comments(text)
     text = prepare_text_for_json(text)
     try:
-        data = json.loads(text)
+        data = json.loads(text, object_pairs_hook=object_pairs_hook)
         return data, ""
     except json.decoder.JSONDecodeError:
         e = sys.exc_info()
@@ -70,3 +112,22 @@ def get_json(text: str) -> (dict, str):
             err += ", ']' or '}'"
         err = "Line %i or %i: %s" % (line-1, line, err)
         return None, err
+
+
+def load_json(filename: str) -> (dict, str):
+    """
+    reads ini file and converts it to json
+    :param filename: ini file name
+    :return: json (as dictionary) (or None), empty string or error text
+    """
+    try:
+        with open(filename) as f:
+            text = f.read()
+    except FileNotFoundError:
+        return None, "File %s not found" % filename
+    except OSError as e:
+        return None, "File %s can't be read: %s" % (filename, e.strerror)
+    except UnicodeDecodeError:
+        return None, "File %s has unsupported encoding" % filename
+    data, error = get_json(text)
+    return data, error.replace(" enclosed in double quotes", "")
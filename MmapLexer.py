@@ -0,0 +1,303 @@
+"""this module parses ini files directly from memory mapped file: tokens are matched in bytes buffer and only names
+and numbers are decoded, so text of file is never copied (IniToJson makes several copies of whole text before json
+parser); parsed data is the same as IniToJson gives, error messages have the same format (Line N or N+1: ...)
+Differences from IniToJson: quoted strings are not allowed, not closed /* comment is an error
+List of functions and classes
+-ParseError:                              parsing error with position in buffer
+-Lexer:                                   gets tokens from buffer
+-get_lexer(buffer):                       gets lexer for whole file
+-parse_buffer(buffer, object_pairs_hook): parses ini file from bytes, memoryview or mmap
+-get_json(text, object_pairs_hook):       parses ini file text (like IniToJson.get_json)
+-load_json(filename, object_pairs_hook):  parses ini file through memory map (like IniToJson.load_json)
+"""
+import re
+import sys
+import mmap
+import argparse
+
+# spaces before token are matched with it
+tokens = re.compile(rb'''
+    [ \t\r\n]*
+    (?:
+    (?P<comment>//[^\n]*)
+  | (?P<block>/\*.*?\*/)
+  | (?P<open>/\*)
+  | (?P<name>[A-Za-z](?:\w|[\x80-\xff])*)
+  | (?P<number>-?(?:0|[1-9][0-9]*)(?:\.[0-9]+)?(?![0-9.]))
+  | (?P<punct>[{}\[\],:])
+  | \Z
+    )
+''', re.VERBOSE | re.DOTALL)
+spaces = re.compile(rb'[ \t\r\n]*')
+block_comments = re.compile(rb'(?:/\*.*?\*/)*', re.DOTALL)
+property_error = "Expecting property name enclosed in double quotes"
+delimiter_error = "Expecting ',' delimiter, ']' or '}'"
+newline_chunk = 1 << 20
+
+
+class ParseError(Exception):
+    """
+    parsing error, position is offset in buffer
+    """
+    def __init__(self, message: str, position: int):
+        super().__init__(message)
+        self.message = message
+        self.position = position
+
+
+class Lexer:
+    """
+    gets tokens from buffer skipping spaces and comments; token is (kind, value, position), kind is name, number,
+    punctuation symbol or 'end'
+    """
+    __slots__ = ('buffer', 'position', 'size', 'token')
+
+    def __init__(self, buffer):
+        self.buffer = buffer
+        self.position = 0
+        self.size = len(buffer)
+        self.token = None
+        self.next()
+
+    def next(self) -> tuple:
+        while self.position < self.size:
+            match = tokens.match(self.buffer, self.position)
+            if not match:
+                # not allowed symbol is reported by parser like unexpected token
+                start = spaces.match(self.buffer, self.position).end()
+                self.token = ('symbol', None, start)
+                self.position = start + 1
+                return self.token
+            kind = match.lastgroup
+            start, self.position = match.start(kind or 0), match.end()
+            if kind in ('comment', 'block') or kind is None:
+                continue
+            if kind == 'open':
+                raise ParseError("Comment started with /* is not closed", start)
+            if kind == 'name':
+                self.token = ('name', sys.intern(match.group(kind).decode('utf-8', 'replace')), start)
+            elif kind == 'number':
+                text = match.group(kind)
+                self.token = ('number', float(text) if b'.' in text else int(text), start)
+            else:
+                self.token = (chr(self.buffer[start]), None, start)
+            return self.token
+        self.token = ('end', None, self.size)
+        return self.token
+
+
+def skip_extra_commas(lexer: Lexer) -> bool:
+    """
+    skips commas before closing bracket (like IniToJson removes extra commas at ,} and ,])
+    :param lexer: lexer with comma as current token
+    :return: True if commas were before closing bracket or end of file (they are skipped), False if comma separates
+             items
+    """
+    start = lexer.position
+    token = lexer.token
+    while lexer.token[0] == ',':
+        lexer.next()
+    if lexer.token[0] in ('}', ']', 'end'):
+        return True
+    # only one comma may separate items, so position is returned to the first comma
+    lexer.position = start
+    lexer.token = token
+    lexer.next()
+    return False
+
+
+def get_extra_data_error(lexer: Lexer) -> ParseError:
+    """
+    gets error for } that closes whole file settings: IniToJson adds } at the end of file, so json parser reports
+    extra data at the next token after it (extra commas are removed)
+    """
+    position = lexer.next()[2]
+    if lexer.token[0] == ',' and skip_extra_commas(lexer):
+        position = lexer.token[2]
+    return ParseError("Extra data", position)
+
+
+def parse_value(lexer: Lexer, object_pairs_hook):
+    """
+    parses value: name, number, list or settings
+    """
+    kind, value, position = lexer.token
+    if kind == ',' and skip_extra_commas(lexer):
+        # extra commas are removed by IniToJson, so error is at closing bracket
+        kind, value, position = lexer.token
+    if kind in ('name', 'number'):
+        lexer.next()
+        return value
+    if kind == '{':
+        lexer.next()
+        return parse_pairs(lexer, object_pairs_hook, '}')
+    if kind == '[':
+        lexer.next()
+        return parse_list(lexer, object_pairs_hook)
+    raise ParseError("Expecting value", position)
+
+
+def parse_list(lexer: Lexer, object_pairs_hook) -> list:
+    """
+    parses list items after [
+    """
+    items = []
+    if lexer.token[0] == ',':
+        position = lexer.token[2]
+        if not skip_extra_commas(lexer):
+            raise ParseError("Expecting value", position)
+    while lexer.token[0] != ']':
+        items.append(parse_value(lexer, object_pairs_hook))
+        kind, value, position = lexer.token
+        if kind == ']':
+            break
+        if kind != ',':
+            raise ParseError(delimiter_error, position)
+        if skip_extra_commas(lexer) and lexer.token[0] != ']':
+            raise ParseError(delimiter_error, lexer.token[2])
+    lexer.next()
+    return items
+
+
+def is_closing(lexer: Lexer, end: str) -> bool:
+    """
+    checks that current token closes settings
+    :param lexer: lexer
+    :param end: closing symbol: } or 'end' for whole file
+    """
+    if lexer.token[0] == 'end' and end == '}':
+        # } added by IniToJson at the end of file closes these settings, so enclosing value can't be closed
+        raise ParseError(delimiter_error, lexer.size)
+    return lexer.token[0] == end
+
+
+def parse_pairs(lexer: Lexer, object_pairs_hook, end: str):
+    """
+    parses key: value pairs after { (or whole file, it is settings without braces)
+    :param lexer: lexer
+    :param object_pairs_hook: function that builds objects from pairs (dicts are built if None)
+    :param end: closing symbol: } or 'end' for whole file
+    """
+    pairs = []
+    if lexer.token[0] == ',':
+        position = lexer.token[2]
+        if not skip_extra_commas(lexer):
+            raise ParseError(property_error, position)
+    if not is_closing(lexer, end):
+        while True:
+            kind, key, position = lexer.token
+            if kind == '}' and end == 'end':
+                raise get_extra_data_error(lexer)
+            if kind != 'name':
+                raise ParseError(property_error, position)
+            kind, value, position = lexer.next()
+            if kind == ',' and skip_extra_commas(lexer):
+                position = lexer.token[2]
+            if kind != ':':
+                raise ParseError("Expecting ':' delimiter", position)
+            lexer.next()
+            pairs.append((key, parse_value(lexer, object_pairs_hook)))
+            if is_closing(lexer, end):
+                break
+            kind, value, position = lexer.token
+            if kind == '}' and end == 'end':
+                raise get_extra_data_error(lexer)
+            if kind != ',':
+                raise ParseError(delimiter_error, position)
+            if skip_extra_commas(lexer):
+                if lexer.token[0] == '}' and end == 'end':
+                    raise get_extra_data_error(lexer)
+                if not is_closing(lexer, end):
+                    raise ParseError(delimiter_error, lexer.token[2])
+                break
+    if end != 'end':
+        lexer.next()
+    return object_pairs_hook(pairs) if object_pairs_hook else dict(pairs)
+
+
+def get_line(buffer, position: int) -> int:
+    """
+    gets line number of position, buffer is read by chunks
+    """
+    line = 1
+    for start in range(0, position, newline_chunk):
+        line += bytes(buffer[start:min(start + newline_chunk, position)]).count(b'\n')
+    return line
+
+
+def get_lexer(buffer) -> Lexer:
+    """
+    gets lexer for whole file
+    :param buffer: bytes, memoryview or mmap with file
+    :return: lexer with first token of file settings
+    """
+    lexer = Lexer(buffer)
+    # IniToJson doesn't add { if file starts with it (only comments may be before it), but always adds } at the
+    # end, so such { opens the same settings as whole file and closing } is extra data
+    start = block_comments.match(buffer).end()
+    if start < len(buffer) and buffer[start] == ord('{'):
+        lexer.position = start + 1
+        lexer.next()
+    return lexer
+
+
+def parse_buffer(buffer, object_pairs_hook=None) -> (dict, str):
+    """
+    parses ini file from buffer
+    :param buffer: bytes, memoryview or mmap with file
+    :param object_pairs_hook: function that builds objects from key-value pairs (dicts are built if None)
+    :return: json (as dictionary) (or None), empty string or error text
+    """
+    try:
+        data = parse_pairs(get_lexer(buffer), object_pairs_hook, 'end')
+    except ParseError as e:
+        line = get_line(buffer, e.position)
+        # IniToJson adds new line after last line and closing } after it
+        if e.position >= len(buffer):
+            line += 1
+        return None, "Line %i or %i: %s" % (line - 1, line, e.message)
+    return data, ""
+
+
+def get_json(text: str, object_pairs_hook=None) -> (dict, str):
+    """
+    parses ini file text
+    :param text: ini file text
+    :param object_pairs_hook: function that builds objects from key-value pairs (dicts are built if None)
+    :return: json (as dictionary) (or None), empty string or error text
+    """
+    return parse_buffer(text.encode('utf-8'), object_pairs_hook)
+
+
+def load_json(filename: str, object_pairs_hook=None) -> (dict, str):
+    """
+    parses ini file through memory map
+    :param filename: ini file name
+    :param object_pairs_hook: function that builds objects from key-value pairs (dicts are built if None)
+    :return: json (as dictionary) (or None), empty string or error text
+    """
+    try:
+        f = open(filename, 'rb')
+    except FileNotFoundError:
+        return None, "File %s not found" % filename
+    except OSError as e:
+        return None, "File %s can't be read: %s" % (filename, e.strerror)
+    with f:
+        try:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # empty file can't be mapped
+            data, error = parse_buffer(b"", object_pairs_hook)
+        else:
+            with buffer:
+                data, error = parse_buffer(buffer, object_pairs_hook)
+    return data, error.replace(" enclosed in double quotes", "")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="parses ini files through memory map")
+    parser.add_argument('filenames', nargs='+')
+    args = parser.parse_args()
+    for name in args.filenames:
+        result, message = load_json(name)
+        print("%s: %s" % (name, message or "ok"))
@@ -0,0 +1,194 @@
+"""this module builds compact in-memory model of parsed ini file for batch checking of very large configs: settings
+dicts are replaced with __slots__ objects sharing index of interned keys, colors and numbers lists are stored in arrays;
+model is built by json parser directly (object_pairs_hook) and is read by checkers like plain dicts and lists
+List of functions and classes
+-Section:                          read only mapping with settings (keys index is shared by sections with the same keys)
+-ColorList:                        read only sequence of colors stored in one flat array
+-get_compact_list(value):          gets array backed list for colors and numbers lists
+-get_compact_value(value):         gets compact value (array backed list or interned string)
+-make_section(pairs):              builds section from parsed pairs (object_pairs_hook for json parser)
+-get_model(text):                  parses ini file text to compact model
+-to_model(data):                   converts parsed dicts and lists (for example from cache) to compact model
+-load_model(filename):             reads ini file and parses it to compact model
+"""
+import sys
+from array import array
+from collections.abc import Mapping, Sequence
+from IniToJson import get_json
+
+# bigger sections (for example top level dict with thousands of profiles) are kept as dicts
+max_section_size = 32
+# keys tuple -> dict key -> position, one index dict is shared by all sections with the same keys; index is cleared
+# when it has max_key_indexes keys tuples, so it doesn't grow in long running processes (sections keep their dicts)
+key_indexes = {}
+max_key_indexes = 4096
+
+
+class Section(Mapping):
+    """
+    read only settings mapping: index of keys (interned key -> position) is shared by all sections with the same keys,
+    values are stored in tuple
+    """
+    __slots__ = ('_index', '_values')
+
+    def __init__(self, index: dict, values: tuple):
+        self._index = index
+        self._values = values
+
+    def __getitem__(self, key: str) -> object:
+        return self._values[self._index[key]]
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._index
+
+    def __iter__(self):
+        return iter(self._index)
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def keys(self):
+        return self._index.keys()
+
+    def values(self):
+        return self._values
+
+    def items(self):
+        return zip(self._index, self._values)
+
+    def __repr__(self) -> str:
+        return repr(dict(self.items()))
+
+
+class ColorList(Sequence):
+    """
+    read only list of colors, all colors are stored in one flat array of bytes
+    """
+    __slots__ = ('_data',)
+
+    def __init__(self, data: array):
+        self._data = data
+
+    def __getitem__(self, i: int) -> array:
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if i < 0 or i >= len(self):
+            raise IndexError("color index out of range")
+        return self._data[i * 3: i * 3 + 3]
+
+    def __len__(self) -> int:
+        return len(self._data) // 3
+
+    def __repr__(self) -> str:
+        return repr([list(color) for color in self])
+
+
+def is_number(value: object, min_value: int, max_value: int) -> bool:
+    """
+    checks if value is integer number (not bool) in range
+    :param value: value to check
+    :param min_value: min value
+    :param max_value: max value
+    :return: True if value is number in range
+    """
+    return isinstance(value, int) and not isinstance(value, bool) and min_value <= value <= max_value
+
+
+def get_compact_list(value: list) -> object:
+    """
+    gets array backed list: list of three bytes (color) or of numbers becomes array, list of colors becomes
+    ColorList; other lists (and lists with incorrect values, so checkers can report them) are kept as is
+    :param value: list from parser
+    :return: array, ColorList or value
+    """
+    if not value:
+        return value
+    if len(value) == 3 and all(is_number(part, 0, 255) for part in value):
+        return array('B', value)
+    if all(is_number(part, -2 ** 31, 2 ** 31 - 1) for part in value):
+        return array('i', value)
+    if all(isinstance(color, array) and color.typecode == 'B' and len(color) == 3 for color in value):
+        data = array('B')
+        for color in value:
+            data.extend(color)
+        return ColorList(data)
+    return value
+
+
+def get_compact_value(value: object) -> object:
+    """
+    gets compact value: lists become arrays if possible, strings (effect names, Random...) are interned
+    :param value: value from parser
+    :return: compact value
+    """
+    if isinstance(value, list):
+        # lists are not passed to object_pairs_hook, so nested lists (colors of Colors) are converted here
+        return get_compact_list([get_compact_value(item) for item in value])
+    if isinstance(value, str):
+        return sys.intern(value)
+    return value
+
+
+def make_section(pairs: list) -> object:
+    """
+    builds section from key-value pairs, is used as object_pairs_hook of json parser (nested objects are built first,
+    so lists of colors contain already converted colors)
+    :param pairs: list of (key, value)
+    :return: Section or dict for big sections
+    """
+    data = dict(pairs)
+    if len(data) > max_section_size:
+        return {sys.intern(key): get_compact_value(value) for key, value in data.items()}
+    keys = tuple(data.keys())
+    index = key_indexes.get(keys)
+    if index is None:
+        if len(key_indexes) >= max_key_indexes:
+            key_indexes.clear()
+        index = key_indexes[keys] = {sys.intern(key): i for i, key in enumerate(keys)}
+    return Section(index, tuple(get_compact_value(value) for value in data.values()))
+
+
+def get_model(text: str) -> (object, str):
+    """
+    parses ini file text to compact model
+    :param text: ini file text
+    :return: model (dict or Section) or None, empty string or error text
+    """
+    data, error = get_json(text, make_section)
+    if isinstance(data, list):
+        data = get_compact_value(data)
+    return data, error
+
+
+def to_model(data: object) -> object:
+    """
+    converts parsed tree of dicts and lists to compact model
+    :param data: parsed data
+    :return: compact model
+    """
+    if isinstance(data, dict):
+        return make_section([(key, to_model(value)) for key, value in data.items()])
+    if isinstance(data, list):
+        return get_compact_list([to_model(value) for value in data])
+    return data
+
+
+def load_model(filename: str) -> (object, str):
+    """
+    reads ini file and parses it to compact model
+    :param filename: ini file name
+    :return: model (dict or Section) or None, empty string or error text
+    """
+    try:
+        with open(filename) as f:
+            text = f.read()
+    except FileNotFoundError:
+        return None, "File %s not found" % filename
+    except OSError as e:
+        return None, "File %s can't be read: %s" % (filename, e.strerror)
+    except UnicodeDecodeError:
+        return None, "File %s has unsupported encoding" % filename
+    data, error = get_model(text)
+    return data, error.replace(" enclosed in double quotes", "")
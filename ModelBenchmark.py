@@ -0,0 +1,73 @@
+"""this module measures memory used by parsed profiles file: plain dicts from get_json against compact model from
+get_model; profiles file with given number of profiles is generated from one profile template
+List of functions
+-get_profiles_text(number):          generates profiles file text
+-measure(parse, text):               gets memory held by parsed tree and parsing time
+"""
+import time
+import argparse
+import tracemalloc
+from IniToJson import get_json
+from Model import get_model
+
+profile_template = """Profile%i: {
+  AfterWake: {AuxLedsEffect: Blink},
+  PowerOn: {Blade: {Speed: 100}, AuxLedsEffect: PowerOn},
+  WorkingMode: {Color: [0, 0, %i], Flaming: 1, FlickeringAlways: 1, AuxLedsEffect: Blink},
+  PowerOff: {Blade: {Speed: 100, MoveForward: 1}},
+  Flaming: {Size: {Min: 10, Max: 100}, Speed: {Min: 10, Max: 50}, Delay_ms: {Min: 50, Max: 200},
+            Colors: [[255, 0, 0], [0, 255, 0], [255, 128, 0]]},
+  Flickering: {Time: {Min: 50, Max: 100}, Brightness: {Min: 50, Max: 100}},
+  Blaster: {Color: [255, 255, 255], Duration_ms: 200, SizePix: 10},
+  Clash: {Color: Random, Duration_ms: 200, SizePix: 20},
+  Stab: {Color: [255, 0, 0], Duration_ms: 200, SizePix: 10},
+  Lockup: {Flicker: {Color: [255, 255, 0], Time: {Min: 20, Max: 40}, Brightness: {Min: 30, Max: 100}},
+           Flashes: {Period: {Min: 50, Max: 100}, Color: [255, 255, 255], Duration_ms: 30, SizePix: 5}},
+  Blade2: {DelayBeforeOn: 10, WorkingMode: {Color: [0, 255, 0]}}
+}"""
+
+
+def get_profiles_text(number: int) -> str:
+    """
+    generates profiles file text
+    :param number: number of profiles
+    :return: ini file text
+    """
+    return ",\n".join(profile_template % (i, i % 256) for i in range(number)) + "\n"
+
+
+def measure(parse, text: str) -> (int, float):
+    """
+    parses text and measures memory held by parsed tree
+    :param parse: get_json or get_model
+    :param text: ini file text
+    :return: memory in bytes, parsing time in seconds
+    """
+    tracemalloc.start()
+    start = time.perf_counter()
+    data, error = parse(text)
+    elapsed = time.perf_counter() - start
+    if error:
+        tracemalloc.stop()
+        raise ValueError(error)
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del data
+    return memory, elapsed
+
+
+def main(number: int):
+    text = get_profiles_text(number)
+    # first run fills shared keys indexes, so they are not counted for model
+    get_model(text)
+    results = [("dicts", measure(get_json, text)), ("compact model", measure(get_model, text))]
+    for name, (memory, elapsed) in results:
+        print("%-14s %10i bytes  %7i bytes per profile  %.3f s" % (name, memory, memory // number, elapsed))
+    print("memory reduction: %.1f%%" % (100 - 100 * results[1][1][0] / results[0][1][0]))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="measures memory of parsed profiles: dicts against compact model")
+    parser.add_argument('--profiles', type=int, default=1000, help="number of generated profiles")
+    args = parser.parse_args()
+    main(args.profiles)
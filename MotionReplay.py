@@ -0,0 +1,225 @@
+"""this module replays recorded gyro/accelerometer traces through motion detectors of common ini file (Motion section)
+List of functions
+-load_trace(filename):                   loads trace from csv or npy file (columns: t_ms, gx, gy, gz, ax, ay, az)
+-get_motion_params(motion_list):         gets arrays of motion thresholds for list of Motion settings (one row per set)
+-replay(trace, motion_list):             evaluates all detectors for all parameter sets in one pass over trace
+-get_report(results, trace):             gets text report with trigger counts and timestamps
+
+Detectors are approximate models of firmware detectors (w is gyro, a is accelerometer, x is blade axis):
+-Swing:  rotation across blade axis w_side > HighW and w_side >= WPercent% of full w
+-Circle: rotation angle across blade axis reaches Circle degrees while w_side > CircleW (Swing Circle/CircleW)
+-Spin:   rotation angle reaches Counter * Circle degrees while w_side > WLow and w_side exceeded W at least once
+-Clash:  a > HighA, w > LowW and lowest acceleration component <= HitLevel; next clash not earlier then Length ms
+-Stab:   a > HighA, w < LowW, ax <= HitLevel and |ax| >= Percent% of a; next stab not earlier then Length ms
+-Screw:  rotation around blade axis |gx| > HighW while w_side < LowW
+Each detector triggers on rising edge of its condition.
+"""
+import sys
+import numpy as np
+from IniToJson import get_json
+from CommonChecks import get_real_key, get_value
+
+trace_columns = ['t', 'gx', 'gy', 'gz', 'ax', 'ay', 'az']
+motion_params = {'swing': ['highw', 'wpercent', 'circle', 'circlew'],
+                 'spin': ['enabled', 'counter', 'w', 'circle', 'wlow'],
+                 'clash': ['higha', 'length', 'hitlevel', 'loww'],
+                 'stab': ['enabled', 'higha', 'loww', 'hitlevel', 'length', 'percent'],
+                 'screw': ['enabled', 'loww', 'highw']}
+detectors = ['Swing', 'Circle', 'Spin', 'Clash', 'Stab', 'Screw']
+
+
+def load_trace(filename: str) -> np.ndarray:
+    """
+    loads trace from .npy file or .csv file (header line is optional)
+    :param filename: trace file name
+    :return: float array (samples, 7) with columns t_ms, gx, gy, gz, ax, ay, az
+    """
+    if filename.lower().endswith('.npy'):
+        trace = np.load(filename)
+    else:
+        with open(filename) as f:
+            first = f.readline()
+        # first line is header if it is not numbers
+        try:
+            [float(value) for value in first.split(',')]
+            skip = 0
+        except ValueError:
+            skip = 1
+        trace = np.loadtxt(filename, delimiter=',', skiprows=skip, ndmin=2)
+    trace = np.asarray(trace, dtype=np.float64)
+    if trace.ndim != 2 or trace.shape[1] != len(trace_columns):
+        raise ValueError("trace must contain %i columns: %s" % (len(trace_columns), ", ".join(trace_columns)))
+    return trace
+
+
+def get_motion_params(motion_list: list) -> dict:
+    """
+    gets thresholds of all detectors as column arrays (one row per parameter set); absent or incorrect values
+    are nan, so corresponding detector never triggers
+    :param motion_list: list of Motion settings dicts
+    :return: dict 'effect.param' -> float array (sets, 1)
+    """
+    params = {}
+    for effect, keys in motion_params.items():
+        for key in keys:
+            values = []
+            for motion in motion_list:
+                settings = get_value(motion, effect)
+                value = get_value(settings, key) if isinstance(settings, dict) else None
+                values.append(value if isinstance(value, int) else np.nan)
+            params['%s.%s' % (effect, key)] = np.array(values, dtype=np.float64)[:, None]
+    return params
+
+
+def get_rising_edges(condition: np.ndarray) -> np.ndarray:
+    """
+    gets rising edges of condition
+    :param condition: bool array (sets, samples)
+    :return: bool array (sets, samples), True where condition becomes True
+    """
+    edges = condition.copy()
+    edges[:, 1:] &= ~condition[:, :-1]
+    return edges
+
+
+def get_angle_reached(w: np.ndarray, dt: np.ndarray, active: np.ndarray, angle: np.ndarray) -> np.ndarray:
+    """
+    gets points where rotation angle accumulated during active segments is not less then limit
+    :param w: angular velocity (samples,)
+    :param dt: sample durations in s (samples,)
+    :param active: bool array (sets, samples), rotation is accumulated only in active segments
+    :param angle: angle limit (sets, 1)
+    :return: bool array (sets, samples), True from point where angle limit is reached to the end of segment
+    """
+    rotated = np.cumsum(np.where(active, w * dt, 0.0), axis=1)
+    # accumulated angle is reset at the start of each active segment
+    base = np.maximum.accumulate(np.where(active, 0.0, rotated), axis=1)
+    return active & (rotated - base >= angle)
+
+
+def get_angle_triggers(w: np.ndarray, dt: np.ndarray, active: np.ndarray, angle: np.ndarray) -> np.ndarray:
+    """
+    gets points where rotation angle accumulated during active segments reaches limit
+    :param w: angular velocity (samples,)
+    :param dt: sample durations in s (samples,)
+    :param active: bool array (sets, samples), rotation is accumulated only in active segments
+    :param angle: angle limit (sets, 1)
+    :return: bool array (sets, samples), True where angle limit is reached in segment
+    """
+    return get_rising_edges(get_angle_reached(w, dt, active, angle))
+
+
+def debounce(edges: np.ndarray, t: np.ndarray, length: np.ndarray) -> np.ndarray:
+    """
+    removes triggers that are closer then length ms to previous accepted trigger (edges are few, so they are walked
+    one by one)
+    :param edges: bool array (sets, samples)
+    :param t: timestamps in ms (samples,)
+    :param length: min distance between triggers in ms (sets, 1)
+    :return: bool array (sets, samples)
+    """
+    result = np.zeros_like(edges)
+    length = np.nan_to_num(length[:, 0], nan=0.0)
+    for i in range(edges.shape[0]):
+        last = -np.inf
+        for j in np.flatnonzero(edges[i]):
+            if t[j] - last >= length[i]:
+                result[i, j] = True
+                last = t[j]
+    return result
+
+
+def replay(trace: np.ndarray, motion_list: list) -> dict:
+    """
+    evaluates all detectors over trace for all parameter sets in one pass
+    :param trace: array from load_trace
+    :param motion_list: list of Motion settings dicts
+    :return: dict detector -> bool array (sets, samples) with trigger points
+    """
+    p = get_motion_params(motion_list)
+    t = trace[:, 0]
+    g = trace[:, 1:4]
+    acc = trace[:, 4:7]
+    w = np.linalg.norm(g, axis=1)
+    w_side = np.hypot(g[:, 1], g[:, 2])
+    a = np.linalg.norm(acc, axis=1)
+    dt = np.diff(t, prepend=t[0]) / 1000.0
+    with np.errstate(invalid='ignore'):
+        swing = (w_side > p['swing.highw']) & (w_side * 100 >= p['swing.wpercent'] * w)
+        circle_active = w_side > p['swing.circlew']
+        spin_enabled = p['spin.enabled'] == 1
+        spin_active = (w_side > p['spin.wlow']) & spin_enabled
+        # spin segment must exceed W at least once before it triggers
+        spin_fast = np.cumsum(np.where(spin_active, w_side > p['spin.w'], False), axis=1)
+        spin_start = np.maximum.accumulate(np.where(spin_active, 0, spin_fast), axis=1)
+        spin_limit = p['spin.counter'] * p['spin.circle']
+        clash = (a > p['clash.higha']) & (w > p['clash.loww']) & (acc.min(axis=1) <= p['clash.hitlevel'])
+        stab = ((p['stab.enabled'] == 1) & (a > p['stab.higha']) & (w < p['stab.loww']) &
+                (acc[:, 0] <= p['stab.hitlevel']) & (np.abs(acc[:, 0]) * 100 >= p['stab.percent'] * a))
+        screw = (p['screw.enabled'] == 1) & (np.abs(g[:, 0]) > p['screw.highw']) & (w_side < p['screw.loww'])
+        results = {'Swing': get_rising_edges(swing),
+                   'Circle': get_angle_triggers(w_side, dt, circle_active, p['swing.circle']),
+                   'Spin': get_rising_edges(get_angle_reached(w_side, dt, spin_active, spin_limit) &
+                                            (spin_fast > spin_start)),
+                   'Clash': debounce(get_rising_edges(clash), t, p['clash.length']),
+                   'Stab': debounce(get_rising_edges(stab), t, p['stab.length']),
+                   'Screw': get_rising_edges(screw)}
+    return results
+
+
+def get_report(results: dict, trace: np.ndarray, names: list) -> list:
+    """
+    gets report with trigger counts and timestamps for each parameter set
+    :param results: dict from replay
+    :param trace: replayed trace
+    :param names: names of parameter sets
+    :return: list of lines
+    """
+    lines = []
+    t = trace[:, 0]
+    for i, name in enumerate(names):
+        lines.append("%s:" % name)
+        for detector in detectors:
+            times = t[results[detector][i]]
+            lines.append("  %s: %i triggers%s" % (detector, len(times),
+                                                  (" at " + ", ".join("%g" % time for time in times) + " ms")
+                                                  if len(times) else ""))
+    return lines
+
+
+def main(trace_filename: str, filenames: list):
+    try:
+        trace = load_trace(trace_filename)
+    except (OSError, ValueError) as e:
+        print("Trace %s can't be loaded: %s" % (trace_filename, e))
+        return -1
+    motion_list = []
+    names = []
+    for filename in filenames:
+        try:
+            f = open(filename)
+        except FileNotFoundError:
+            print("File %s not found" % filename)
+            continue
+        data, error = get_json(f.read())
+        if not data:
+            print("%s: %s" % (filename, error))
+            continue
+        motion = get_real_key(data, 'motion')
+        if not motion or not isinstance(data[motion], dict):
+            print("%s: Motion settings are absent" % filename)
+            continue
+        motion_list.append(data[motion])
+        names.append(filename)
+    if not motion_list:
+        return -1
+    for line in get_report(replay(trace, motion_list), trace, names):
+        print(line)
+    return 0
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 2:
+        main(sys.argv[1], sys.argv[2:])
+    else:
+        print("Usage: MotionReplay.py trace.csv|trace.npy common.ini [common2.ini ...]")
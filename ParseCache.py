@@ -0,0 +1,134 @@
+"""this module keeps parsed ini files in cache directory, so files are not parsed again when they are checked with other
+rules or hardware limits; parsed tree is stored in marshal format, cache key is sha256 hash of file text (and cache
+version), so changed files are parsed again and old entries are just not used
+List of functions
+-get_cache_key(text):                gets cache key for ini file text
+-get_cache_path(cache_dir, key):     gets cache file name for key
+-read_cache(cache_dir, key):         reads parsed tree from cache
+-write_cache(cache_dir, key, data, error): writes parsed tree to cache
+-load_cached(filename, cache_dir):   reads ini file and gets parsed tree from cache or parses file and caches it
+-clear_cache(cache_dir):             removes all cache files
+"""
+import os
+import sys
+import marshal
+import hashlib
+import argparse
+from IniToJson import get_json
+
+# must be changed when parser output is changed
+cache_version = b'1'
+cache_extension = '.marshal'
+default_cache_dir = '.inicache'
+
+
+def get_cache_key(text: str) -> str:
+    """
+    gets cache key: sha256 of cache version and file text
+    :param text: ini file text
+    :return: hex digest
+    """
+    return hashlib.sha256(cache_version + b'\0' + text.encode('utf-8')).hexdigest()
+
+
+def get_cache_path(cache_dir: str, key: str) -> str:
+    """
+    gets cache file name, files are spread over subdirectories by first two symbols of key
+    :param cache_dir: cache directory
+    :param key: cache key
+    :return: file name
+    """
+    return os.path.join(cache_dir, key[:2], key + cache_extension)
+
+
+def read_cache(cache_dir: str, key: str) -> (bool, object, str):
+    """
+    reads parsed tree from cache
+    :param cache_dir: cache directory
+    :param key: cache key
+    :return: True if tree is found, parsed data or None, parser error or empty string
+    """
+    try:
+        with open(get_cache_path(cache_dir, key), 'rb') as f:
+            data, error = marshal.load(f)
+    except (OSError, EOFError, ValueError, TypeError):
+        # absent or broken cache file, file will be parsed again
+        return False, None, ""
+    return True, data, error
+
+
+def write_cache(cache_dir: str, key: str, data: object, error: str):
+    """
+    writes parsed tree to cache, file is written to temporary file and then renamed, so parallel checkers never read
+    partly written files
+    :param cache_dir: cache directory
+    :param key: cache key
+    :param data: parsed data or None
+    :param error: parser error or empty string
+    """
+    path = get_cache_path(cache_dir, key)
+    temp = "%s.%i.tmp" % (path, os.getpid())
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(temp, 'wb') as f:
+            marshal.dump((data, error), f)
+        os.replace(temp, path)
+    except OSError:
+        # cache is not necessary for checking
+        if os.path.exists(temp):
+            os.remove(temp)
+
+
+def load_cached(filename: str, cache_dir: str = default_cache_dir) -> (dict, str):
+    """
+    reads ini file and gets its parsed tree from cache, file is parsed and cached if it is not in cache
+    :param filename: ini file name
+    :param cache_dir: cache directory
+    :return: json (as dictionary) (or None), empty string or error text
+    """
+    try:
+        with open(filename) as f:
+            text = f.read()
+    except FileNotFoundError:
+        return None, "File %s not found" % filename
+    except OSError as e:
+        return None, "File %s can't be read: %s" % (filename, e.strerror)
+    except UnicodeDecodeError:
+        return None, "File %s has unsupported encoding" % filename
+    key = get_cache_key(text)
+    found, data, error = read_cache(cache_dir, key)
+    if not found:
+        data, error = get_json(text)
+        error = error.replace(" enclosed in double quotes", "")
+        write_cache(cache_dir, key, data, error)
+    return data, error
+
+
+def clear_cache(cache_dir: str = default_cache_dir) -> int:
+    """
+    removes all cache files from cache directory
+    :param cache_dir: cache directory
+    :return: number of removed files
+    """
+    removed = 0
+    for root, dirs, names in os.walk(cache_dir):
+        for name in names:
+            if name.endswith(cache_extension) or name.endswith('.tmp'):
+                os.remove(os.path.join(root, name))
+                removed += 1
+    return removed
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="fills or clears cache of parsed ini files")
+    parser.add_argument('filenames', nargs='*', help="ini files to parse and cache")
+    parser.add_argument('--cache', default=default_cache_dir, help="cache directory")
+    parser.add_argument('--clear', action='store_true', help="remove all cache files")
+    args = parser.parse_args()
+    if args.clear:
+        print("%i cache files removed" % clear_cache(args.cache))
+    for name in args.filenames:
+        result, message = load_cached(name, args.cache)
+        if message:
+            print("%s: %s" % (name, message))
+    sys.exit(0)
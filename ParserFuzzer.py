@@ -0,0 +1,303 @@
+"""this module compares candidate ini parser with reference parser (IniToJson.get_json) on generated ini files: both
+parsers must return the same data or the same error (with the same line numbers); inputs with different results are
+shrunk and saved to regression corpus, inputs on which candidate is much slower than reference are saved too;
+corpus files are checked again before new inputs are generated
+List of functions
+-get_parser(name):                   gets parser function by module:function name
+-generate_text(rnd):                 generates ini file text (valid or with syntax errors)
+-run_parser(parser, text, timeout):  runs parser and gets its result and time
+-compare(reference, candidate, text, timeout): compares parsers results for text
+-shrink(text, differs):              gets minimal text for which results are still different
+-save_input(corpus, kind, text):     saves input to corpus
+-check_corpus(reference, candidate, corpus, timeout): checks inputs saved in corpus again
+-fuzz(candidate, count, seed, ...):  generates inputs, compares parsers and saves counterexamples and slow inputs
+"""
+import io
+import os
+import sys
+import time
+import random
+import signal
+import hashlib
+import argparse
+import importlib
+import contextlib
+
+reference_name = 'IniToJson:get_json'
+# relative to current directory, it is ignored by git
+default_corpus = 'fuzz_corpus'
+default_timeout = 1.0
+# candidate is slow if it is slow_ratio times slower than reference and slower than slow_time seconds
+slow_ratio = 3.0
+slow_time = 0.001
+known_keys = ['Blade', 'BandNumber', 'PixPerBand', 'Volume', 'Motion', 'Swing', 'Color', 'Colors', 'Flaming',
+              'WorkingMode', 'AuxLedsEffect', 'Config', 'Sequence', 'Brightness', 'Smooth', 'Repeat', 'Count']
+names = ['Default', 'Calm', 'Led1', 'Led2', 'CopyRed', 'forever', 'PowerOn', 'x', 'a_1']
+spaces = ['', ' ', '  ', '\t', '\n', '\n  ', ' \n\t']
+
+
+class ParserTimeout(Exception):
+    pass
+
+
+def get_parser(name: str):
+    """
+    gets parser function
+    :param name: module:function, function gets ini text and returns (data or None, error)
+    :return: function
+    """
+    module, function = name.split(':')
+    return getattr(importlib.import_module(module), function)
+
+
+def get_key(rnd: random.Random) -> str:
+    """
+    gets random key: known key in random case or name
+    """
+    key = rnd.choice(known_keys + names)
+    if rnd.random() < 0.3:
+        key = "".join(c.upper() if rnd.random() < 0.5 else c.lower() for c in key)
+    return key
+
+
+def get_space(rnd: random.Random) -> str:
+    """
+    gets random spacing with comments
+    """
+    space = rnd.choice(spaces)
+    chance = rnd.random()
+    if chance < 0.1:
+        space += "// comment %s\n" % rnd.choice(names)
+    elif chance < 0.2:
+        space += "/* comment%s%s */" % (rnd.choice(['', '\n', ' multi\nline\n']), rnd.choice(names))
+    return space + rnd.choice(spaces)
+
+
+def get_value(rnd: random.Random, depth: int) -> str:
+    """
+    gets random value text: number, name, random, color, list or nested settings
+    """
+    chance = rnd.random()
+    if depth > 3 or chance < 0.3:
+        return str(rnd.choice([0, 1, 10, 100, 255, 256, -1, rnd.randint(-1000, 100000)]))
+    if chance < 0.45:
+        return rnd.choice(['Random', 'random', 'RANDOM']) if rnd.random() < 0.5 else get_key(rnd)
+    if chance < 0.6:
+        return "[%s]" % ", ".join(str(rnd.randint(0, 300)) for i in range(3))
+    if chance < 0.75:
+        return get_list(rnd, depth + 1)
+    return get_settings(rnd, depth + 1)
+
+
+def get_list(rnd: random.Random, depth: int) -> str:
+    """
+    gets random list text with optional trailing comma
+    """
+    items = [get_value(rnd, depth) for i in range(rnd.randint(0, 4))]
+    trailing = "," if items and rnd.random() < 0.3 else ""
+    return "[" + get_space(rnd) + ("," + get_space(rnd)).join(items) + trailing + get_space(rnd) + "]"
+
+
+def get_pairs(rnd: random.Random, depth: int, number: int) -> str:
+    """
+    gets random key: value pairs with optional trailing comma
+    """
+    pairs = [get_key(rnd) + rnd.choice([':', ' :', ': ']) + get_space(rnd) + get_value(rnd, depth)
+             for i in range(number)]
+    trailing = "," if pairs and rnd.random() < 0.3 else ""
+    return ("," + get_space(rnd)).join(pairs) + trailing
+
+
+def get_settings(rnd: random.Random, depth: int) -> str:
+    """
+    gets random settings text in braces
+    """
+    return "{" + get_space(rnd) + get_pairs(rnd, depth, rnd.randint(0, 4)) + get_space(rnd) + "}"
+
+
+def mutate(rnd: random.Random, text: str) -> str:
+    """
+    makes syntax error in text: deletes, inserts or duplicates symbols
+    """
+    for i in range(rnd.randint(1, 2)):
+        position = rnd.randint(0, len(text))
+        chance = rnd.random()
+        if chance < 0.4 and text:
+            text = text[:position] + text[position + 1:]
+        elif chance < 0.8:
+            text = text[:position] + rnd.choice('{}[],:"/* \n') + text[position:]
+        else:
+            text = text[:position] + text[position:position + rnd.randint(1, 10)] + text[position:]
+    return text
+
+
+def generate_text(rnd: random.Random) -> str:
+    """
+    generates ini file text, about third of texts have syntax errors
+    :param rnd: random generator
+    :return: ini file text
+    """
+    text = get_pairs(rnd, 0, rnd.randint(1, 6)) + get_space(rnd)
+    if rnd.random() < 0.1:
+        text = "{" + text + "}"
+    if rnd.random() < 0.35:
+        text = mutate(rnd, text)
+    return text
+
+
+def on_timeout(signum, frame):
+    raise ParserTimeout()
+
+
+def run_parser(parser, text: str, timeout: float = default_timeout) -> (tuple, float):
+    """
+    runs parser with timeout (parsers output is suppressed), timeout is not used if system has no SIGALRM (Windows)
+    :param parser: parser function
+    :param text: ini file text
+    :param timeout: timeout in seconds
+    :return: result ('ok', data, error), ('timeout',) or ('exception', exception type name), time in seconds
+    """
+    alarm = hasattr(signal, 'SIGALRM')
+    if alarm:
+        previous = signal.signal(signal.SIGALRM, on_timeout)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+    start = time.perf_counter()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            data, error = parser(text)
+        result = ('ok', data, error)
+    except ParserTimeout:
+        result = ('timeout',)
+    except Exception as e:
+        result = ('exception', type(e).__name__)
+    finally:
+        if alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, previous)
+    return result, time.perf_counter() - start
+
+
+def compare(reference, candidate, text: str, timeout: float = default_timeout) -> (bool, float, float):
+    """
+    compares results of parsers for text
+    :param reference: reference parser
+    :param candidate: candidate parser
+    :param text: ini file text
+    :param timeout: timeout in seconds
+    :return: True if results are different, reference time, candidate time
+    """
+    reference_result, reference_time = run_parser(reference, text, timeout)
+    candidate_result, candidate_time = run_parser(candidate, text, timeout)
+    return reference_result != candidate_result, reference_time, candidate_time
+
+
+def shrink(text: str, differs) -> str:
+    """
+    gets minimal text for which results are still different: removes parts of text while function is true
+    :param text: ini file text
+    :param differs: function that gets text and returns True if results are different
+    :return: shrunk text
+    """
+    size = len(text) // 2
+    while size > 0:
+        position = 0
+        while position < len(text):
+            smaller = text[:position] + text[position + size:]
+            if smaller and differs(smaller):
+                text = smaller
+            else:
+                position += size
+        size //= 2
+    return text
+
+
+def save_input(corpus: str, kind: str, text: str) -> str:
+    """
+    saves input to corpus directory
+    :param corpus: corpus directory
+    :param kind: mismatch or slow
+    :param text: ini file text
+    :return: file name
+    """
+    os.makedirs(corpus, exist_ok=True)
+    filename = os.path.join(corpus, "%s_%s.ini" % (kind, hashlib.sha256(text.encode('utf-8')).hexdigest()[:16]))
+    with open(filename, 'w', newline='') as f:
+        f.write(text)
+    return filename
+
+
+def check_corpus(reference, candidate, corpus: str, timeout: float = default_timeout) -> list:
+    """
+    checks inputs saved in corpus
+    :param reference: reference parser
+    :param candidate: candidate parser
+    :param corpus: corpus directory
+    :param timeout: timeout in seconds
+    :return: list of corpus files with different results
+    """
+    failed = []
+    if not os.path.isdir(corpus):
+        return failed
+    for name in sorted(os.listdir(corpus)):
+        with open(os.path.join(corpus, name), newline='') as f:
+            text = f.read()
+        if compare(reference, candidate, text, timeout)[0]:
+            failed.append(name)
+    return failed
+
+
+def fuzz(candidate, count: int, seed: int, reference=None, corpus: str = default_corpus,
+         timeout: float = default_timeout) -> dict:
+    """
+    generates inputs, compares parsers, saves shrunk counterexamples and slow inputs to corpus
+    :param candidate: candidate parser
+    :param count: number of generated inputs
+    :param seed: random seed
+    :param reference: reference parser (IniToJson.get_json if None)
+    :param corpus: corpus directory
+    :param timeout: timeout in seconds
+    :return: dict with statistics: inputs, mismatches, slow, reference and candidate time, saved files
+    """
+    reference = reference or get_parser(reference_name)
+    rnd = random.Random(seed)
+    stats = {'inputs': 0, 'mismatches': 0, 'slow': 0, 'reference_time': 0.0, 'candidate_time': 0.0, 'saved': []}
+    for i in range(count):
+        text = generate_text(rnd)
+        differs, reference_time, candidate_time = compare(reference, candidate, text, timeout)
+        stats['inputs'] += 1
+        stats['reference_time'] += reference_time
+        stats['candidate_time'] += candidate_time
+        if differs:
+            stats['mismatches'] += 1
+            text = shrink(text, lambda smaller: compare(reference, candidate, smaller, timeout)[0])
+            stats['saved'].append(save_input(corpus, 'mismatch', text))
+        elif candidate_time > slow_time and candidate_time > slow_ratio * reference_time:
+            stats['slow'] += 1
+            stats['saved'].append(save_input(corpus, 'slow', text))
+    return stats
+
+
+def main(candidate_name: str, count: int, seed: int, corpus: str, timeout: float) -> int:
+    reference = get_parser(reference_name)
+    candidate = get_parser(candidate_name)
+    failed = check_corpus(reference, candidate, corpus, timeout)
+    for name in failed:
+        print("Corpus input %s: results are different" % name)
+    stats = fuzz(candidate, count, seed, reference, corpus, timeout)
+    print("Inputs: %i, mismatches: %i, slow inputs: %i" % (stats['inputs'], stats['mismatches'], stats['slow']))
+    print("Reference time: %.3f s, candidate time: %.3f s" % (stats['reference_time'], stats['candidate_time']))
+    for filename in stats['saved']:
+        print("Saved %s" % filename)
+    return 1 if failed or stats['mismatches'] else 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="compares candidate ini parser with IniToJson.get_json")
+    parser.add_argument('candidate', nargs='?', default=reference_name,
+                        help="candidate parser as module:function (reference parser if absent)")
+    parser.add_argument('--count', type=int, default=1000, help="number of generated inputs")
+    parser.add_argument('--seed', type=int, default=0, help="random seed")
+    parser.add_argument('--corpus', default=default_corpus, help="regression corpus directory")
+    parser.add_argument('--timeout', type=float, default=default_timeout, help="parser timeout in seconds")
+    args = parser.parse_args()
+    sys.exit(main(args.candidate, args.count, args.seed, args.corpus, args.timeout))
@@ -16,7 +16,11 @@ lockup_keys = ['flicker', 'flashes', 'auxledseffect']
 lockup_flicker_keys = ['color', 'time', 'brightness']
 lockup_flashes_keys = ['period', 'color', 'duration_ms', 'sizepix']
 blade2_keys = ['flaming', 'workingmode', 'flickering', 'delaybeforeon']
+leds_effects_keys = ['Flaming', 'Blaster', 'Clash', 'Stab', 'Lockup', 'Blade2']
 big_number = 3600000
+# profiles file may contain base templates in Templates key, profiles and templates may extend template
+templates_key = 'templates'
+extends_key = 'extends'
 
 
 def check_auxleds(data: dict) -> str:
@@ -77,7 +81,7 @@ def check_workingmode(data: dict) -> (str, str):
     warning = ""
     workingmode, error = check_existance(data, 'workingmode')
     if error:
-        return error
+        return error, warning
     error += check_keys(workingmode, workingmode_keys)
     error += check_color(workingmode)
     error += check_bool(workingmode, 'flaming')
@@ -204,6 +208,8 @@ def check_lockup(data: dict, leds_number: int) -> str:
     :return: error message or empty string
     """
     lockup, error = check_existance(data, 'lockup')
+    if error:
+        return error
     error += check_keys(lockup, lockup_keys)
     error += check_auxleds(lockup)
     flicker_error = check_flicker(lockup)
@@ -223,12 +229,14 @@ def check_blade2(data: dict, leds_number: int) -> str:
     :return:
     """
     blade2, error = check_existance(data, 'blade2')
+    if error:
+        return error
     error = check_keys(blade2, blade2_keys)
     flickering = get_real_key(blade2, "flickering")
     if flickering:
         error_flickering = check_flickering(blade2, blade2_flickering_keys)
         flickering = blade2[flickering]
-        if isinstance(flickering, dict):
+        if is_settings(flickering):
             error_flickering += check_bool(flickering, "alwayson")
         if error_flickering:
             error += "flickering: %s" % error_flickering
@@ -236,7 +244,7 @@ def check_blade2(data: dict, leds_number: int) -> str:
     if flaming:
         error_flaming = check_flaming(blade2, blade2_flaming_keys, leds_number)
         flaming = blade2[flaming]
-        if isinstance(flaming, dict):
+        if is_settings(flaming):
             error_flaming += check_bool(flaming, "alwayson")
         if error_flaming:
             error += "flaming: %s" % error_flaming
@@ -250,6 +258,301 @@ def check_blade2(data: dict, leds_number: int) -> str:
     return error.strip()
 
 
+def check_profile(profile: dict, errors: dict, plan: dict = None) -> str:
+    """
+    checks profile effects that don't depend on number of leds in blade
+    :param profile: dict with profile settings
+    :param errors: dict with errors for effects_keys to fill
+    :param plan: dict rule id -> severity (all rules if None)
+    :return: error message for unknown keys or empty string
+    """
+    error = ""
+    if is_enabled(plan, 'profile_keys'):
+        error = check_keys(profile, [key.lower() for key in effects_keys])
+    if is_enabled(plan, 'profile_afterwake'):
+        errors['AfterWake'] = check_afterwake(profile)
+    if is_enabled(plan, 'profile_poweron'):
+        errors['PowerOn'] = check_poweron(profile)
+    if is_enabled(plan, 'profile_workingmode'):
+        e, warning = set_severity(plan, 'profile_workingmode', *check_workingmode(profile))
+        errors['WorkingMode'] = e + ("\nWarning: " if e else "Warning: ") + warning if warning else e
+    if is_enabled(plan, 'profile_poweroff'):
+        errors['PowerOff'] = check_poweroff(profile)
+    if is_enabled(plan, 'profile_flickering'):
+        errors['Flickering'] = check_flickering(profile, flickering_keys)
+    for key in leds_effects_keys:
+        if is_enabled(plan, 'profile_' + key.lower()):
+            errors[key] = check_existance(profile, key.lower())[1]
+    return error
+
+
+def check_profile_limits(profile: dict, errors: dict, leds_number: int, blade2_leds_number: int = 0,
+                         plan: dict = None):
+    """
+    checks profile effects that depend on number of leds in blade, absent effects are reported by check_profile
+    :param profile: dict with profile settings
+    :param errors: dict with errors for effects_keys to fill
+    :param leds_number: number of leds in blade
+    :param blade2_leds_number: number of leds in blade2 (leds_number is used if 0)
+    :param plan: dict rule id -> severity (all rules if None)
+    """
+    present = [key for key in leds_effects_keys if is_settings(get_value(profile, key.lower()))
+               and is_enabled(plan, 'profile_' + key.lower())]
+    if 'Flaming' in present:
+        errors['Flaming'] = check_flaming(profile, flaming_keys, leds_number)
+    for key in ['Blaster', 'Clash', 'Stab']:
+        if key in present:
+            errors[key] = check_movement(profile, leds_number, key)
+    if 'Lockup' in present:
+        errors['Lockup'] = check_lockup(profile, leds_number)
+    if 'Blade2' in present:
+        errors['Blade2'] = check_blade2(profile, blade2_leds_number or leds_number)
+
+
+def get_messages(profile: str, error: str, errors: dict, plan: dict = None, unit: str = "profile") -> list:
+    """
+    gets list of messages for checked profile
+    :param profile: profile name
+    :param error: error message for unknown keys
+    :param errors: dict with errors for effects_keys
+    :param plan: dict rule id -> severity (all rules if None)
+    :param unit: profile or template
+    :return: list of messages
+    """
+    messages = []
+    if error:
+        messages.append("Warning: " + error if get_rule_level(plan, 'profile_keys') == "Warning" else error)
+    for key in errors.keys():
+        if errors[key]:
+            level, text = get_rule_level(plan, 'profile_' + key.lower()), errors[key].strip()
+            # effect with warnings only (rule may be regraded to warning)
+            if text.startswith("Warning: "):
+                level, text = "Warning", text[9:].strip()
+            messages.append("%s: %s %s %s effect:\n%s" % (level, profile, unit, key, text))
+    return messages
+
+
+def get_profile_names(data: dict) -> list:
+    """
+    gets names of profiles of profiles file (Templates key contains templates, not profile)
+    :param data: dict with profiles
+    :return: list of profile names
+    """
+    return [name for name in data.keys() if name.lower() != templates_key]
+
+
+def get_templates(data: dict) -> (dict, str):
+    """
+    gets templates of profiles file
+    :param data: dict with profiles
+    :return: dict template name -> settings, error message or empty string
+    """
+    key = get_real_key(data, templates_key)
+    if not key:
+        return {}, ""
+    if not is_settings(data[key]):
+        return {}, "%s must contain templates formatted as {name: {settings}, name: {settings} ...};" % key
+    return data[key], ""
+
+
+def merge_settings(base: dict, override: dict) -> dict:
+    """
+    merges settings of profile or template with settings of its base template: nested settings are merged, other
+    values are replaced, extends key is not copied
+    :param base: settings of base template
+    :param override: settings of profile or template
+    :return: new dict with merged settings
+    """
+    merged = dict(base.items())
+    for key, value in override.items():
+        if key.lower() == extends_key:
+            continue
+        base_key = get_real_key(merged, key.lower()) or key
+        if is_settings(value) and is_settings(merged.get(base_key)):
+            merged[base_key] = merge_settings(merged[base_key], value)
+        else:
+            merged[base_key] = value
+    return merged
+
+
+def resolve_template(templates: dict, name: str, resolved: dict, chain: tuple = ()) -> (dict, str):
+    """
+    gets template settings merged with settings of its base templates, results are memoized so each template is
+    expanded once
+    :param templates: dict template name -> settings
+    :param name: template name
+    :param resolved: dict lowercase template name -> (settings or None, error) to fill
+    :param chain: names of templates that extend this template (to find cycles)
+    :return: template settings or None, error message or empty string
+    """
+    if not isinstance(name, str):
+        return None, "%s must be template name;" % extends_key.capitalize()
+    if name.lower() in resolved:
+        return resolved[name.lower()]
+    names = [template.lower() for template in chain]
+    if name.lower() in names:
+        cycle = chain[names.index(name.lower()):] + (name,)
+        return None, "templates extend each other: %s;" % " -> ".join(cycle)
+    key = get_real_key(templates, name.lower())
+    if not key:
+        return None, "template %s is not defined;" % name
+    template = templates[key]
+    if not is_settings(template):
+        result = None, "template %s must contain settings formatted as {data: parameter, data: parameter ...};" % key
+    elif get_value(template, extends_key) is None:
+        result = merge_settings({}, template), ""
+    else:
+        base, error = resolve_template(templates, get_value(template, extends_key), resolved, chain + (key,))
+        result = (None, error) if error else (merge_settings(base, template), "")
+    resolved[name.lower()] = result
+    return result
+
+
+def get_effects_errors(profile: dict, effects: list, leds_number: int, blade2_leds_number: int = 0,
+                       plan: dict = None) -> dict:
+    """
+    checks only listed effects of profile
+    :param profile: dict with profile settings
+    :param effects: list of effects (from effects_keys)
+    :param leds_number: number of leds in blade (effects that depend on it are not checked if 0)
+    :param blade2_leds_number: number of leds in blade2 (leds_number is used if 0)
+    :param plan: dict rule id -> severity (all rules if None)
+    :return: dict effect -> error message
+    """
+    rules = ['profile_' + key.lower() for key in effects]
+    effects_plan = {rule: get_rule_severity(plan, rule) for rule in rules if is_enabled(plan, rule)}
+    errors = {}
+    check_profile(profile, errors, effects_plan)
+    if leds_number:
+        check_profile_limits(profile, errors, leds_number, blade2_leds_number, effects_plan)
+    return errors
+
+
+def get_template_errors(inheritance: dict, name: str, leds_number: int, blade2_leds_number: int = 0,
+                        plan: dict = None) -> dict:
+    """
+    checks effects of template merged with its base templates, each template is checked once
+    :param inheritance: dict with 'templates', 'resolved' (see resolve_template) and 'errors' (memoized errors)
+    :param name: template name (template must be resolved without errors)
+    :param leds_number: number of leds in blade (effects that depend on it are not checked if 0)
+    :param blade2_leds_number: number of leds in blade2 (leds_number is used if 0)
+    :param plan: dict rule id -> severity (all rules if None)
+    :return: dict effect -> error message
+    """
+    if name.lower() not in inheritance['errors']:
+        template = resolve_template(inheritance['templates'], name, inheritance['resolved'])[0]
+        # templates may be partial, so only their effects are checked
+        effects = [key for key in effects_keys if get_real_key(template, key.lower())]
+        inheritance['errors'][name.lower()] = get_effects_errors(template, effects, leds_number, blade2_leds_number,
+                                                                 plan)
+    return inheritance['errors'][name.lower()]
+
+
+def check_extended(settings: dict, name: str, unit: str, inheritance: dict, leds_number: int,
+                   blade2_leds_number: int = 0, plan: dict = None) -> list:
+    """
+    checks template or profile that extends template: only effects that are changed or added by it (and effects absent
+    in profile) are checked, errors that are the same as errors of base template are reported for base template only
+    :param settings: settings of template or profile
+    :param name: template or profile name
+    :param unit: template or profile
+    :param inheritance: dict with 'templates', 'resolved' and 'errors' (see get_template_errors)
+    :param leds_number: number of leds in blade (effects that depend on it are not checked if 0)
+    :param blade2_leds_number: number of leds in blade2 (leds_number is used if 0)
+    :param plan: dict rule id -> severity (all rules if None)
+    :return: list of messages
+    """
+    base_name = get_value(settings, extends_key)
+    base, base_errors = {}, {}
+    if base_name is not None:
+        base, error = resolve_template(inheritance['templates'], base_name, inheritance['resolved'])
+        if error:
+            if not is_enabled(plan, 'profile_extends'):
+                return []
+            return ["%s: %s %s: %s" % (get_rule_level(plan, 'profile_extends'), name, unit, error)]
+        base_errors = get_template_errors(inheritance, base_name, leds_number, blade2_leds_number, plan)
+    effects = [key for key in effects_keys if get_real_key(settings, key.lower())]
+    if unit == "template":
+        errors = {key: error for key, error in get_template_errors(inheritance, name, leds_number,
+                                                                   blade2_leds_number, plan).items()
+                  if key.lower() in [effect.lower() for effect in effects]}
+    else:
+        merged = merge_settings(base, settings)
+        effects += [key for key in effects_keys if not get_real_key(merged, key.lower()) and key not in effects]
+        errors = get_effects_errors(merged, effects, leds_number, blade2_leds_number, plan)
+    for key, error in errors.items():
+        base_lines = base_errors.get(key, "").split('\n')
+        errors[key] = "\n".join(line for line in error.split('\n') if line not in base_lines)
+    error = ""
+    if is_enabled(plan, 'profile_keys'):
+        error = check_keys(settings, [key.lower() for key in effects_keys] + [extends_key])
+    return get_messages(name, error, errors, plan, unit)
+
+
+def check_profiles(data: dict, leds_number: int, blade2_leds_number: int = 0, plan: dict = None) -> list:
+    """
+    checks all profiles and templates of profiles file; templates are expanded and checked once, profiles that extend
+    templates are checked by changes they make
+    :param data: dict with profiles
+    :param leds_number: number of leds in blade (effects that depend on it are not checked if 0)
+    :param blade2_leds_number: number of leds in blade2 (leds_number is used if 0)
+    :param plan: dict rule id -> severity (all rules if None)
+    :return: list of messages
+    """
+    messages = []
+    templates, error = get_templates(data)
+    if error:
+        messages.append("Error: " + error)
+    inheritance = {'templates': templates, 'resolved': {}, 'errors': {}}
+    for template in templates.keys():
+        if not is_settings(templates[template]):
+            messages.append("Wrong settings format for template %s;" % template)
+            continue
+        messages += check_extended(templates[template], template, "template", inheritance, leds_number,
+                                   blade2_leds_number, plan)
+    for profile in get_profile_names(data):
+        if not is_settings(data[profile]):
+            messages.append("Wrong settings format for profile %s;" % profile)
+        elif get_real_key(data[profile], extends_key):
+            messages += check_extended(data[profile], profile, "profile", inheritance, leds_number,
+                                       blade2_leds_number, plan)
+        else:
+            errors = {err: "" for err in effects_keys}
+            error = check_profile(data[profile], errors, plan)
+            if leds_number:
+                check_profile_limits(data[profile], errors, leds_number, blade2_leds_number, plan)
+            messages += get_messages(profile, error, errors, plan)
+    return messages
+
+
+def resolve_profile(data: dict, profile: str, resolved: dict) -> (dict, str):
+    """
+    gets profile merged with template it extends
+    :param data: dict with profiles
+    :param profile: profile name
+    :param resolved: dict for memoized templates (see resolve_template)
+    :return: profile settings or None, error message or empty string
+    """
+    settings = data[profile]
+    if not is_settings(settings) or get_value(settings, extends_key) is None:
+        return settings, ""
+    base, error = resolve_template(get_templates(data)[0], get_value(settings, extends_key), resolved)
+    return (None, error) if error else (merge_settings(base, settings), "")
+
+
+def get_resolved_profiles(data: dict) -> dict:
+    """
+    gets profiles merged with templates they extend
+    :param data: dict with profiles
+    :return: dict profile name -> (settings or None, error message or empty string)
+    """
+    resolved = {}
+    return {profile: resolve_profile(data, profile, resolved) for profile in get_profile_names(data)}
+
+
+profile_rules = ['profile_keys', 'profile_extends'] + ['profile_' + key.lower() for key in effects_keys]
+
+
 def main(filename: str, leds_number: int):
 
     try:
@@ -264,29 +567,8 @@ def main(filename: str, leds_number: int):
         print(error)
         return -1
 
-    for profile in data.keys():
-        if not isinstance(data[profile], dict):
-            print("Wrong settings format for profile %s;" % profile)
-            continue
-        errors = {err: "" for err in effects_keys}
-        error = check_keys(data[profile], [key.lower() for key in effects_keys])
-        if error:
-            print(error)
-        errors['AfterWake'] = check_afterwake(data[profile])
-        errors['PowerOn'] = check_poweron(data[profile])
-        (error, warning) = check_workingmode(data[profile])
-        errors['WorkingMode'] = error + "\nWarning: " + warning if warning else error
-        errors['PowerOff'] = check_poweroff(data[profile])
-        errors['Flaming'] = check_flaming(data[profile], flaming_keys, leds_number)
-        errors['Flickering'] = check_flickering(data[profile], flickering_keys)
-        errors['Blaster'] = check_movement(data[profile], leds_number, "Blaster")
-        errors['Clash'] = check_movement(data[profile], leds_number, "Clash")
-        errors['Stab'] = check_movement(data[profile], leds_number, "Stab")
-        errors['Lockup'] = check_lockup(data[profile], leds_number)
-        errors['Blade2'] = check_blade2(data[profile], leds_number)
-        for key in errors.keys():
-            if errors[key]:
-                print("Error: %s profile %s effect:\n%s" % (profile, key, errors[key].strip()))
+    for message in check_profiles(data, leds_number):
+        print(message)
     return 0
 
 
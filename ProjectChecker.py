@@ -0,0 +1,300 @@
+"""this module checks all ini files of saber project (common settings, profiles and aux leds effects) in one run
+List of functions
+-load_file(filename, compact, cache_dir):    parses one ini file and gets its type
+-get_project_files(directory):              gets ini files of project directory
+-load_project(directory, compact, cache_dir): parses each ini file of directory once and gets its type
+-get_blade_leds(data, key):                 gets number of leds in blade (BandNumber x PixPerBand) from common settings
+-get_context_data(data, file_type):         gets part of file data used by project context
+-get_context(parts):                        gets project context from parts of files data
+-get_project_context(files):                gets context shared by files: blade leds numbers and aux effects index
+-get_aux_references(profile):               gets all AuxLedsEffect values of profile with their places
+-check_references(data, context, plan):     checks that AuxLedsEffect values of profiles are defined in aux files
+-check_file(data, file_type, context, hardware, plan): checks one parsed file with project context
+-check_loaded_file(data, error, file_type, context, hardware, plan): checks file loaded by load_file
+-get_dependents(files, changed):             gets files that must be checked again when some files are changed
+-check_project(files, hardware, selected, plan): checks all (or selected) files of project
+"""
+import os
+import sys
+from IniToJson import load_json
+from CommonChecks import *
+import CommonChecker
+import ProfileChecker
+import Auxchecker
+from Hardware import load_hardware, default_hardware
+
+ini_extension = '.ini'
+# files of this size and bigger are parsed through memory map (MmapLexer) without copies of their text
+mmap_file_size = 4 * 1024 * 1024
+
+
+def load_file(filename: str, compact: bool = False, cache_dir: str = "") -> (object, str, str):
+    """
+    parses one ini file of project
+    :param filename: ini file name
+    :param compact: parse file to compact model (Model module) instead of dicts
+    :param cache_dir: parsed files cache directory (ParseCache module), file is always parsed if empty
+    :return: data or None, error message, file type
+    """
+    # compact model, cache and memory mapped parser are imported only when they are used
+    if cache_dir:
+        from ParseCache import load_cached
+        data, error = load_cached(filename, cache_dir)
+        if compact and data is not None:
+            from Model import to_model
+            data = to_model(data)
+    elif os.path.getsize(filename) >= mmap_file_size:
+        from MmapLexer import load_json as load_mapped
+        if compact:
+            from Model import make_section
+        data, error = load_mapped(filename, make_section if compact else None)
+    elif compact:
+        from Model import load_model
+        data, error = load_model(filename)
+    else:
+        data, error = load_json(filename)
+    return data, error, get_file_type(data)
+
+
+def get_project_files(directory: str) -> list:
+    """
+    gets ini files of project directory
+    :param directory: project directory
+    :return: sorted list of file names
+    """
+    return [os.path.join(directory, name) for name in sorted(os.listdir(directory))
+            if name.lower().endswith(ini_extension) and os.path.isfile(os.path.join(directory, name))]
+
+
+def load_project(directory: str, compact: bool = False, cache_dir: str = "") -> dict:
+    """
+    parses each ini file of directory once
+    :param directory: project directory
+    :param compact: parse files to compact model (Model module) instead of dicts
+    :param cache_dir: parsed files cache directory (ParseCache module), files are always parsed if empty
+    :return: dict filename -> (data or None, error message, file type)
+    """
+    return {filename: load_file(filename, compact, cache_dir) for filename in get_project_files(directory)}
+
+
+def get_blade_leds(data: dict, key: str) -> int:
+    """
+    gets number of leds in blade from common settings
+    :param data: dict with common settings
+    :param key: blade or blade2
+    :return: BandNumber x PixPerBand or 0 if settings are incorrect
+    """
+    blade = get_value(data, key)
+    if not is_settings(blade):
+        return 0
+    band, leds = get_value(blade, 'bandnumber'), get_value(blade, 'pixperband')
+    if not isinstance(band, int) or not isinstance(leds, int) or band <= 0 or leds <= 0:
+        return 0
+    return band * leds
+
+
+def get_context_data(data: dict, file_type: str) -> object:
+    """
+    gets part of file data that is used by project context
+    :param data: dict with ini data
+    :param file_type: common, profiles or aux
+    :return: leds numbers of blade and blade2 for common settings, list of effects for aux leds file, None for others
+    """
+    if file_type == "common":
+        return get_blade_leds(data, 'blade'), get_blade_leds(data, 'blade2')
+    if file_type == "aux":
+        return list(data.keys())
+    return None
+
+
+def get_context(parts: dict) -> (dict, list):
+    """
+    gets project context from parts of files data
+    :param parts: dict filename -> (data from get_context_data, file type), files are in directory order
+    :return: context dict ('leds', 'blade2leds', 'auxeffects': lowercase effect -> (effect, filename)),
+             list of project errors
+    """
+    context = {'leds': 0, 'blade2leds': 0, 'auxeffects': {}}
+    errors = []
+    common = [filename for filename, (part, file_type) in parts.items() if file_type == "common"]
+    if len(common) > 1:
+        errors.append("Error: several common settings files: %s" % ", ".join(common))
+    if common:
+        context['leds'], context['blade2leds'] = parts[common[0]][0]
+    for filename, (part, file_type) in parts.items():
+        if file_type != "aux":
+            continue
+        for effect in part:
+            if effect.lower() in context['auxeffects']:
+                errors.append("Error: '%s' effect is defined in %s and %s" %
+                              (effect, context['auxeffects'][effect.lower()][1], filename))
+            else:
+                context['auxeffects'][effect.lower()] = (effect, filename)
+    return context, errors
+
+
+def get_project_context(files: dict) -> (dict, list):
+    """
+    gets data shared by project files: leds numbers of blades from common settings and index of aux effects
+    :param files: dict from load_project
+    :return: context dict ('leds', 'blade2leds', 'auxeffects': lowercase effect -> (effect, filename)),
+             list of project errors
+    """
+    return get_context({filename: (get_context_data(data, file_type), file_type)
+                        for filename, (data, error, file_type) in files.items()})
+
+
+def get_aux_references(profile: dict, place: str = "") -> list:
+    """
+    gets all AuxLedsEffect values of profile (including nested effects like Blade2 Flaming)
+    :param profile: dict with profile settings
+    :param place: place of profile part
+    :return: list of (place, value)
+    """
+    references = []
+    for key, value in profile.items():
+        if key.lower() == 'auxledseffect':
+            references.append((place, value))
+        elif is_settings(value):
+            references += get_aux_references(value, (place + " " + key).strip())
+    return references
+
+
+def check_references(data: dict, context: dict, plan: dict = None) -> list:
+    """
+    checks that all AuxLedsEffect values of profiles and templates are effects defined in aux leds files (values
+    inherited from templates are checked for templates only)
+    :param data: dict with profiles
+    :param context: project context
+    :param plan: rules execution plan (all rules are checked if None)
+    :return: list of error messages
+    """
+    messages = []
+    if not is_enabled(plan, 'project_aux_references'):
+        return messages
+    level = get_rule_level(plan, 'project_aux_references')
+    templates = ProfileChecker.get_templates(data)[0]
+    units = [(name, templates[name], "template") for name in templates.keys()]
+    units += [(name, data[name], "profile") for name in ProfileChecker.get_profile_names(data)]
+    for name, settings, unit in units:
+        if not is_settings(settings):
+            continue
+        for place, effect in get_aux_references(settings):
+            if isinstance(effect, str) and effect.lower() not in context['auxeffects']:
+                messages.append("%s: %s %s %s effect: AuxLedsEffect %s is not defined in aux leds files" %
+                                (level, name, unit, place, effect))
+    return messages
+
+
+def check_file(data: dict, file_type: str, context: dict, hardware: dict = default_hardware,
+               plan: dict = None) -> list:
+    """
+    checks parsed file using project context
+    :param data: dict with ini data
+    :param file_type: common, profiles or aux
+    :param context: project context
+    :param hardware: dict with hardware limits
+    :param plan: rules execution plan (all rules are checked if None)
+    :return: list of messages
+    """
+    messages = []
+    if file_type == "common":
+        errors = {err: "" for err in CommonChecker.common_keys_cap}
+        errors_motion = {err: "" for err in CommonChecker.motion_keys_cap}
+        error = CommonChecker.check_common(data, errors, errors_motion, plan)
+        CommonChecker.check_common_limits(data, errors, hardware['maxband'], hardware['maxleds'],
+                                          hardware['maxtotalleds'], plan)
+        messages = CommonChecker.get_messages(error, errors, errors_motion)
+    elif file_type == "profiles":
+        if not context['leds']:
+            messages.append("Error: number of leds in blade is unknown (no correct common settings file)")
+        messages += ProfileChecker.check_profiles(data, context['leds'], context['blade2leds'], plan)
+        messages += check_references(data, context, plan)
+    elif file_type == "aux":
+        for effect in data.keys():
+            messages += Auxchecker.check_effect(data, effect, plan) + \
+                        Auxchecker.check_effect_leds(data, effect, hardware['auxleds'], plan)
+    return messages
+
+
+def check_loaded_file(data: dict, error: str, file_type: str, context: dict, hardware: dict = default_hardware,
+                      plan: dict = None) -> list:
+    """
+    checks file loaded by load_file using project context
+    :param data: dict with ini data or None
+    :param error: parsing error message
+    :param file_type: common, profiles, aux or empty string
+    :param context: project context
+    :param hardware: dict with hardware limits
+    :param plan: rules execution plan (all rules are checked if None)
+    :return: list of messages
+    """
+    if data is None:
+        return [error]
+    if not data:
+        return ["Error: file is empty"]
+    if not file_type:
+        return ["Error: unknown file type"]
+    return check_file(data, file_type, context, hardware, plan)
+
+
+def get_dependents(files: dict, changed: list) -> list:
+    """
+    gets changed files and files depending on them: profiles depend on common settings (leds number) and aux leds
+    files (effects names)
+    :param files: dict from load_project
+    :param changed: list of changed filenames
+    :return: list of filenames to check
+    """
+    selected = [filename for filename in files.keys() if filename in changed]
+    if any(files[filename][2] in ["common", "aux"] for filename in selected):
+        selected += [filename for filename, (data, error, file_type) in files.items()
+                     if file_type == "profiles" and filename not in selected]
+    return selected
+
+
+def check_project(files: dict, hardware: dict = default_hardware, selected: list = None,
+                  plan: dict = None) -> (list, dict):
+    """
+    checks all files of project
+    :param files: dict from load_project
+    :param hardware: dict with hardware limits
+    :param selected: list of filenames to check (all files if None)
+    :param plan: rules execution plan (all rules are checked if None)
+    :return: list of project errors, dict filename -> list of messages
+    """
+    context, errors = get_project_context(files)
+    results = {}
+    for filename, (data, error, file_type) in files.items():
+        if selected is not None and filename not in selected:
+            continue
+        results[filename] = check_loaded_file(data, error, file_type, context, hardware, plan)
+    return errors, results
+
+
+def main(directory: str, board_filename: str = ""):
+    if not os.path.isdir(directory):
+        print("Directory %s not found" % directory)
+        return -1
+    hardware = default_hardware
+    if board_filename:
+        hardware, error = load_hardware(board_filename)
+        if error:
+            print("Error: hardware file %s: %s" % (board_filename, error))
+            return -1
+    errors, results = check_project(load_project(directory), hardware)
+    for error in errors:
+        print(error)
+    failed = bool(errors)
+    for filename, messages in results.items():
+        for message in messages:
+            print("%s: %s" % (filename, message))
+            failed = failed or not message.startswith("Warning")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        main(sys.argv[1], sys.argv[2] if len(sys.argv) > 2 else "")
+    else:
+        print("Usage: ProjectChecker.py project_directory [board.ini]")
@@ -0,0 +1,123 @@
+"""this module writes checking results in text, NDJSON, SARIF or JUnit XML format; results are written file by file
+through one buffered stream, so batch runs don't keep all messages in memory
+List of functions and classes
+-get_severity(message):                   gets severity of message (error or warning)
+-open_output(filename):                   opens buffered output stream (stdout if filename is empty)
+-get_reporter(report_format, stream):     gets reporter object for format
+-TextReporter, NdjsonReporter, SarifReporter, JunitReporter: reporters with start(), report_file(filename, messages)
+                                          and finish() methods
+"""
+import sys
+import json
+from xml.sax.saxutils import escape, quoteattr
+
+buffer_size = 1 << 16
+tool_name = "inichecker"
+sarif_schema = "https://json.schemastore.org/sarif-2.1.0.json"
+report_formats = ['text', 'ndjson', 'sarif', 'junit']
+
+
+def get_severity(message: str) -> str:
+    """
+    gets message severity
+    :param message: checker message
+    :return: 'warning' for warning messages, 'error' for others
+    """
+    return "warning" if message.startswith("Warning") else "error"
+
+
+def open_output(filename: str = ""):
+    """
+    opens buffered text stream for report
+    :param filename: output file name, stdout is used if empty
+    :return: text stream
+    """
+    if not filename:
+        return sys.stdout
+    return open(filename, 'w', buffering=buffer_size, encoding='utf-8')
+
+
+class TextReporter:
+    """
+    writes messages as text lines (filename: message)
+    """
+    def __init__(self, stream):
+        self.stream = stream
+
+    def start(self):
+        pass
+
+    def report_file(self, filename: str, messages: list):
+        self.stream.write("".join("%s: %s\n" % (filename, message) for message in messages))
+
+    def finish(self):
+        self.stream.flush()
+
+
+class NdjsonReporter(TextReporter):
+    """
+    writes one json object per message: {"file": ..., "severity": ..., "message": ...}
+    """
+    def report_file(self, filename: str, messages: list):
+        self.stream.write("".join(json.dumps({'file': filename, 'severity': get_severity(message),
+                                              'message': message}) + "\n" for message in messages))
+
+
+class SarifReporter(TextReporter):
+    """
+    writes SARIF 2.1.0 log, results are streamed into one run
+    """
+    def __init__(self, stream):
+        super().__init__(stream)
+        self.first = True
+
+    def start(self):
+        self.stream.write('{"version": "2.1.0", "$schema": %s, "runs": [{"tool": {"driver": {"name": %s}}, '
+                          '"results": [\n' % (json.dumps(sarif_schema), json.dumps(tool_name)))
+
+    def report_file(self, filename: str, messages: list):
+        for message in messages:
+            result = {'level': get_severity(message), 'message': {'text': message},
+                      'locations': [{'physicalLocation': {'artifactLocation': {'uri': filename}}}]}
+            self.stream.write(("" if self.first else ",\n") + json.dumps(result))
+            self.first = False
+
+    def finish(self):
+        self.stream.write('\n]}]}\n')
+        self.stream.flush()
+
+
+class JunitReporter(TextReporter):
+    """
+    writes JUnit XML report, each checked file is a test case that fails if file has errors
+    """
+    def start(self):
+        self.stream.write('<?xml version="1.0" encoding="UTF-8"?>\n<testsuites>\n<testsuite name=%s>\n'
+                          % quoteattr(tool_name))
+
+    def report_file(self, filename: str, messages: list):
+        errors = [message for message in messages if get_severity(message) == "error"]
+        warnings = [message for message in messages if get_severity(message) == "warning"]
+        parts = ['<testcase classname=%s name=%s>' % (quoteattr(tool_name), quoteattr(filename))]
+        if errors:
+            parts.append('<failure message=%s>%s</failure>' % (quoteattr("%i errors" % len(errors)),
+                                                               escape("\n".join(errors))))
+        if warnings:
+            parts.append('<system-out>%s</system-out>' % escape("\n".join(warnings)))
+        parts.append('</testcase>\n')
+        self.stream.write("".join(parts))
+
+    def finish(self):
+        self.stream.write('</testsuite>\n</testsuites>\n')
+        self.stream.flush()
+
+
+def get_reporter(report_format: str, stream):
+    """
+    gets reporter for format
+    :param report_format: text, ndjson, sarif or junit
+    :param stream: output stream
+    :return: reporter object
+    """
+    reporters = {'text': TextReporter, 'ndjson': NdjsonReporter, 'sarif': SarifReporter, 'junit': JunitReporter}
+    return reporters[report_format](stream)
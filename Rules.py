@@ -0,0 +1,75 @@
+"""this module loads rules configuration file and builds execution plan for checkers: disabled rules are not in plan,
+so checkers don't run them at all
+Rules configuration file is written in ini format, rule id -> Off, Error, Warning or Default, for example:
+common_swing_circle: Off,
+common_clash_higha: Warning,
+aux_smooth: Error
+List of functions
+-get_rules():                     gets ids of all rules
+-get_plan(config):                gets execution plan for rules configuration
+-load_rules(filename):            loads rules configuration file and gets execution plan
+"""
+import sys
+from IniToJson import load_json
+from CommonChecker import common_rules
+from ProfileChecker import profile_rules
+from Auxchecker import aux_rules
+
+project_rules = ['project_aux_references']
+severities = ['off', 'error', 'warning', 'default']
+
+
+def get_rules() -> list:
+    """
+    gets ids of all rules of all checkers
+    :return: list of rule ids
+    """
+    return common_rules + profile_rules + aux_rules + project_rules
+
+
+def get_plan(config: dict) -> (dict, str):
+    """
+    gets execution plan: enabled rules with their severity
+    :param config: dict rule id -> severity (rules absent in config have default severity)
+    :return: dict rule id -> severity or None, error message or empty string
+    """
+    rules = get_rules()
+    error = ""
+    plan = {rule: "default" for rule in rules}
+    for rule, severity in config.items():
+        if rule.lower() not in plan:
+            error += "unknown rule %s;\n" % rule
+        elif not isinstance(severity, str) or severity.lower() not in severities:
+            error += "%s rule severity must be one of Off, Error, Warning, Default;\n" % rule
+        elif severity.lower() == "off":
+            del plan[rule.lower()]
+        else:
+            plan[rule.lower()] = severity.lower()
+    if error:
+        return None, error.strip()
+    return plan, ""
+
+
+def load_rules(filename: str) -> (dict, str):
+    """
+    loads rules configuration file
+    :param filename: file name
+    :return: execution plan or None, error message or empty string
+    """
+    config, error = load_json(filename)
+    if config is None:
+        return None, error
+    return get_plan(config)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        plan, error = load_rules(sys.argv[1])
+        if error:
+            print(error)
+        else:
+            for rule in get_rules():
+                print("%s: %s" % (rule, plan.get(rule, "off")))
+    else:
+        for rule in get_rules():
+            print(rule)
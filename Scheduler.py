@@ -0,0 +1,261 @@
+"""this module checks batch of ini files in isolated worker processes: each file is parsed and checked in its own
+process with time and memory limits, so file that hangs parser, takes all memory or crashes checker gets error message
+instead of stopping whole run; files are started largest first (by checking time of previous run or by file size),
+so the biggest files don't start at the end of run; profiles workers wait for project context (leds numbers and aux
+effects) that is got from other files of their directory, waiting time is not counted in time limit
+List of functions
+-load_costs(cache_dir):                   reads checking times of previous runs
+-save_costs(cache_dir, costs):            writes checking times
+-get_cost(filename, costs):               gets estimated checking time of file
+-get_tasks(batch, costs):                 gets files to check (with other files of directories) largest first
+-run_task(filename, report, options, connection): parses and checks file in worker process
+-check_isolated(batch, reporter, hardware, plan, compact, cache_dir, jobs, timeout, memory): checks files of batch in
+                                          worker processes and writes results with reporter
+"""
+import os
+import json
+import time
+import multiprocessing
+from multiprocessing.connection import wait
+from ProjectChecker import load_file, get_project_files, get_context_data, get_context, check_loaded_file
+from Hardware import default_hardware
+from BatchChecker import report_directory, default_timeout
+
+costs_file = 'costs.json'
+# checking speed (bytes per second) for files that were not checked before
+default_speed = 4 * 1024 * 1024
+
+
+def load_costs(cache_dir: str) -> dict:
+    """
+    reads checking times of files of previous runs
+    :param cache_dir: cache directory (costs are not used if empty)
+    :return: dict filename -> [file size, checking time in seconds]
+    """
+    if not cache_dir:
+        return {}
+    try:
+        with open(os.path.join(cache_dir, costs_file)) as f:
+            costs = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return costs if isinstance(costs, dict) else {}
+
+
+def save_costs(cache_dir: str, costs: dict):
+    """
+    writes checking times of files (file is replaced at once, so parallel runs don't break it)
+    :param cache_dir: cache directory (costs are not saved if empty)
+    :param costs: dict filename -> [file size, checking time in seconds]
+    """
+    if not cache_dir:
+        return
+    os.makedirs(cache_dir, exist_ok=True)
+    filename = os.path.join(cache_dir, costs_file)
+    temp = "%s.%i.tmp" % (filename, os.getpid())
+    with open(temp, 'w') as f:
+        json.dump(costs, f)
+    os.replace(temp, filename)
+
+
+def get_cost(filename: str, costs: dict) -> float:
+    """
+    gets estimated checking time of file: time of previous run if file size is the same, else time by file size
+    :param filename: ini file name
+    :param costs: dict from load_costs
+    :return: time in seconds
+    """
+    try:
+        size = os.path.getsize(filename)
+    except OSError:
+        return 0.0
+    cost = costs.get(filename)
+    if isinstance(cost, list) and len(cost) == 2 and cost[0] == size:
+        return cost[1]
+    return size / default_speed
+
+
+def get_tasks(batch: dict, costs: dict) -> list:
+    """
+    gets files to check and other files of their directories (they are parsed for project context only)
+    :param batch: dict directory -> list of files (BatchChecker.get_batch)
+    :param costs: dict from load_costs
+    :return: list of (estimated time, filename, directory, file is reported), largest first
+    """
+    tasks = []
+    for directory, filenames in batch.items():
+        project = get_project_files(directory) if os.path.isdir(directory) else []
+        tasks += [(get_cost(filename, costs), filename, directory, filename in filenames)
+                  for filename in project]
+        # files that are not found are reported by BatchChecker.report_directory
+    tasks.sort(key=lambda task: -task[0])
+    return tasks
+
+
+def set_memory_limit(memory: int):
+    """
+    sets address space limit of current process
+    :param memory: limit in MiB (no limit if 0)
+    """
+    try:
+        import resource
+    except ImportError:
+        # resource module is not available on Windows
+        return
+    if memory:
+        limit = memory * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+
+def run_task(filename: str, report: bool, options: dict, connection):
+    """
+    parses and checks file in worker process: sends ('context', data for context, file type) after parsing, waits
+    for project context if file is profiles file and sends ('messages', list of messages)
+    :param filename: ini file name
+    :param report: check file (it is only parsed for project context if False)
+    :param options: dict with hardware, plan, compact, cache_dir and memory
+    :param connection: pipe connection to main process
+    """
+    set_memory_limit(options['memory'])
+    try:
+        data, error, file_type = load_file(filename, options['compact'], options['cache_dir'])
+        connection.send(('context', get_context_data(data, file_type), file_type))
+        if not report:
+            return
+        # only profiles checks use project context
+        context = connection.recv() if data and file_type == "profiles" else None
+        messages = check_loaded_file(data, error, file_type, context, options['hardware'], options['plan'])
+    except MemoryError:
+        messages = ["Error: memory limit %i MiB is exceeded, file is not checked" % options['memory']]
+    except Exception as e:
+        messages = ["Error: checking failed with %s: %s" % (type(e).__name__, e)]
+    connection.send(('messages', messages))
+    connection.close()
+
+
+def check_isolated(batch: dict, reporter, hardware: dict = default_hardware, plan: dict = None, compact: bool = False,
+                   cache_dir: str = "", jobs: int = None, timeout: float = default_timeout,
+                   memory: int = 0) -> (int, int):
+    """
+    checks files of batch in worker processes and writes results with reporter in batch order
+    :param batch: dict directory -> list of files (BatchChecker.get_batch)
+    :param reporter: reporter from Reporters
+    :param hardware: dict with hardware limits
+    :param plan: rules execution plan (all rules are checked if None)
+    :param compact: parse files to compact model
+    :param cache_dir: parsed files cache directory, checking times are kept in it too (not kept if empty)
+    :param jobs: number of worker processes checking files at the same time (number of cpus if None)
+    :param timeout: time limit for file in seconds (no limit if 0)
+    :param memory: memory limit for worker process in MiB (no limit if 0)
+    :return: number of errors and warnings
+    """
+    jobs = jobs or os.cpu_count() or 1
+    options = {'hardware': hardware, 'plan': plan, 'compact': compact, 'cache_dir': cache_dir, 'memory': memory}
+    costs = load_costs(cache_dir)
+    pending = get_tasks(batch, costs)
+    # directory -> files without context data, context data, context, waiting profiles workers, project errors,
+    # number of not finished files
+    directories = {directory: {'left': set(), 'parts': {}, 'context': None, 'waiting': [], 'errors': [], 'tasks': 0}
+                   for directory in batch.keys()}
+    for cost, filename, directory, report in pending:
+        directories[directory]['left'].add(filename)
+        directories[directory]['tasks'] += 1
+    results = {}
+    workers = {}
+    names = list(batch.keys())
+    reported = 0
+    errors = warnings = 0
+    mp = multiprocessing.get_context('fork') if 'fork' in multiprocessing.get_all_start_methods() else multiprocessing
+
+    def set_context_part(worker: dict, part: object, file_type: str):
+        state = directories[worker['directory']]
+        if worker['filename'] not in state['left']:
+            return
+        state['left'].discard(worker['filename'])
+        state['parts'][worker['filename']] = (part, file_type)
+        if state['left']:
+            return
+        parts = {filename: state['parts'][filename] for filename in sorted(state['parts'].keys())}
+        state['context'], state['errors'] = get_context(parts)
+        for connection in state['waiting']:
+            if connection in workers:
+                workers[connection]['started'] = time.perf_counter()
+                workers[connection]['waiting'] = False
+                connection.send(state['context'])
+        state['waiting'] = []
+
+    def finish(connection, messages: list = None):
+        worker = workers.pop(connection)
+        if worker['process'].is_alive():
+            worker['process'].kill()
+        worker['process'].join()
+        connection.close()
+        if not worker['waiting']:
+            worker['used'] += time.perf_counter() - worker['started']
+        if worker['report']:
+            results[worker['filename']] = messages
+        directories[worker['directory']]['tasks'] -= 1
+        try:
+            costs[worker['filename']] = [os.path.getsize(worker['filename']), round(worker['used'], 6)]
+        except OSError:
+            pass
+        # file without context data is like file that is not parsed
+        set_context_part(worker, None, "")
+
+    reporter.start()
+    while pending or workers:
+        # workers of directories that wait for context are started first, they free memory of waiting workers
+        while pending and sum(1 for worker in workers.values() if not worker['waiting']) < jobs:
+            index = next((i for i, task in enumerate(pending) if directories[task[2]]['waiting']), 0)
+            cost, filename, directory, report = pending.pop(index)
+            connection, child = mp.Pipe()
+            process = mp.Process(target=run_task, args=(filename, report, options, child), daemon=True)
+            process.start()
+            child.close()
+            workers[connection] = {'filename': filename, 'directory': directory, 'report': report,
+                                   'process': process, 'started': time.perf_counter(), 'used': 0.0, 'waiting': False}
+        deadlines = [worker['started'] + timeout - worker['used'] for worker in workers.values()
+                     if not worker['waiting']]
+        wait_time = max(0.0, min(deadlines) - time.perf_counter()) if timeout and deadlines else None
+        for connection in wait(list(workers.keys()), wait_time):
+            worker = workers[connection]
+            try:
+                message = connection.recv()
+            except (EOFError, OSError):
+                worker['process'].join()
+                code = worker['process'].exitcode
+                if code == 0 and not worker['report']:
+                    finish(connection)
+                else:
+                    finish(connection, ["Error: worker process crashed (exit code %s), file is not checked" % code])
+                continue
+            if message[0] == 'context':
+                set_context_part(worker, message[1], message[2])
+                state = directories[worker['directory']]
+                if not worker['report'] or message[2] != "profiles":
+                    continue
+                if state['context'] is not None:
+                    connection.send(state['context'])
+                else:
+                    worker['used'] += time.perf_counter() - worker['started']
+                    worker['waiting'] = True
+                    state['waiting'].append(connection)
+            else:
+                finish(connection, message[1])
+        now = time.perf_counter()
+        for connection, worker in list(workers.items()):
+            if timeout and not worker['waiting'] and now - worker['started'] + worker['used'] > timeout:
+                finish(connection, ["Error: time limit %g s is exceeded, file is not checked" % timeout])
+        # directories are reported in batch order when all their files are checked
+        while reported < len(names):
+            directory = names[reported]
+            state = directories[directory]
+            if state['tasks']:
+                break
+            directory_errors, directory_warnings = report_directory(reporter, directory, batch[directory],
+                                                                    state['errors'], results)
+            errors, warnings = errors + directory_errors, warnings + directory_warnings
+            reported += 1
+    reporter.finish()
+    save_costs(cache_dir, costs)
+    return errors, warnings
@@ -0,0 +1,80 @@
+"""this module measures start time of IniChecker.py command line interface (interpreter start, imports and work) for
+--version and for checking one small file, and checks that times are in budget; exit code is 1 if budget is exceeded
+List of functions
+-measure(args, runs):                gets best time of running IniChecker.py with arguments
+-get_imported(args):                 gets modules of this project imported by subcommand
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import subprocess
+
+cli = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'IniChecker.py')
+# seconds, best of runs
+version_budget = 0.1
+check_budget = 0.2
+small_file = """Blade: {BandNumber: 3, PixPerBand: 48},
+Volume: {Common: 100, CoarseLow: 8, CoarseMid: 12, CoarseHigh: 16},
+PowerOffTimeout: 300,
+Deadtime: {AfterPowerOn: 300, AfterBlaster: 100, AfterClash: 100},
+ClashFlashDuration: 50
+"""
+
+
+def measure(args: list, runs: int) -> float:
+    """
+    runs IniChecker.py several times and gets best time
+    :param args: command line arguments
+    :param runs: number of runs
+    :return: best time in seconds
+    """
+    best = None
+    for i in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, cli] + args, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def get_imported(args: list) -> list:
+    """
+    gets modules of this project imported by IniChecker.py subcommand (with python -X importtime)
+    :param args: command line arguments
+    :return: list of modules names
+    """
+    result = subprocess.run([sys.executable, '-X', 'importtime', cli] + args, stdout=subprocess.DEVNULL,
+                            stderr=subprocess.PIPE, text=True)
+    directory = os.path.dirname(cli)
+    modules = []
+    for line in result.stderr.splitlines():
+        name = line.rsplit('|', 1)[-1].strip()
+        if os.path.exists(os.path.join(directory, name + '.py')) and name not in modules:
+            modules.append(name)
+    return modules
+
+
+def main(runs: int) -> int:
+    with tempfile.TemporaryDirectory() as directory:
+        filename = os.path.join(directory, 'common.ini')
+        with open(filename, 'w') as f:
+            f.write(small_file)
+        result = 0
+        for title, args, budget in (("--version", ['--version'], version_budget),
+                                    ("check small file", ['check', filename], check_budget)):
+            elapsed = measure(args, runs)
+            status = "ok" if elapsed <= budget else "over budget"
+            print("%-18s %.3f s (budget %.3f s) %s" % (title, elapsed, budget, status))
+            print("  imported: %s" % (", ".join(get_imported(args)) or "-"))
+            if elapsed > budget:
+                result = 1
+    return result
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="measures start time of IniChecker.py against time budget")
+    parser.add_argument('--runs', type=int, default=5, help="number of runs (best time is used)")
+    args = parser.parse_args()
+    sys.exit(main(args.runs))
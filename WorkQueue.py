@@ -0,0 +1,416 @@
+"""this module checks big batches on several machines through job directory on shared filesystem, without any
+services: coordinator writes work items (project directories with files to check) to job directory, workers claim
+items by atomic rename, check them and write result shards, coordinator merges shards into one report
+Job directory: job.json (checking options), pending/ (items to check), claimed/ (items being checked, workers touch
+them while checking), results/ (result shards). Claimed items that are not touched for stale time (worker crashed) are
+moved back to pending by workers and coordinator; time is got from shared filesystem, so clocks of machines may differ
+Usage: WorkQueue.py create JOB paths... (coordinator), WorkQueue.py worker JOB (on each machine),
+WorkQueue.py merge JOB (coordinator), WorkQueue.py run JOB paths... --workers N (all steps with local workers)
+List of functions
+-create_job(job, paths, rules_filename, board_filename, compact, cache_dir): writes job options and work items
+-claim_item(job):                         claims one pending item
+-requeue_stale(job, stale_time):          moves stale claimed items back to pending (or writes error shards for items
+                                          that stopped workers several times)
+-write_shard(job, name, item, project_errors, results): writes result shard of item
+-get_item_name(claim):                    gets item name of claimed item
+-check_item(job, claim, options):         checks item and writes result shard if lease is held
+-run_worker(job, stale_time, poll):       claims and checks items while job is not finished
+-merge_results(job, reporter, stale_time, timeout, poll): waits for all shards and writes them with reporter
+"""
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import threading
+import subprocess
+from ProjectChecker import load_project, check_project
+from Hardware import load_hardware, default_hardware
+from Rules import load_rules
+from Reporters import open_output, get_reporter, report_formats
+from BatchChecker import get_batch, report_directory
+import Defaults
+
+job_file = 'job.json'
+pending_dir = 'pending'
+claimed_dir = 'claimed'
+results_dir = 'results'
+clock_file = 'clock'
+item_extension = '.json'
+# seconds
+default_stale_time = Defaults.stale_time
+default_poll = 0.5
+# item that made workers crash this number of times gets error shard instead of being checked again
+max_requeues = 3
+
+
+def write_json(filename: str, data: dict):
+    """
+    writes json file atomically: readers see old file or whole new file
+    :param filename: file name
+    :param data: data
+    """
+    temp = "%s.%s.%i.tmp" % (filename, socket.gethostname(), os.getpid())
+    with open(temp, 'w', encoding='utf-8') as f:
+        json.dump(data, f)
+    os.replace(temp, filename)
+
+
+def read_json(filename: str) -> dict:
+    """
+    reads json file
+    :param filename: file name
+    :return: data or None if file is absent
+    """
+    try:
+        with open(filename, encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def get_items(job: str, state: str) -> list:
+    """
+    gets names of items in state directory
+    :param job: job directory
+    :param state: pending, claimed or results
+    :return: sorted list of item names
+    """
+    try:
+        names = os.listdir(os.path.join(job, state))
+    except FileNotFoundError:
+        return []
+    return sorted(name for name in names if name.endswith(item_extension))
+
+
+def get_shared_time(job: str) -> float:
+    """
+    gets current time of shared filesystem: modification time of touched clock file
+    :param job: job directory
+    :return: time in seconds
+    """
+    filename = os.path.join(job, clock_file)
+    with open(filename, 'a'):
+        os.utime(filename)
+    return os.stat(filename).st_mtime
+
+
+def create_job(job: str, paths: list, rules_filename: str = "", board_filename: str = "", compact: bool = False,
+               cache_dir: str = "") -> (int, str):
+    """
+    writes job options and work items (one item for each directory of batch)
+    :param job: job directory (must be absent or empty)
+    :param paths: list of ini files and directories
+    :param rules_filename: rules configuration file
+    :param board_filename: hardware capability file
+    :param compact: parse files to compact model
+    :param cache_dir: parsed files cache directory
+    :return: number of items, error message or empty string
+    """
+    if os.path.isdir(job) and os.listdir(job):
+        return 0, "job directory %s is not empty" % job
+    for state in (pending_dir, claimed_dir, results_dir):
+        os.makedirs(os.path.join(job, state), exist_ok=True)
+    batch = get_batch(paths)
+    options = {'rules': os.path.abspath(rules_filename) if rules_filename else "",
+               'board': os.path.abspath(board_filename) if board_filename else "",
+               'compact': compact, 'cache': os.path.abspath(cache_dir) if cache_dir else "", 'items': len(batch)}
+    for i, (directory, filenames) in enumerate(batch.items()):
+        write_json(os.path.join(job, pending_dir, "%06i%s" % (i, item_extension)),
+                   {'directory': directory, 'filenames': filenames})
+    # options are written last, workers start when job is complete
+    write_json(os.path.join(job, job_file), options)
+    return len(batch), ""
+
+
+def get_item_name(claim: str) -> str:
+    """
+    gets item name of claim
+    :param claim: name of claimed item (item name with worker host and pid)
+    :return: item name
+    """
+    return claim.split('.', 1)[0] + item_extension
+
+
+def claim_item(job: str) -> str:
+    """
+    claims pending item: item is renamed to claimed directory with name of worker, only one worker can rename it, and
+    worker holds the lease while claim with its name exists
+    :param job: job directory
+    :return: claim name or empty string if there are no pending items
+    """
+    for name in get_items(job, pending_dir):
+        # random part makes claims of the same item by one worker different too
+        claim = "%s.%s.%i.%s%s" % (name[:-len(item_extension)], socket.gethostname(), os.getpid(),
+                                   os.urandom(4).hex(), item_extension)
+        claimed = os.path.join(job, claimed_dir, claim)
+        try:
+            os.rename(os.path.join(job, pending_dir, name), claimed)
+        except FileNotFoundError:
+            # claimed by other worker
+            continue
+        # rename keeps modification time, claim time is set for finding stale items
+        os.utime(claimed)
+        return claim
+    return ""
+
+
+def requeue_stale(job: str, stale_time: float = default_stale_time) -> list:
+    """
+    moves claimed items that are not touched for stale time back to pending (their workers are dead)
+    :param job: job directory
+    :param stale_time: seconds
+    :return: list of moved items
+    """
+    moved = []
+    now = get_shared_time(job)
+    for claim in get_items(job, claimed_dir):
+        claimed = os.path.join(job, claimed_dir, claim)
+        name = get_item_name(claim)
+        # item is renamed before it is changed, so only one process requeues it and its worker loses the lease
+        requeued = "%s.%s.%i.requeue" % (claimed, socket.gethostname(), os.getpid())
+        try:
+            if now - os.stat(claimed).st_mtime < stale_time:
+                continue
+            if os.path.exists(os.path.join(job, results_dir, name)):
+                os.remove(claimed)
+                continue
+            os.rename(claimed, requeued)
+        except FileNotFoundError:
+            # finished or moved by other process
+            continue
+        item = read_json(requeued)
+        item['requeues'] = item.get('requeues', 0) + 1
+        if item['requeues'] >= max_requeues:
+            message = "Error: checking of directory stopped workers %i times, file is not checked" % item['requeues']
+            write_shard(job, name, item, [], {filename: [message] for filename in item['filenames']})
+        else:
+            write_json(os.path.join(job, pending_dir, name), item)
+        os.remove(requeued)
+        moved.append(name)
+    return moved
+
+
+def is_finished(job: str) -> bool:
+    """
+    checks that all items have result shards
+    :param job: job directory
+    :return: True if job is finished
+    """
+    options = read_json(os.path.join(job, job_file))
+    return options is not None and len(get_items(job, results_dir)) >= options['items']
+
+
+def keep_claim(claimed: str, stop: threading.Event, interval: float):
+    """
+    touches claimed item while it is checked, so it is not stale
+    """
+    while not stop.wait(interval):
+        try:
+            os.utime(claimed)
+        except FileNotFoundError:
+            return
+
+
+def write_shard(job: str, name: str, item: dict, project_errors: list, results: dict):
+    """
+    writes result shard of item
+    :param job: job directory
+    :param name: item name
+    :param item: work item
+    :param project_errors: list of project errors
+    :param results: dict filename -> list of messages
+    """
+    shard = {'directory': item['directory'], 'filenames': item['filenames'], 'project_errors': project_errors,
+             'results': results, 'worker': "%s:%i" % (socket.gethostname(), os.getpid())}
+    write_json(os.path.join(job, results_dir, name), shard)
+
+
+def check_item(job: str, claim: str, options: dict, hardware: dict = default_hardware, plan: dict = None,
+               stale_time: float = default_stale_time):
+    """
+    checks claimed item and writes result shard if the lease is still held (item is not requeued as stale)
+    :param job: job directory
+    :param claim: claim name from claim_item
+    :param options: job options
+    :param hardware: dict with hardware limits
+    :param plan: rules execution plan (all rules are checked if None)
+    :param stale_time: seconds, item is touched several times during this time
+    """
+    claimed = os.path.join(job, claimed_dir, claim)
+    item = read_json(claimed)
+    if item is None:
+        # item was moved back to pending as stale
+        return
+    stop = threading.Event()
+    keeper = threading.Thread(target=keep_claim, args=(claimed, stop, stale_time / 3), daemon=True)
+    keeper.start()
+    try:
+        # files of directory that is not found are reported by report_directory
+        files = load_project(item['directory'], options['compact'], options['cache']) \
+            if os.path.isdir(item['directory']) else {}
+        project_errors, results = check_project(files, hardware, item['filenames'], plan)
+    except Exception as e:
+        # error of one item doesn't stop worker, it is reported for all files of item
+        message = "Error: checking of directory failed with %s: %s" % (type(e).__name__, e)
+        project_errors, results = [], {filename: [message] for filename in item['filenames']}
+    finally:
+        stop.set()
+        keeper.join()
+    # claim is renamed before shard is written, so it can't be requeued while shard is written; if it is not found,
+    # item was requeued and is checked by other worker
+    finished = claimed + ".finish"
+    try:
+        os.rename(claimed, finished)
+    except FileNotFoundError:
+        return
+    write_shard(job, get_item_name(claim), item, project_errors, results)
+    os.remove(finished)
+
+
+def load_options(job: str) -> (dict, dict, dict, str):
+    """
+    loads job options, hardware and rules plan
+    :param job: job directory
+    :return: options, hardware, plan, error message or empty string
+    """
+    options = read_json(os.path.join(job, job_file))
+    if options is None:
+        return None, None, None, "job %s is not created" % job
+    hardware, plan = default_hardware, None
+    if options['board']:
+        hardware, error = load_hardware(options['board'])
+        if error:
+            return None, None, None, "hardware file %s: %s" % (options['board'], error)
+    if options['rules']:
+        plan, error = load_rules(options['rules'])
+        if error:
+            return None, None, None, "rules file %s: %s" % (options['rules'], error)
+    return options, hardware, plan, ""
+
+
+def run_worker(job: str, stale_time: float = default_stale_time, poll: float = default_poll) -> (int, str):
+    """
+    claims and checks items until all items have results; when there are no pending items, stale items of crashed
+    workers are moved back to pending
+    :param job: job directory
+    :param stale_time: seconds
+    :param poll: seconds between looking for items
+    :return: number of checked items, error message or empty string
+    """
+    options, hardware, plan, error = load_options(job)
+    if error:
+        return 0, error
+    checked = 0
+    while not is_finished(job):
+        claim = claim_item(job)
+        if claim:
+            check_item(job, claim, options, hardware, plan, stale_time)
+            checked += 1
+        elif not requeue_stale(job, stale_time):
+            time.sleep(poll)
+    return checked, ""
+
+
+def merge_results(job: str, reporter, stale_time: float = default_stale_time, timeout: float = 0,
+                  poll: float = default_poll) -> (int, int, str):
+    """
+    waits for result shards of all items (stale items are moved back to pending) and writes them with reporter in
+    batch order
+    :param job: job directory
+    :param reporter: reporter from Reporters
+    :param stale_time: seconds
+    :param timeout: seconds to wait for shards (no limit if 0)
+    :param poll: seconds between looking for shards
+    :return: number of errors and warnings, error message or empty string
+    """
+    options = read_json(os.path.join(job, job_file))
+    if options is None:
+        return 0, 0, "job %s is not created" % job
+    start = time.time()
+    while not is_finished(job):
+        if timeout and time.time() - start > timeout:
+            return 0, 0, "job %s is not finished: %i of %i items are checked" % \
+                   (job, len(get_items(job, results_dir)), options['items'])
+        requeue_stale(job, stale_time)
+        time.sleep(poll)
+    errors = warnings = 0
+    reporter.start()
+    for name in get_items(job, results_dir):
+        shard = read_json(os.path.join(job, results_dir, name))
+        shard_errors, shard_warnings = report_directory(reporter, shard['directory'], shard['filenames'],
+                                                        shard['project_errors'], shard['results'])
+        errors, warnings = errors + shard_errors, warnings + shard_warnings
+    reporter.finish()
+    return errors, warnings, ""
+
+
+def start_workers(job: str, number: int, stale_time: float = default_stale_time) -> list:
+    """
+    starts local worker processes
+    :param job: job directory
+    :param number: number of workers
+    :param stale_time: seconds
+    :return: list of processes
+    """
+    command = [sys.executable, os.path.abspath(__file__), 'worker', job, '--stale', str(stale_time)]
+    return [subprocess.Popen(command) for i in range(number)]
+
+
+def main(action: str, job: str, paths: list = (), rules_filename: str = "", board_filename: str = "",
+         compact: bool = False, cache_dir: str = "", workers: int = 2, report_format: str = "text",
+         output: str = "", stale_time: float = default_stale_time, timeout: float = 0) -> int:
+    if action in ('create', 'run'):
+        number, error = create_job(job, list(paths), rules_filename, board_filename, compact, cache_dir)
+        if error:
+            print("Error: %s" % error)
+            return 2
+        if action == 'create':
+            print("Job %s: %i items" % (job, number))
+            return 0
+    if action == 'worker':
+        checked, error = run_worker(job, stale_time)
+        if error:
+            print("Error: %s" % error)
+            return 2
+        return 0
+    processes = start_workers(job, workers, stale_time) if action == 'run' else []
+    stream = open_output(output)
+    try:
+        errors, warnings, error = merge_results(job, get_reporter(report_format, stream), stale_time, timeout)
+    finally:
+        if stream is not sys.stdout:
+            stream.close()
+        # workers of job that is not finished (timeout) would wait for items forever
+        finished = is_finished(job)
+        for process in processes:
+            if not finished:
+                process.kill()
+            process.wait()
+    if error:
+        print("Error: %s" % error)
+        return 2
+    return 1 if errors else 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="checks ini files on several machines through shared job directory")
+    parser.add_argument('action', choices=['create', 'worker', 'merge', 'run'],
+                        help="create: write work items, worker: check items, merge: write report of checked items, "
+                             "run: create, check with local workers and merge")
+    parser.add_argument('job', help="job directory on shared filesystem")
+    parser.add_argument('paths', nargs='*', help="ini files or project directories (for create and run)")
+    parser.add_argument('--rules', default="", help="rules configuration file")
+    parser.add_argument('--board', default="", help="hardware capability file")
+    parser.add_argument('--compact', action='store_true', help="use compact in-memory model")
+    parser.add_argument('--cache', default="", help="parsed files cache directory")
+    parser.add_argument('--workers', type=int, default=2, help="number of local workers (for run)")
+    parser.add_argument('--format', default="text", choices=report_formats, help="report format")
+    parser.add_argument('--output', default="", help="report file (stdout if absent)")
+    parser.add_argument('--stale', type=float, default=default_stale_time,
+                        help="seconds after which claimed item of dead worker is checked again")
+    parser.add_argument('--timeout', type=float, default=0, help="seconds to wait for workers in merge (no limit if 0)")
+    args = parser.parse_args()
+    sys.exit(main(args.action, args.job, args.paths, args.rules, args.board, args.compact, args.cache, args.workers,
+                  args.format, args.output, args.stale, args.timeout))
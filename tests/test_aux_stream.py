@@ -0,0 +1,89 @@
+import pytest
+import AuxStream
+import Auxchecker
+import Rules
+from IniToJson import get_json
+
+correct_text = """// aux effects
+PowerOn: [
+  {
+    Config: [Led1, Led2],
+    Sequence: [
+      {Brightness: [0, 0], Name: start},
+      {Brightness: [100, 50], Smooth: 200, Wait: 100},
+      {Brightness: [CopyRed, 0], Wait: 50},
+      {Repeat: {StartingFrom: start, Count: 2}},
+    ]
+  },
+  {
+    Config: [Led3],
+    Sequence: [{Brightness: [10], Wait: 300}]
+  }
+],
+Blink: [
+  {
+    Config: [Led4],
+    Sequence: [
+      {Brightness: [100], Wait: 100, Name: on},
+      {Brightness: [0], Wait: 100},
+      {Repeat: {StartingFrom: on, Count: forever}}
+    ]
+  }
+]
+"""
+wrong_text = """PowerOn: [
+  {
+    Config: [Led1, Led2],
+    Sequence: [
+      {Brightness: [0, 0], Name: start},
+      {Brightness: [100, 500], Smooth: 200, Wait: -100},
+      {Brightness: [CopyRed], Wait: 50},
+      {Repeat: {StartingFrom: finish, Count: 2}},
+    ]
+  },
+  {
+    Config: [Led2, Led9],
+    Sequence: [{Brightness: [10, Copy], Wait: 300, Size: 1}]
+  }
+],
+Empty: [],
+Blink: [
+  {
+    Config: [Led4],
+    Sequence: [{Brightness: [100], Wait: 100, Name: on}, {Repeat: {StartingFrom: on, Count: forever}}]
+  }
+]
+"""
+
+
+def get_checker_messages(text, leds_number, plan=None):
+    data, error = get_json(text)
+    assert not error
+    return [message for effect in data.keys()
+            for message in Auxchecker.check_effect(data, effect, plan) +
+            Auxchecker.check_effect_leds(data, effect, leds_number, plan)]
+
+
+@pytest.mark.parametrize('text', [correct_text, wrong_text])
+@pytest.mark.parametrize('leds_number', [8, 3])
+def test_same_messages_as_auxchecker(text, leds_number):
+    expected = get_checker_messages(text, leds_number)
+    assert list(AuxStream.check_stream(text.splitlines(True), leds_number)) == expected
+
+
+def test_same_messages_with_rules_plan():
+    plan, error = Rules.get_plan({'aux_config': 'Off', 'aux_wait': 'Warning'})
+    assert not error
+    expected = get_checker_messages(wrong_text, 8, plan)
+    assert list(AuxStream.check_stream(wrong_text.splitlines(True), 8, plan)) == expected
+
+
+def test_correct_file_has_no_messages():
+    assert list(AuxStream.check_stream(correct_text.splitlines(True), 8)) == []
+
+
+def test_stream_from_file(tmp_path):
+    filename = tmp_path / "aux.ini"
+    filename.write_text(wrong_text)
+    with open(filename) as f:
+        assert list(AuxStream.check_stream(f, 8)) == get_checker_messages(wrong_text, 8)
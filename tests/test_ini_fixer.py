@@ -0,0 +1,57 @@
+import pytest
+import IniFixer
+from IniToJson import get_json
+
+common_text = """// common settings
+Blade: {BandNumber: 2, PixPerBand: 100},
+Blade2: {BandNumber: 1, PixPerBand: 20},
+Volume: {Common: 500, CoarseLow: 10, CoarseMid: 50, CoarseHigh: 100}, /* too loud */
+PowerOffTimeout: 300,
+DeadTime: {AfterPowerOn: 100, AfterBlaster: 100, AfterClash: 100},
+ClashFlashDuration: 50,
+Motion: {
+  Swing: {HighW: 200, WPercent: 50, Circle: 300, CircleW: 100},
+  Spin: {Enabled: 1, Counter: 2, W: 300, Circle: 360, WLow: 100},
+  Clash: {HighA: 3000, Length: 100, HitLevel: -500, LowW: 5},
+  Stab: {Enabled: 1, HighA: 2000, LowW: 50, HitLevel: -1500, Lenght: 100, Percent: 70},
+  Screw: {Enabled: 1, LowW: 50, HighW: 200}
+}
+"""
+
+
+@pytest.fixture
+def common_file(tmp_path):
+    filename = tmp_path / "common.ini"
+    filename.write_text(common_text)
+    return filename
+
+
+def test_fixes_are_shown_without_write(common_file):
+    descriptions, messages, error = IniFixer.fix_file(str(common_file))
+    assert not error
+    assert descriptions == ["Volume Common: 500 is out of 0...100, set to 100",
+                            "Motion Stab Lenght: unknown parameter Lenght is renamed to Length"]
+    assert messages == []
+    assert common_file.read_text() == common_text
+
+
+def test_write_keeps_comments_and_layout(common_file):
+    descriptions, messages, error = IniFixer.fix_file(str(common_file), True)
+    assert not error and len(descriptions) == 2
+    fixed = common_file.read_text()
+    assert fixed == common_text.replace("Common: 500", "Common: 100").replace("Lenght", "Length")
+    assert get_json(fixed)[1] == ""
+    # fixed file has nothing to fix
+    assert IniFixer.fix_file(str(common_file)) == ([], [], "")
+
+
+def test_overlapping_fixes_are_not_applied():
+    fixes = [(0, 3, "x", ("a",), "a"), (2, 4, "y", ("b",), "b")]
+    with pytest.raises(ValueError):
+        IniFixer.apply_fixes(b"abcdef", fixes)
+    assert IniFixer.apply_fixes(b"abcdef", [(0, 2, "x", ("a",), "a"), (2, 4, "y", ("b",), "b")]) == b"xyef"
+
+
+def test_missing_file(tmp_path):
+    descriptions, messages, error = IniFixer.fix_file(str(tmp_path / "absent.ini"))
+    assert error.endswith("not found")
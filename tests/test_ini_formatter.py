@@ -0,0 +1,34 @@
+import IniFormatter
+
+profiles_text = """// profiles
+calm: {workingmode: {flaming: 0, Color: [0, 255, 0], FLICKERINGALWAYS: 0}},
+Default: {
+  WorkingMode: {Color: [0, 0, 255], Flaming: 1, FlickeringAlways: 1},
+  Flaming: {Size: {Max: 100, Min: 10}, Colors: [[255, 0, 0], Random, [255, 128, 0]]},
+}
+"""
+
+
+def test_canonical_text_is_stable():
+    canonical, error = IniFormatter.get_canonical(profiles_text)
+    assert not error
+    assert IniFormatter.get_canonical(canonical) == (canonical, "")
+
+
+def test_canonical_hash_ignores_layout_and_comments():
+    canonical, error = IniFormatter.get_canonical(profiles_text)
+    assert IniFormatter.get_canonical_hash(canonical) == IniFormatter.get_canonical_hash(profiles_text)
+    changed = profiles_text.replace("Flaming: 1", "Flaming: 0")
+    assert IniFormatter.get_canonical_hash(changed) != IniFormatter.get_canonical_hash(profiles_text)
+
+
+def test_keys_are_written_in_canonical_case():
+    canonical, error = IniFormatter.get_canonical(profiles_text)
+    assert "WorkingMode" in canonical and "FlickeringAlways" in canonical
+    assert "workingmode" not in canonical and "FLICKERINGALWAYS" not in canonical
+    assert "//" not in canonical
+
+
+def test_parsing_error():
+    canonical, error = IniFormatter.get_canonical("A: {B: 1")
+    assert error
@@ -0,0 +1,56 @@
+import pytest
+import IniToJson
+import MmapLexer
+
+profiles_text = """// profiles
+Default: {
+  AfterWake: {AuxLedsEffect: Blink},
+  PowerOn: {Blade: {Speed: 100}, AuxLedsEffect: PowerOn},
+  WorkingMode: {Color: [0, 0, 255], Flaming: 1, FlickeringAlways: 1},
+  Flaming: {Size: {Min: 10, Max: 100}, Speed: {Min: 10, Max: 50}, Delay_ms: {Min: 50, Max: 200},
+            Colors: [[255, 0, 0], Random, [255, 128, 0],]},
+  /* flickering
+     is off */
+  Flickering: {Time: {Min: 50, Max: 100}, Brightness: {Min: 50, Max: 100}},
+  Clash: {Color: Random, Duration_ms: 200, SizePix: 20},
+},
+Calm: {WorkingMode: {Color: [0, 255, 0], Flaming: 0, FlickeringAlways: 0}}
+"""
+aux_text = """PowerOn: [
+  {
+    Config: [Led1, Led2],
+    Sequence: [
+      {Brightness: [0, 0], Name: start},
+      {Brightness: [100, 50], Smooth: 200, Wait: 100},
+      {Brightness: [CopyRed, 0], Wait: 50},
+      {Repeat: {StartingFrom: start, Count: 2}},
+    ]
+  }
+]
+"""
+common_text = """Blade: {BandNumber: 2, PixPerBand: 100},
+Volume: {Common: 50, CoarseLow: 10, CoarseMid: 50, CoarseHigh: 100},
+PowerOffTimeout: 300,
+Motion: {Clash: {HighA: 3000, Length: 100, HitLevel: -500, LowW: 5}}
+"""
+texts = [profiles_text, aux_text, common_text, "// only comment", "A: {B: 1,, C: [1, 2,]}", "A: {B: 1\nC: 2}",
+         "A: {B: [1, 2}", "A: {B: 1}}", "Key: -1.5"]
+
+
+@pytest.mark.parametrize('text', texts)
+def test_same_result_as_ini_to_json(text):
+    assert MmapLexer.get_json(text) == IniToJson.get_json(text)
+
+
+@pytest.mark.parametrize('text', [profiles_text, aux_text, common_text])
+def test_load_json_same_as_ini_to_json(tmp_path, text):
+    filename = tmp_path / "file.ini"
+    filename.write_text(text)
+    assert MmapLexer.load_json(str(filename)) == IniToJson.load_json(str(filename))
+
+
+def test_error_line_after_comment():
+    data, error = MmapLexer.get_json("/* one\ntwo */\nA: {B: 1\nC: 2}")
+    assert data is None
+    assert error == IniToJson.get_json("/* one\ntwo */\nA: {B: 1\nC: 2}")[1]
+    assert error.startswith("Line 3 or 4:")
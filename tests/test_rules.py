@@ -0,0 +1,78 @@
+import Rules
+import ProjectChecker
+from IniToJson import get_json
+
+common_text = """Blade: {BandNumber: 2, PixPerBand: 300},
+Volume: {Common: 500, CoarseLow: 10, CoarseMid: 50, CoarseHigh: 100},
+PowerOffTimeout: 300,
+DeadTime: {AfterPowerOn: 100, AfterBlaster: 100, AfterClash: 100},
+ClashFlashDuration: 50,
+Motion: {
+  Spin: {Enabled: 1, Counter: 2, W: 300, Circle: 360, WLow: 100},
+  Clash: {HighA: 3000, Length: 100, HitLevel: -500, LowW: 5},
+  Stab: {Enabled: 1, HighA: 2000, LowW: 50, HitLevel: -1500, Length: 100, Percent: 70},
+  Screw: {Enabled: 1, LowW: 50, HighW: 200}
+}
+"""
+context = {'leds': 0, 'blade2leds': 0, 'auxeffects': {}}
+
+
+def get_messages(config):
+    plan, error = Rules.get_plan(config)
+    assert not error
+    data, error = get_json(common_text)
+    return ProjectChecker.check_file(data, "common", context, plan=plan)
+
+
+def get_rule_messages(messages, parameter):
+    return [message for message in messages if "%s parameter" % parameter in message]
+
+
+def test_plan_has_all_rules_by_default():
+    plan, error = Rules.get_plan({})
+    assert not error
+    assert set(plan.keys()) == set(Rules.get_rules())
+    assert set(plan.values()) == {"default"}
+
+
+def test_plan_severities():
+    plan, error = Rules.get_plan({'Common_Volume': 'Off', 'common_blade': 'warning', 'aux_smooth': 'ERROR'})
+    assert not error
+    assert 'common_volume' not in plan
+    assert plan['common_blade'] == "warning"
+    assert plan['aux_smooth'] == "error"
+
+
+def test_plan_errors():
+    plan, error = Rules.get_plan({'no_rule': 'Off', 'common_volume': 'Loud'})
+    assert plan is None
+    assert "unknown rule no_rule" in error
+    assert "common_volume rule severity must be one of" in error
+
+
+def test_rule_off_is_not_checked():
+    assert get_rule_messages(get_messages({}), "Volume")[0].startswith("Error")
+    assert get_rule_messages(get_messages({'common_volume': 'Off'}), "Volume") == []
+
+
+def test_rule_severity_changes_level():
+    messages = get_rule_messages(get_messages({'common_volume': 'Warning'}), "Volume")
+    assert len(messages) == 1 and messages[0].startswith("Warning")
+    messages = get_rule_messages(get_messages({'common_blade': 'Error'}), "Blade")
+    assert len(messages) == 1 and messages[0].startswith("Error")
+
+
+def test_absent_motion_effect_has_own_rule():
+    assert get_rule_messages(get_messages({}), "Swing")[0].startswith("Error")
+    assert get_rule_messages(get_messages({'common_swing_settings': 'Off'}), "Swing") == []
+    assert get_rule_messages(get_messages({'common_swing_settings': 'Warning'}), "Swing")[0].startswith("Warning")
+    # other rules of effect don't hide absent settings
+    assert get_rule_messages(get_messages({'common_swing_keys': 'Off'}), "Swing")[0].startswith("Error")
+
+
+def test_load_rules(tmp_path):
+    filename = tmp_path / "rules.ini"
+    filename.write_text("// rules\ncommon_volume: off,\naux_smooth: Error\n")
+    plan, error = Rules.load_rules(str(filename))
+    assert not error
+    assert 'common_volume' not in plan and plan['aux_smooth'] == "error"
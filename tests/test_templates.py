@@ -0,0 +1,83 @@
+import ProfileChecker
+from IniToJson import get_json
+
+profiles_text = """\
+Templates: {
+  Base: {
+    AfterWake: {AuxLedsEffect: Blink},
+    PowerOn: {Blade: {Speed: 100}},
+    WorkingMode: {Color: [300, 0, 255], Flaming: 0, FlickeringAlways: 0},
+    PowerOff: {Blade: {Speed: 100, MoveForward: 1}},
+    Flaming: {Size: {Min: 10, Max: 100}, Speed: {Min: 10, Max: 50}, Delay_ms: {Min: 50, Max: 200}, Colors: [Random]},
+    Flickering: {Time: {Min: 50, Max: 100}, Brightness: {Min: 50, Max: 100}},
+    Blaster: {Color: [255, 255, 255], Duration_ms: 200, SizePix: 10},
+    Clash: {Color: Random, Duration_ms: 200, SizePix: 20},
+    Stab: {Color: [255, 0, 0], Duration_ms: 200, SizePix: 10},
+    Lockup: {Flicker: {Color: [255, 255, 0], Time: {Min: 20, Max: 40}, Brightness: {Min: 30, Max: 100}},
+             Flashes: {Period: {Min: 50, Max: 100}, Color: [255, 255, 255], Duration_ms: 30, SizePix: 5}},
+    Blade2: {DelayBeforeOn: 10, WorkingMode: {Color: [0, 255, 0]}}
+  },
+  green: {Extends: base, Blaster: {SizePix: 20}},
+  Self: {Extends: Self},
+  A: {Extends: B},
+  B: {Extends: C},
+  C: {Extends: A}
+},
+Lime: {Extends: Green, Clash: {SizePix: 30}},
+Fixed: {Extends: Green, WorkingMode: {Color: [0, 255, 0]}},
+Broken: {Extends: Missing},
+Number: {Extends: 5}
+"""
+
+
+def get_data():
+    data, error = get_json(profiles_text)
+    assert not error
+    return data
+
+
+def test_templates_are_merged():
+    profiles = ProfileChecker.get_resolved_profiles(get_data())
+    lime, error = profiles['Lime']
+    assert not error
+    # template names are case insensitive, nested settings are merged
+    assert lime['Blaster'] == {'Color': [255, 255, 255], 'Duration_ms': 200, 'SizePix': 20}
+    assert lime['Clash'] == {'Color': 'Random', 'Duration_ms': 200, 'SizePix': 30}
+    assert 'Extends' not in lime
+    assert profiles['Fixed'][0]['WorkingMode'] == {'Color': [0, 255, 0], 'Flaming': 0, 'FlickeringAlways': 0}
+
+
+def test_template_is_resolved_once():
+    data = get_data()
+    templates = ProfileChecker.get_templates(data)[0]
+    resolved = {}
+    green, error = ProfileChecker.resolve_template(templates, 'Green', resolved)
+    assert not error
+    assert set(resolved.keys()) == {'green', 'base'}
+    assert ProfileChecker.resolve_template(templates, 'GREEN', resolved)[0] is green
+
+
+def test_cycles_are_found():
+    templates = ProfileChecker.get_templates(get_data())[0]
+    assert ProfileChecker.resolve_template(templates, 'Self', {}) == \
+        (None, "templates extend each other: Self -> Self;")
+    assert ProfileChecker.resolve_template(templates, 'A', {}) == \
+        (None, "templates extend each other: A -> B -> C -> A;")
+
+
+def test_wrong_extends():
+    profiles = ProfileChecker.get_resolved_profiles(get_data())
+    assert profiles['Broken'] == (None, "template Missing is not defined;")
+    assert profiles['Number'] == (None, "Extends must be template name;")
+
+
+def test_check_profiles():
+    messages = ProfileChecker.check_profiles(get_data(), 144)
+    # error of base template is reported for template only, not for templates and profiles that extend it
+    assert [message for message in messages if "color must be positive number" in message] == \
+        ["Error: Base template WorkingMode effect:\ncolor must be positive number (max 255);"]
+    for name in ('Self', 'A', 'B', 'C'):
+        assert len([message for message in messages
+                    if message.startswith("Error: %s template: templates extend each other:" % name)]) == 1
+    assert "Error: Broken profile: template Missing is not defined;" in messages
+    assert not [message for message in messages if "Lime" in message or "Fixed" in message]